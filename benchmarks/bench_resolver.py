@@ -0,0 +1,97 @@
+"""
+Benchmark for full vs lazy environment resolution.
+
+Generates synthetic site-packages directories with a small and a large number
+of fake distributions, then resolves a script importing two of them, once by
+indexing the whole environment and once with LazyIndex. Then compares serial
+and threaded metadata reads when building the full index; --latency adds a
+delay to every metadata file read to mimic a network filesystem.
+
+    python benchmarks/bench_resolver.py
+    python benchmarks/bench_resolver.py --sizes 20 900 --repeat 5
+    python benchmarks/bench_resolver.py --sizes 300 --latency 1
+"""
+import argparse
+import importlib.metadata
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from depscripter.resolver import LazyIndex, build_environment_index, resolve_packages
+
+# Threads for the threaded reads, as many as ThreadPoolExecutor would use
+THREADS = min(32, (os.cpu_count() or 1) + 4)
+from synthetic import make_environment
+
+
+def best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[20, 900])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0, help="Milliseconds added to each metadata file read")
+    args = parser.parse_args()
+
+    if args.latency:
+        read_text = importlib.metadata.PathDistribution.read_text
+
+        def slow_read_text(self, filename):
+            time.sleep(args.latency / 1000)
+            return read_text(self, filename)
+
+        importlib.metadata.PathDistribution.read_text = slow_read_text
+
+    scenarios = {
+        "name match": {"pkg0001", "pkg0002", "os"},
+        "fallback": {"pkg0001", "othermod", "os"},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Stand-in for the stdlib directory, so "os" is found outside site-packages
+        stdlib = Path(tmp) / "stdlib"
+        stdlib.mkdir()
+        (stdlib / "os.py").write_text("", encoding="utf-8")
+
+        print(f"{'dists':>6} {'scenario':>12} {'full':>10} {'lazy':>10} {'speedup':>8} {'reads':>6}")
+        for size in args.sizes:
+            site = make_environment(Path(tmp), size)
+            path = [str(stdlib), str(site)]
+
+            for label, modules in scenarios.items():
+                def full():
+                    mapping, versions = build_environment_index(path)
+                    return resolve_packages(modules, mapping=mapping, versions=versions)
+
+                def lazy():
+                    index = LazyIndex(path=path)
+                    resolve_packages(modules, mapping=index, versions=index.versions)
+                    return index
+
+                reads = lazy().metadata_reads
+                full_time = best_of(full, args.repeat)
+                lazy_time = best_of(lazy, args.repeat)
+                print(
+                    f"{size:>6} {label:>12} {full_time * 1000:>8.1f}ms {lazy_time * 1000:>8.2f}ms "
+                    f"{full_time / lazy_time:>7.1f}x {reads:>6}"
+                )
+
+        print()
+        print(f"{'dists':>6} {'serial':>10} {'threaded':>10} {'speedup':>8}")
+        for size in args.sizes:
+            site = make_environment(Path(tmp) / "no-top-level", size, top_level=False)
+            serial = best_of(lambda: build_environment_index([str(site)], workers=1), args.repeat)
+            threaded = best_of(lambda: build_environment_index([str(site)], workers=THREADS), args.repeat)
+            print(f"{size:>6} {serial * 1000:>8.1f}ms {threaded * 1000:>8.1f}ms {serial / threaded:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Micro-benchmark for the import scanner.
+
+Compares the statement-only traversal used by scan_imports() with a full
+ast.walk() over the same tree, and the end-to-end cost of the "ast" and
+"tokenize" scanner engines, on generated scripts of increasing size.
+
+    python benchmarks/bench_scanner.py
+    python benchmarks/bench_scanner.py --lines 5000 50000 --repeat 10
+"""
+import argparse
+import ast
+import time
+
+from functools import partial
+
+from depscripter.scanner import _iter_import_nodes, scan_imports
+
+
+def generate_script(lines: int) -> str:
+    """
+    Generates a script with a handful of imports and `lines` lines of
+    expression-heavy code, similar to generated data/config scripts.
+    """
+    out = [
+        "import os",
+        "import numpy as np",
+        "from collections import defaultdict",
+        "",
+        "def build():",
+        "    import pandas",
+        "    data = defaultdict(list)",
+    ]
+    for i in range(lines):
+        out.append(f"    data['k{i % 97}'].append(({i}, 'value_{i}', [x * {i} for x in range(3)], {{'a': {i}}}))")
+    out.append("    return data")
+    return "\n".join(out) + "\n"
+
+
+def walk_imports(tree: ast.Module) -> int:
+    count = 0
+    for node in ast.walk(tree):
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            count += 1
+    return count
+
+
+def statement_imports(tree: ast.Module) -> int:
+    return sum(1 for _ in _iter_import_nodes(tree.body))
+
+
+def best_of(func, arg, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--lines", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print("Traversal of an already parsed tree")
+    print(f"{'lines':>8} {'parse':>10} {'ast.walk':>10} {'stmt-only':>10} {'speedup':>8}")
+    for lines in args.lines:
+        source = generate_script(lines)
+        tree = ast.parse(source)
+        assert walk_imports(tree) == statement_imports(tree)
+
+        parse_time = best_of(ast.parse, source, args.repeat)
+        walk_time = best_of(walk_imports, tree, args.repeat)
+        stmt_time = best_of(statement_imports, tree, args.repeat)
+        print(
+            f"{lines:>8} {parse_time * 1000:>8.1f}ms {walk_time * 1000:>8.1f}ms "
+            f"{stmt_time * 1000:>8.2f}ms {walk_time / stmt_time:>7.0f}x"
+        )
+
+    print()
+    print("scan_imports() end to end")
+    print(f"{'lines':>8} {'ast':>10} {'tokenize':>10} {'speedup':>8}")
+    for lines in args.lines:
+        source = generate_script(lines)
+        assert scan_imports(source, engine="ast") == scan_imports(source, engine="tokenize")
+
+        ast_time = best_of(partial(scan_imports, engine="ast"), source, args.repeat)
+        tok_time = best_of(partial(scan_imports, engine="tokenize"), source, args.repeat)
+        print(f"{lines:>8} {ast_time * 1000:>8.1f}ms {tok_time * 1000:>8.1f}ms {ast_time / tok_time:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
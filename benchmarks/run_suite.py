@@ -0,0 +1,200 @@
+"""
+Reproducible benchmark suite for depscripter.
+
+Builds synthetic site-packages trees (10, 100 and 1,000 fake distributions,
+with and without top_level.txt) and script corpora of varying size and import
+density, then times each phase (read, scan, index, resolve, inject) and the
+end-to-end CLI. Results are printed as a table and can be written as JSON.
+
+    python benchmarks/run_suite.py
+    python benchmarks/run_suite.py --quick --output results.json
+    python benchmarks/run_suite.py --compare baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Dict, List
+
+import depscripter
+from depscripter.injector import generate_script_metadata, inject_metadata
+from depscripter.resolver import LazyIndex, build_environment_index, resolve_packages
+from depscripter.scanner import scan_imports
+from synthetic import make_corpus, make_environment
+
+SCHEMA_VERSION = 1
+
+ENV_SIZES = [10, 100, 1000]
+QUICK_ENV_SIZES = [10, 100]
+
+# name -> (files, lines per file, imports per file)
+CORPORA = {
+    "many-small": (200, 30, 5),
+    "few-large": (5, 20000, 5),
+    "import-dense": (100, 100, 40),
+}
+QUICK_CORPORA = {
+    "many-small": (50, 30, 5),
+    "few-large": (2, 5000, 5),
+    "import-dense": (25, 100, 40),
+}
+
+# Environment the corpora are resolved against
+CORPUS_ENV_SIZE = 100
+
+
+def measure(func: Callable[[], object], repeat: int) -> Dict[str, float]:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min_s": min(timings), "median_s": statistics.median(timings)}
+
+
+class Suite:
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: List[Dict] = []
+
+    def run(self, benchmark: str, params: Dict, func: Callable[[], object]) -> None:
+        timing = measure(func, self.repeat)
+        self.results.append({"benchmark": benchmark, "params": params, "repeat": self.repeat, **timing})
+        label = " ".join(f"{k}={v}" for k, v in params.items())
+        print(f"{benchmark:<14} {label:<48} {timing['min_s'] * 1000:>10.2f}ms", file=sys.stderr)
+
+
+def bench_environments(suite: Suite, root: Path, sizes: List[int]) -> None:
+    for size in sizes:
+        for top_level in (True, False):
+            site = make_environment(root / "envs", size, top_level=top_level)
+            params = {"dists": size, "top_level": top_level}
+            suite.run("index", params, lambda: build_environment_index([str(site)]))
+            modules = {"pkg0001", "pkg0002", "othermod"}
+
+            def lazy():
+                index = LazyIndex(path=[str(site)])
+                resolve_packages(modules, mapping=index, versions=index.versions)
+
+            suite.run("lazy-resolve", params, lazy)
+
+
+def bench_corpora(suite: Suite, root: Path, corpora: Dict, seed: int) -> Dict[str, Path]:
+    site = make_environment(root / "corpus-env", CORPUS_ENV_SIZE)
+    mapping, versions = build_environment_index([str(site)])
+    corpus_dirs = {}
+
+    for name, (files, lines, imports) in corpora.items():
+        paths = make_corpus(root / "corpora", files, lines, imports, CORPUS_ENV_SIZE, seed=seed)
+        corpus_dirs[name] = paths[0].parent
+        params = {"corpus": name, "files": files, "lines": lines, "imports": imports}
+
+        sources = [p.read_text(encoding="utf-8") for p in paths]
+        scanned = [scan_imports(s) for s in sources]
+        resolved = [resolve_packages(m, mapping=mapping, versions=versions) for m in scanned]
+
+        suite.run("read", params, lambda: [p.read_text(encoding="utf-8") for p in paths])
+        suite.run("scan-ast", params, lambda: [scan_imports(s) for s in sources])
+        suite.run("scan-tokenize", params, lambda: [scan_imports(s, engine="tokenize") for s in sources])
+        suite.run("resolve", params, lambda: [resolve_packages(m, mapping=mapping, versions=versions) for m in scanned])
+        suite.run("inject", params, lambda: [
+            inject_metadata(s, generate_script_metadata(d, python_requires=">=3.8"))
+            for s, d in zip(sources, resolved)
+        ])
+
+    return corpus_dirs
+
+
+def bench_cli(suite: Suite, root: Path, corpus_dirs: Dict[str, Path]) -> None:
+    """
+    Runs the CLI in a fresh interpreter that only sees the synthetic
+    environment (-S disables the real site-packages).
+    """
+    site = root / "corpus-env" / f"site-packages-{CORPUS_ENV_SIZE}"
+    src = Path(depscripter.__file__).resolve().parent.parent
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join([str(src), str(site)])
+    env["DEPSCRIPTER_CACHE_DIR"] = str(root / "cli-cache")
+
+    def cli(*args):
+        cmd = [sys.executable, "-S", "-m", "depscripter", *args]
+        subprocess.run(cmd, env=env, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    script = next(corpus_dirs["many-small"].iterdir())
+    suite.run("cli", {"mode": "help"}, lambda: cli("--help"))
+    suite.run("cli", {"mode": "single-file-cold"}, lambda: cli(str(script), "--no-cache"))
+    cli(str(script))
+    suite.run("cli", {"mode": "single-file-warm"}, lambda: cli(str(script)))
+    for name, corpus in corpus_dirs.items():
+        suite.run("cli", {"mode": "batch-cold", "corpus": name}, lambda: cli(str(corpus), "--no-cache"))
+
+
+def result_key(result: Dict) -> str:
+    return result["benchmark"] + " " + json.dumps(result["params"], sort_keys=True)
+
+
+def compare(results: List[Dict], baseline_path: Path) -> None:
+    baseline = {result_key(r): r for r in json.loads(baseline_path.read_text(encoding="utf-8"))["results"]}
+    print(f"\n{'benchmark':<64} {'baseline':>10} {'current':>10} {'ratio':>7}", file=sys.stderr)
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        ratio = result["min_s"] / old["min_s"] if old["min_s"] else float("inf")
+        print(
+            f"{result_key(result)[:64]:<64} {old['min_s'] * 1000:>8.2f}ms {result['min_s'] * 1000:>8.2f}ms {ratio:>6.2f}x",
+            file=sys.stderr,
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--quick", action="store_true", help="Smaller environments and corpora")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--skip-cli", action="store_true", help="Do not run the end-to-end CLI benchmarks")
+    parser.add_argument("-o", "--output", type=Path, help="Write results as JSON to this file ('-' for stdout)")
+    parser.add_argument("--compare", type=Path, help="Compare with the JSON results of a previous run")
+    args = parser.parse_args()
+
+    suite = Suite(args.repeat)
+    with tempfile.TemporaryDirectory() as tmp:
+        root = Path(tmp)
+        bench_environments(suite, root, QUICK_ENV_SIZES if args.quick else ENV_SIZES)
+        corpus_dirs = bench_corpora(suite, root, QUICK_CORPORA if args.quick else CORPORA, args.seed)
+        if not args.skip_cli:
+            bench_cli(suite, root, corpus_dirs)
+
+    report = {
+        "schema": SCHEMA_VERSION,
+        "meta": {
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "seed": args.seed,
+            "quick": args.quick,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": suite.results,
+    }
+
+    if args.output is not None:
+        text = json.dumps(report, indent=2) + "\n"
+        if str(args.output) == "-":
+            sys.stdout.write(text)
+        else:
+            args.output.write_text(text, encoding="utf-8")
+
+    if args.compare is not None:
+        compare(suite.results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
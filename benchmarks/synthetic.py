@@ -0,0 +1,97 @@
+"""
+Generators for synthetic environments and script corpora used by the
+benchmarks. Everything is derived from a seed, so runs are reproducible.
+"""
+import random
+from pathlib import Path
+from typing import List
+
+STDLIB_IMPORTS = ["os", "sys", "json", "re", "collections", "itertools", "pathlib", "typing"]
+
+
+def dist_name(i: int) -> str:
+    return f"pkg{i:04d}"
+
+
+def make_environment(root: Path, count: int, top_level: bool = True) -> Path:
+    """
+    Creates a site-packages directory with `count` fake distributions named
+    pkg0000..., each providing a module of the same name, plus one distribution
+    whose module name differs from its distribution name ("othermod" from
+    "Mismatched-Name").
+
+    top_level: Write top_level.txt. Without it, top-level modules can only be
+    inferred from RECORD, like for most modern wheels.
+    """
+    site = root / f"site-packages-{count}{'' if top_level else '-record'}"
+    site.mkdir(parents=True)
+    dists = [(dist_name(i), f"1.{i}.0", dist_name(i)) for i in range(count)]
+    dists.append(("Mismatched-Name", "2.0", "othermod"))
+
+    for name, version, module in dists:
+        dist_info = site / f"{name.replace('-', '_')}-{version}.dist-info"
+        dist_info.mkdir()
+        (dist_info / "METADATA").write_text(
+            f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\nSummary: Fake package {name}\n",
+            encoding="utf-8",
+        )
+        if top_level:
+            (dist_info / "top_level.txt").write_text(f"{module}\n", encoding="utf-8")
+
+        (site / module).mkdir()
+        (site / module / "__init__.py").write_text("", encoding="utf-8")
+        (site / module / "core.py").write_text("", encoding="utf-8")
+        record = [f"{module}/__init__.py", f"{module}/core.py", f"{dist_info.name}/METADATA", f"{dist_info.name}/RECORD"]
+        (dist_info / "RECORD").write_text("".join(f"{entry},,\n" for entry in record), encoding="utf-8")
+
+    return site
+
+
+def make_script(rng: random.Random, lines: int, imports: int, env_count: int) -> str:
+    """
+    Generates a script with `imports` import statements, spread over the top
+    level and a function body, followed by about `lines` lines of code.
+    """
+    candidates = [dist_name(i) for i in range(env_count)] + ["othermod"]
+    out = []
+    for n in range(imports):
+        roll = rng.random()
+        if roll < 0.2:
+            module = rng.choice(STDLIB_IMPORTS)
+        elif roll < 0.25:
+            module = f"local_helper_{rng.randrange(5)}"
+        else:
+            module = rng.choice(candidates)
+        style = n % 3
+        if style == 0:
+            out.append(f"import {module}")
+        elif style == 1:
+            out.append(f"from {module} import core as m{n}")
+        else:
+            out.append(f"import {module} as alias{n}")
+
+    out.append("")
+    out.append("def main():")
+    out.append("    results = {}")
+    for i in range(lines):
+        out.append(f"    results['key_{i}'] = [x * {i} for x in range({i % 10})] + [{{'v': '{i}'}}]")
+    out.append("    return results")
+    out.append("")
+    out.append("if __name__ == '__main__':")
+    out.append("    main()")
+    return "\n".join(out) + "\n"
+
+
+def make_corpus(root: Path, files: int, lines: int, imports: int, env_count: int, seed: int = 0) -> List[Path]:
+    """
+    Writes `files` generated scripts into a new directory and returns their paths.
+    """
+    rng = random.Random(seed)
+    corpus = root / f"corpus-{files}x{lines}-{imports}"
+    corpus.mkdir(parents=True)
+    paths = []
+    for i in range(files):
+        path = corpus / f"script_{i:04d}.py"
+        path.write_text(make_script(rng, lines, imports, env_count), encoding="utf-8")
+        paths.append(path)
+    return paths
@@ -1,10 +1,39 @@
-from depscripter.scanner import scan_imports
-from depscripter.resolver import resolve_packages
-from depscripter.injector import generate_script_metadata, inject_metadata
+import importlib
+
+# Public names -> defining submodule. Submodules are only imported on first
+# attribute access, so `import depscripter` (and the CLI startup that goes
+# through it) stays cheap.
+_EXPORTS = {
+    "scan_imports": "depscripter.scanner",
+    "resolve_packages": "depscripter.resolver",
+    "Resolver": "depscripter.resolver",
+    "generate_script_metadata": "depscripter.injector",
+    "inject_metadata": "depscripter.injector",
+    "scan_files": "depscripter.batch",
+    "iter_process": "depscripter.pipeline",
+    "collect_stats": "depscripter.stats",
+    "RunStats": "depscripter.stats",
+}
 
 __all__ = [
     "scan_imports",
     "resolve_packages",
+    "Resolver",
     "generate_script_metadata",
     "inject_metadata",
+    "scan_files",
+    "iter_process",
+    "collect_stats",
+    "RunStats",
 ]
+
+def __getattr__(name):
+    module_name = _EXPORTS.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module_name), name)
+    globals()[name] = value
+    return value
+
+def __dir__():
+    return sorted(list(globals()) + __all__)
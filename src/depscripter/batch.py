@@ -0,0 +1,155 @@
+import os
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Sequence, Set
+
+from depscripter.cache import ScanCache, content_digest
+from depscripter.scanner import scan_imports
+
+if TYPE_CHECKING:
+    import concurrent.futures
+
+
+class ScanResult(NamedTuple):
+    path: Path
+    source: Optional[str]
+    modules: Optional[Set[str]]
+    error: Optional[str]
+    digest: Optional[str] = None
+    cached: bool = False
+    read_seconds: float = 0.0
+    parse_seconds: float = 0.0
+
+
+def scan_file(path: Path, engine: str = "ast", known: Optional[Mapping[str, List[str]]] = None) -> ScanResult:
+    """
+    Reads and scans a single file. Never raises for per-file problems, the
+    error message is returned in the result instead. Modules are full dotted
+    paths, see scan_imports(dotted=True). The time spent reading and parsing
+    is returned too.
+
+    engine: Scanner engine, see scan_imports().
+    known: Previously computed results by content digest (ScanCache.entries).
+    When the file's digest is found there, parsing is skipped.
+    """
+    if not path.exists():
+        return ScanResult(path, None, None, "not found")
+    start = time.perf_counter()
+    try:
+        source = path.read_text(encoding="utf-8")
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        return ScanResult(path, None, None, f"error: {e}")
+    read_seconds = time.perf_counter() - start
+
+    digest = None
+    if known is not None:
+        digest = content_digest(source)
+        modules = known.get(digest)
+        if modules is not None:
+            return ScanResult(path, source, set(modules), None, digest, True, read_seconds)
+
+    start = time.perf_counter()
+    try:
+        modules = scan_imports(source, engine=engine, dotted=True)
+    except (SyntaxError, ValueError) as e:
+        return ScanResult(path, None, None, f"error: {e}")
+    return ScanResult(path, source, modules, None, digest, False, read_seconds, time.perf_counter() - start)
+
+
+# Snapshot of the scan cache entries held by each worker process
+_worker_known: Optional[Mapping[str, List[str]]] = None
+
+
+def _init_worker(known: Optional[Mapping[str, List[str]]]) -> None:
+    global _worker_known
+    _worker_known = known
+
+
+def _scan_file_in_worker(path: Path, engine: str) -> ScanResult:
+    return scan_file(path, engine=engine, known=_worker_known)
+
+
+def _scan_chunk(paths: List[Path], engine: str) -> List[ScanResult]:
+    return [_scan_file_in_worker(path, engine) for path in paths]
+
+
+# Larger chunks barely reduce IPC overhead further, but hold more results in
+# memory while the caller catches up
+MAX_CHUNK_SIZE = 64
+STREAM_CHUNK_SIZE = 16
+
+
+def _iter_chunks(executor: "concurrent.futures.Executor", paths: Iterable[Path], engine: str, chunksize: int, window: int) -> Iterator[ScanResult]:
+    # Like executor.map(), but with at most `window` chunks in flight, so
+    # results never pile up faster than they are consumed (and `paths` can
+    # be a lazy iterator)
+    from collections import deque
+    from itertools import islice
+
+    pending = deque()
+    paths = iter(paths)
+    while True:
+        chunk = list(islice(paths, chunksize))
+        if not chunk:
+            break
+        pending.append(executor.submit(_scan_chunk, chunk, engine))
+        if len(pending) >= window:
+            yield from pending.popleft().result()
+    while pending:
+        yield from pending.popleft().result()
+
+
+def _effective_jobs(jobs: int) -> int:
+    if jobs <= 0:
+        return os.cpu_count() or 1
+    return jobs
+
+
+def scan_files(paths: Iterable[Path], jobs: int = 1, engine: str = "ast", cache: Optional[ScanCache] = None) -> Iterator[ScanResult]:
+    """
+    Reads and scans many files, yielding results in the same order as `paths`.
+    `paths` can be a lazy iterator (e.g. iter_scripts()), it is consumed as
+    results are.
+
+    jobs: Number of worker processes. 1 scans in-process, 0 or less uses one
+    worker per CPU. Parsing is CPU-bound, so processes (not threads) are used
+    to sidestep the GIL; resolution is left to the caller so a single
+    environment index can serve every file.
+    engine: Scanner engine, see scan_imports().
+    cache: Content-hash cache of scan results. Unchanged files are not parsed
+    again; hits, misses and new entries are recorded on it (call save() after).
+
+    Results are produced about as fast as they are consumed, so only a few
+    files per worker are held in memory at any time.
+    """
+    jobs = _effective_jobs(jobs)
+    # Large chunks keep IPC overhead low; a few chunks per worker keeps the
+    # load balanced when file sizes vary.
+    if isinstance(paths, Sequence):
+        jobs = min(jobs, len(paths))
+        chunksize = max(1, min(len(paths) // (jobs * 4), MAX_CHUNK_SIZE)) if jobs else 1
+    else:
+        # Unknown length: small chunks keep every worker busy on short streams
+        chunksize = STREAM_CHUNK_SIZE
+    known = cache.entries if cache is not None else None
+
+    if jobs <= 1:
+        results = (scan_file(path, engine=engine, known=known) for path in paths)
+        executor = None
+    else:
+        # Imported here so single-process runs do not pay for multiprocessing
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Two chunks per worker in flight keep every worker busy while
+        # bounding memory
+        executor = ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(known,))
+        results = _iter_chunks(executor, paths, engine, chunksize, window=jobs * 2)
+
+    try:
+        for result in results:
+            if cache is not None and result.digest is not None:
+                cache.record(result.digest, result.modules, result.cached)
+            yield result
+    finally:
+        if executor is not None:
+            executor.shutdown()
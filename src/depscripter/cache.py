@@ -0,0 +1,281 @@
+import hashlib
+import json
+import os
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from depscripter import stats
+from depscripter.resolver import build_environment_index
+from depscripter.writer import write_text_atomic
+
+# Bump whenever the layout of the cached files changes
+CACHE_FORMAT = 3
+
+METADATA_SUFFIXES = (".dist-info", ".egg-info")
+
+
+def get_cache_dir() -> Path:
+    """
+    Returns the directory used for depscripter's on-disk caches.
+
+    Honours DEPSCRIPTER_CACHE_DIR, then XDG_CACHE_HOME (or LOCALAPPDATA on
+    Windows), falling back to ~/.cache/depscripter.
+    """
+    override = os.environ.get("DEPSCRIPTER_CACHE_DIR")
+    if override:
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or os.environ.get("LOCALAPPDATA")
+    if base:
+        return Path(base) / "depscripter"
+    return Path.home() / ".cache" / "depscripter"
+
+
+def environment_fingerprint(path_entries: Optional[List[str]] = None) -> str:
+    """
+    Computes a cheap fingerprint of the installed environment.
+
+    Covers every sys.path entry plus, for directories that hold distribution
+    metadata (site-packages), the mtime of the directory itself and of each
+    *.dist-info / *.egg-info directory. Installing, upgrading or removing a
+    distribution changes at least one of these. Only directory listings and
+    stat calls are needed, no metadata files are read.
+    """
+    if path_entries is None:
+        path_entries = sys.path
+
+    digest = hashlib.sha256()
+    digest.update(sys.executable.encode())
+    digest.update(sys.version.encode())
+
+    for entry in path_entries:
+        digest.update(b"\0path\0" + entry.encode("utf-8", "surrogateescape"))
+        if not entry or not os.path.isdir(entry):
+            continue
+
+        metadata_dirs = []
+        try:
+            with os.scandir(entry) as it:
+                for dir_entry in it:
+                    if dir_entry.name.endswith(METADATA_SUFFIXES):
+                        try:
+                            mtime = dir_entry.stat().st_mtime_ns
+                        except OSError:
+                            continue
+                        metadata_dirs.append((dir_entry.name, mtime))
+        except OSError:
+            continue
+
+        if not metadata_dirs:
+            continue
+
+        digest.update(str(os.stat(entry).st_mtime_ns).encode())
+        for name, mtime in sorted(metadata_dirs):
+            digest.update(f"\0{name}\0{mtime}".encode("utf-8", "surrogateescape"))
+
+    return digest.hexdigest()
+
+
+def path_stamp(path_entries: List[str]) -> List[Tuple[str, int]]:
+    """
+    Modification times of the sys.path directories, a cheaper first check
+    than environment_fingerprint(). Installing, upgrading or removing a
+    distribution adds or removes a *.dist-info directory, which changes the
+    mtime of the site-packages directory holding it.
+    """
+    stamp = []
+    for entry in path_entries:
+        try:
+            stamp.append((entry, os.stat(entry or ".").st_mtime_ns))
+        except OSError:
+            stamp.append((entry, -1))
+    return stamp
+
+
+def _index_cache_file(cache_dir: Path, path: Optional[List[str]] = None) -> Path:
+    # One file per interpreter (or searched path), overwritten when the
+    # environment changes
+    key = sys.executable if path is None else "\0".join(path)
+    digest = hashlib.sha256(key.encode("utf-8", "surrogateescape")).hexdigest()[:16]
+    return cache_dir / f"index-{digest}.json"
+
+
+def _write_json(path: Path, data) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, json.dumps(data, separators=(",", ":")))
+
+
+def load_cached_index(cache_dir: Optional[Path] = None, fingerprint: Optional[str] = None, path: Optional[List[str]] = None) -> Optional[Tuple[Dict[str, List[str]], Dict[str, str]]]:
+    """
+    Returns the cached (mapping, versions) for the current environment, or None
+    if there is no cache entry or it is stale.
+
+    path: Directories searched instead of sys.path, see build_environment_index().
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    if fingerprint is None:
+        fingerprint = environment_fingerprint(path)
+
+    try:
+        with open(_index_cache_file(cache_dir, path), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(data, dict):
+        return None
+    if data.get("format") != CACHE_FORMAT or data.get("fingerprint") != fingerprint:
+        return None
+    return data["mapping"], data["versions"]
+
+
+def save_cached_index(mapping: Dict[str, List[str]], versions: Dict[str, str], cache_dir: Optional[Path] = None, fingerprint: Optional[str] = None, path: Optional[List[str]] = None) -> None:
+    """
+    Stores (mapping, versions) for the current environment. Errors are ignored,
+    a cache that cannot be written simply stays cold.
+    """
+    if cache_dir is None:
+        cache_dir = get_cache_dir()
+    if fingerprint is None:
+        fingerprint = environment_fingerprint(path)
+
+    data = {
+        "format": CACHE_FORMAT,
+        "fingerprint": fingerprint,
+        "mapping": mapping,
+        "versions": versions,
+    }
+    try:
+        _write_json(_index_cache_file(cache_dir, path), data)
+    except OSError:
+        pass
+
+
+def get_environment_index(use_cache: bool = True, cache_dir: Optional[Path] = None, save: bool = True, path: Optional[List[str]] = None) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """
+    Returns (module -> distributions mapping, normalized distribution name ->
+    version) for the running interpreter, served from the on-disk cache when it
+    is still valid.
+
+    save: Write a freshly built index back to the cache. Disable for read-only runs.
+    path: Index these directories (e.g. another environment's site-packages,
+    see find_site_packages()) instead of sys.path.
+    """
+    if not use_cache:
+        return build_environment_index(path)
+
+    fingerprint = environment_fingerprint(path)
+    cached = load_cached_index(cache_dir, fingerprint, path)
+    if cached is not None:
+        stats.count("index_cache_hits")
+        return cached
+
+    stats.count("index_cache_misses")
+    mapping, versions = build_environment_index(path)
+    if save:
+        save_cached_index(mapping, versions, cache_dir, fingerprint, path)
+    return mapping, versions
+
+
+# Bump whenever scan_imports() starts returning something different for the
+# same source, so stale scan results are never reused.
+SCAN_FORMAT = 2
+
+DEFAULT_MAX_SCAN_ENTRIES = 100_000
+
+
+def content_digest(source: str) -> str:
+    """
+    Returns the cache key for a file's contents.
+    """
+    return hashlib.blake2b(source.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+class ScanCache:
+    """
+    On-disk store of scan_imports() results keyed by content digest.
+
+    Entries are kept in least-recently-used order and the oldest ones are
+    evicted once there are more than max_entries. The store is loaded once,
+    updated in memory and written back with save(). While read_only is set,
+    lookups are still counted but the entries are left untouched.
+    """
+
+    def __init__(self, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_SCAN_ENTRIES):
+        if path is None:
+            path = get_cache_dir() / "scans.json"
+        self.path = path
+        self.max_entries = max_entries
+        # digest -> sorted module names; dict order doubles as LRU order
+        self.entries: Dict[str, List[str]] = {}
+        self.hits = 0
+        self.misses = 0
+        self.read_only = False
+        self._dirty = False
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_SCAN_ENTRIES) -> "ScanCache":
+        cache = cls(path, max_entries)
+        try:
+            with open(cache.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+        if isinstance(data, dict) and data.get("format") == SCAN_FORMAT and isinstance(data.get("entries"), dict):
+            cache.entries = data["entries"]
+        return cache
+
+    def get(self, digest: str) -> Optional[Set[str]]:
+        modules = self.entries.get(digest)
+        if modules is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touch(digest)
+        return set(modules)
+
+    def put(self, digest: str, modules: Set[str]) -> None:
+        if self.read_only:
+            return
+        self.entries.pop(digest, None)
+        self.entries[digest] = sorted(modules)
+        self._dirty = True
+        while len(self.entries) > self.max_entries:
+            del self.entries[next(iter(self.entries))]
+
+    def record(self, digest: str, modules: Set[str], cached: bool) -> None:
+        """
+        Accounts for a lookup that was done elsewhere (e.g. in a worker process
+        holding a snapshot of the entries).
+        """
+        if cached:
+            self.hits += 1
+            self._touch(digest)
+        else:
+            self.misses += 1
+            self.put(digest, modules)
+
+    def _touch(self, digest: str) -> None:
+        if self.read_only:
+            return
+        # Move to the most-recently-used end
+        self.entries[digest] = self.entries.pop(digest)
+        self._dirty = True
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def save(self) -> None:
+        """
+        Writes the store back to disk if anything changed. Errors are ignored.
+        """
+        if not self._dirty:
+            return
+        try:
+            _write_json(self.path, {"format": SCAN_FORMAT, "entries": self.entries})
+        except OSError:
+            return
+        self._dirty = False
@@ -1,67 +1,372 @@
 import argparse
+import json
+import re
 import sys
+from collections import Counter
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
+from typing import Dict, Iterator, List, NamedTuple, Optional, Set
 
-from depscripter.scanner import scan_imports
-from depscripter.resolver import resolve_packages
-from depscripter.injector import generate_script_metadata, inject_metadata
+from depscripter.batch import scan_files
+from depscripter.cache import ScanCache, get_environment_index
+from depscripter.finder import find_scripts
+from depscripter.scanner import ENGINES
+from depscripter.resolver import IndexLoader, LazyIndex, find_site_packages, resolve_packages
+from depscripter.injector import check_metadata, generate_script_metadata, inject_metadata
+from depscripter.writer import write_if_changed, write_text_atomic
 
-def main():
+class FileResult(NamedTuple):
+    path: Path
+    status: str
+    dependencies: Optional[Dict[str, Optional[str]]]
+    failed: bool = False
+    modules: Optional[Set[str]] = None
+    unresolved: Optional[Set[str]] = None
+
+def parse_overrides(manual_deps):
+    """
+    Parses --manual values into a dict of package name -> specifier.
+    """
+    overrides = {}
+    if not manual_deps:
+        return overrides
+    # Regex to capture package name (alphanumeric, -, _, .) at start
+    # Everything else is the specifier
+    pkg_re = re.compile(r"^([A-Za-z0-9_.-]+)(.*)$")
+    for manual_dep in manual_deps:
+        match = pkg_re.match(manual_dep)
+        if match:
+            pkg_name = match.group(1)
+            specifier = match.group(2)
+            overrides[pkg_name] = specifier
+        else:
+            # If regex mismatch (weird inputs), just assume whole string is name?
+            # or warn? Let's just key it by whole string and empty spec
+            overrides[manual_dep] = ""
+    return overrides
+
+def main(argv: Optional[List[str]] = None, index_loader: Optional[IndexLoader] = None, scan_cache: Optional[ScanCache] = None):
+    """
+    Command line entry point.
+
+    index_loader, scan_cache: Warm state provided by the daemon. When given,
+    the environment index comes from index_loader and the on-disk caches are
+    left to the caller.
+    """
     parser = argparse.ArgumentParser(description="Add PEP 723 metadata to Python scripts.")
-    parser.add_argument("file", type=Path, help="Path to the Python script")
+    parser.add_argument("paths", nargs="*", metavar="path", help="Python scripts, directories or glob patterns (with --changed-since/--staged: only consider changed files there, default: the whole repository)")
+    parser.add_argument("--exclude", action="append", metavar="PATTERN", help="Skip files and directories matching this .gitignore-style pattern when walking directories (repeatable)")
+    parser.add_argument("--gitignore", action="store_true", help="Skip what the .gitignore files of the walked directories ignore")
     parser.add_argument("--no-pin", action="store_true", help="Do not pin package versions")
     parser.add_argument("-p", "--python", help="Specify strict python version requirement (e.g. '>=3.9')")
     parser.add_argument("-m", "--manual", action="append", help="Manually specify dependency (e.g. 'numpy>=2.0')")
-    
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the on-disk environment index and scan caches")
+    parser.add_argument("--lazy", action="store_true", help="Only inspect the distributions matching the imported modules, indexing the whole environment as a last resort")
+    parser.add_argument("--engine", choices=ENGINES, default="ast", help="Import scanner: 'ast' parses the file, 'tokenize' skips building the AST (default: ast)")
+    parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of processes used to read and scan files (0 = one per CPU)")
+    parser.add_argument("--venv", metavar="PATH", help="Resolve against another environment (a virtualenv or a site-packages directory) instead of the running interpreter")
+    parser.add_argument("--lock", type=Path, metavar="FILE", help="Pin the versions locked in a uv.lock or requirements.txt file instead of the installed ones")
+    parser.add_argument("--no-known-modules", action="store_true", help="Drop imports that are not installed instead of looking them up in the bundled table of well-known modules")
+    parser.add_argument("--prune-transitive", action="store_true", help="Leave out dependencies that another dependency of the same script already requires")
+    parser.add_argument("--format", choices=("text", "ndjson"), default="text", help="Output format: 'text' prints the rewritten scripts, 'ndjson' prints one JSON record per file (path, modules, dependencies, unresolved modules, status) as soon as it is done (default: text)")
+    parser.add_argument("--stats", "--timings", action="store_true", help="Print the time spent in each phase, counts (files, distributions read, cache hits...) and peak memory to stderr")
+    parser.add_argument("--stats-format", choices=("table", "json"), help="Format of --stats (default: table); implies --stats")
+    parser.add_argument("--stats-prometheus", type=Path, metavar="FILE", help="Also write the statistics to a Prometheus textfile (e.g. for node_exporter)")
+    parser.add_argument("--no-daemon", action="store_true", help="Run in-process even if a depscripter-daemon is running")
+
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument("--changed-since", metavar="REF", help="Only process the Python scripts git reports as changed since the branch forked from REF (e.g. origin/main)")
+    changes.add_argument("--staged", action="store_true", help="Only process the Python scripts staged for the next commit")
+
     group = parser.add_mutually_exclusive_group()
     group.add_argument("--in-place", action="store_true", help="Modify the file in-place")
     group.add_argument("-o", "--output", type=Path, help="Write output to a specific file")
-    
-    args = parser.parse_args()
-    
-    if not args.file.exists():
-        sys.exit(f"Error: File {args.file} not found.")
-        
-    source_code = args.file.read_text(encoding="utf-8")
-    
-    # Parse manual overrides
-    overrides = {}
-    if args.manual:
-        import re
-        # Regex to capture package name (alphanumeric, -, _, .) at start
-        # Everything else is the specifier
-        pkg_re = re.compile(r"^([A-Za-z0-9_.-]+)(.*)$")
-        for manual_dep in args.manual:
-            match = pkg_re.match(manual_dep)
-            if match:
-                pkg_name = match.group(1)
-                specifier = match.group(2)
-                overrides[pkg_name] = specifier
+    group.add_argument("--check", action="store_true", help="Only check that existing metadata blocks are up to date; exit with 1 if any is not. Writes nothing")
+
+    args = parser.parse_args(argv)
+
+    # Hand the run over to a warm daemon if one is listening. Its output only
+    # comes back once the run is over, which would defeat streaming
+    if index_loader is None and not args.no_daemon and args.format != "ndjson":
+        # Imported here, --no-daemon runs and the daemon itself do not need it
+        from depscripter.daemon import run_in_daemon
+
+        code = run_in_daemon(sys.argv[1:] if argv is None else argv)
+        if code is not None:
+            sys.exit(code)
+
+    # Timed from here, so the daemon hand-off is not counted
+    run_stats = None
+    collecting = nullcontext()
+    if args.stats or args.stats_format or args.stats_prometheus:
+        # Imported here, only the statistics flags need it
+        from depscripter.stats import RunStats, collect_stats
+
+        run_stats = RunStats()
+        collecting = collect_stats(run_stats)
+
+    if args.changed_since or args.staged:
+        # Imported here, only --changed-since and --staged need it
+        from depscripter.gitfiles import GitError, changed_files, select_scripts
+
+        try:
+            changed = changed_files(args.changed_since, staged=args.staged)
+        except GitError as e:
+            parser.error(f"git: {e}")
+        files = select_scripts(changed, args.paths, exclude=args.exclude or ())
+        if not files:
+            # The common case in hooks: nothing to index, nothing to load
+            print("No changed Python scripts", file=sys.stderr)
+            return
+        batch = True
+    elif not args.paths:
+        parser.error("the following arguments are required: path")
+    else:
+        files = find_scripts(args.paths, exclude=args.exclude or (), gitignore=args.gitignore)
+        # No match at all (e.g. a glob matching only empty directories) is an
+        # empty batch, like an empty directory
+        batch = len(files) != 1 or any(Path(p).is_dir() for p in args.paths)
+
+    if batch and args.output:
+        parser.error("-o/--output can only be used with a single file")
+
+    if not batch:
+        if not files[0].exists():
+            sys.exit(f"Error: File {files[0]} not found.")
+
+    overrides = parse_overrides(args.manual)
+
+    # Another environment is only read, never imported from
+    site_path = None
+    if args.venv:
+        try:
+            site_path = find_site_packages(args.venv)
+        except FileNotFoundError as e:
+            parser.error(str(e))
+
+    # Parsed once, shared by every file
+    lock_table = None
+    if args.lock:
+        # Imported here, only --lock needs it
+        from depscripter.lockfile import load_lock_file
+
+        try:
+            lock_table = load_lock_file(args.lock)
+        except (OSError, UnicodeDecodeError) as e:
+            parser.error(f"cannot read lock file {args.lock}: {e}")
+
+    # Only consulted for modules the environment cannot resolve
+    known = None
+    if not args.no_known_modules:
+        # Imported here, --no-known-modules runs do not need it
+        from depscripter.known import KnownModules
+
+        known = KnownModules()
+
+    # Scan results of unchanged files are reused across runs
+    if args.no_cache:
+        index_loader = None
+        scan_cache = None
+    warm = index_loader is not None
+    if not warm and not args.no_cache:
+        scan_cache = ScanCache.load()
+    if scan_cache is not None:
+        # The daemon's cache outlives this run: only this run's lookups are
+        # reported, and --check must leave the entries as they were
+        scan_before = (scan_cache.hits, scan_cache.misses, scan_cache.read_only)
+        scan_cache.read_only = args.check
+
+    stream = args.format == "ndjson"
+    # Only tallies are kept, so memory stays flat however many files there are
+    tally = Counter()
+    try:
+        with collecting:
+            for result in _iter_results(args, files, batch, overrides, site_path, lock_table, known, index_loader, scan_cache, run_stats):
+                tally["files"] += 1
+                tally["failed"] += result.failed or result.dependencies is None
+                tally[result.status] += 1
+                if stream:
+                    print(json.dumps(_record(result)), flush=True)
+                elif batch or args.check:
+                    _print_status(result)
+            # --check must not write anything, caches included
+            if scan_cache is not None and not args.check and not warm:
+                scan_cache.save()
+    finally:
+        scan_counts = None
+        if scan_cache is not None:
+            scan_cache.read_only = scan_before[2]
+            scan_counts = (scan_cache.hits - scan_before[0], scan_cache.misses - scan_before[1])
+        if run_stats is not None:
+            _emit_stats(args, run_stats, scan_counts)
+
+    if batch or args.check or stream:
+        _report(tally, scan_counts)
+
+def _iter_results(args, files, batch, overrides, site_path, lock_table, known, index_loader, scan_cache, run_stats) -> Iterator[FileResult]:
+    """
+    Scans, resolves and writes every file, yielding a FileResult as soon as
+    each one is done.
+    """
+    timed = run_stats.phase if run_stats is not None else _untimed
+    stream = args.format == "ndjson"
+    warm = index_loader is not None
+
+    # Index the environment once for the whole run
+    mapping = None
+    versions = None
+    # Built on first use, shared by every file
+    graph = None
+
+    # Read and scan (possibly in parallel), results come back in input order
+    for scanned in scan_files(files, jobs=args.jobs, engine=args.engine, cache=scan_cache):
+        path = scanned.path
+        if run_stats is not None:
+            run_stats.count("files")
+            run_stats.add_time("read", scanned.read_seconds)
+            run_stats.add_time("parse", scanned.parse_seconds)
+        if scanned.error is not None:
+            if not batch and not stream:
+                sys.exit(f"Error: Could not process {path}: {scanned.error}")
+            yield FileResult(path, scanned.error, None, failed=True)
+            continue
+        source_code = scanned.source
+        modules = scanned.modules
+        if run_stats is not None:
+            run_stats.count("modules", len(modules))
+
+        # Resolve
+        if mapping is None:
+            with timed("index"):
+                # The daemon's warm index is the one of its own interpreter
+                if warm and site_path is None:
+                    mapping, versions = index_loader()
+                elif args.lazy:
+                    mapping = LazyIndex(site_path, full_index=lambda: get_environment_index(use_cache=not args.no_cache, save=not args.check, path=site_path))
+                    versions = mapping.versions
+                else:
+                    mapping, versions = get_environment_index(use_cache=not args.no_cache, save=not args.check, path=site_path)
+                if lock_table is not None:
+                    from depscripter.lockfile import LockIndex
+
+                    mapping = LockIndex(lock_table, mapping)
+                    versions = mapping.versions
+        with timed("resolve"):
+            unresolved = set()
+            # Modules rather than scanned names, which may end with a class
+            # or function imported with `from`
+            imported = set()
+            dependencies = resolve_packages(modules, pin_versions=not args.no_pin, mapping=mapping, versions=versions, known=known, unresolved=unresolved, imported=imported)
+        if args.prune_transitive:
+            # Imported here, only --prune-transitive needs it
+            from depscripter.graph import DependencyGraph, prune_transitive
+
+            with timed("graph"):
+                if graph is None:
+                    graph = DependencyGraph.from_environment(site_path)
+                dependencies = prune_transitive(dependencies, graph)
+        if run_stats is not None:
+            run_stats.count("dependencies", len(dependencies))
+
+        if args.check:
+            with timed("generate"):
+                problems = check_metadata(source_code, dependencies, python_requires=args.python, overrides=overrides)
+            if problems:
+                yield FileResult(path, "outdated: " + "; ".join(problems), dependencies, True, imported, unresolved)
             else:
-                # If regex mismatch (weird inputs), just assume whole string is name?
-                # or warn? Let's just key it by whole string and empty spec
-                overrides[manual_dep] = ""
-    
-    # Scan
-    modules = scan_imports(source_code)
-    
-    # Resolve
-    dependencies = resolve_packages(modules, pin_versions=not args.no_pin)
-    
-    # Generate metadata
-    metadata = generate_script_metadata(dependencies, python_requires=args.python, overrides=overrides)
-    
-    # Inject
-    new_source = inject_metadata(source_code, metadata)
-    
-    if args.in_place:
-        args.file.write_text(new_source, encoding="utf-8")
-        print(f"Updated {args.file}")
-    elif args.output:
-        args.output.write_text(new_source, encoding="utf-8")
-        print(f"Saved to {args.output}")
+                yield FileResult(path, "up to date", dependencies, False, imported, unresolved)
+            continue
+
+        with timed("generate"):
+            # Generate metadata
+            metadata = generate_script_metadata(dependencies, python_requires=args.python, overrides=overrides)
+
+            # Inject
+            new_source = inject_metadata(source_code, metadata)
+
+        status = "ok"
+        with timed("write"):
+            if args.in_place:
+                # Skip byte-identical rewrites so mtimes (and file watchers) stay put
+                changed = write_if_changed(path, new_source, current=source_code)
+                status = "updated" if changed else "unchanged"
+                if not batch and not stream:
+                    print(f"Updated {path}" if changed else f"{path} is already up to date")
+            elif args.output:
+                write_if_changed(args.output, new_source)
+                if not stream:
+                    print(f"Saved to {args.output}")
+            elif stream:
+                # The record is the output
+                pass
+            elif batch:
+                print(f"# ==> {path} <==")
+                print(new_source, end="" if new_source.endswith("\n") else "\n")
+            else:
+                print(new_source, end="")
+
+        yield FileResult(path, status, dependencies, False, imported, unresolved)
+
+@contextmanager
+def _untimed(phase):
+    yield
+
+def _emit_stats(args, run_stats, scan_counts=None):
+    """
+    Prints the run statistics to stderr and writes the Prometheus textfile.
+    scan_counts: Scan cache (hits, misses) of this run.
+    """
+    from depscripter.stats import format_json, format_prometheus, format_table
+
+    if scan_counts is not None:
+        run_stats.count("scan_cache_hits", scan_counts[0])
+        run_stats.count("scan_cache_misses", scan_counts[1])
+    if args.stats or args.stats_format:
+        formatter = format_json if args.stats_format == "json" else format_table
+        print(formatter(run_stats), end="", file=sys.stderr)
+    if args.stats_prometheus:
+        try:
+            write_text_atomic(args.stats_prometheus, format_prometheus(run_stats))
+        except OSError as e:
+            print(f"Error: cannot write {args.stats_prometheus}: {e}", file=sys.stderr)
+
+def _record(result: FileResult) -> Dict[str, object]:
+    """
+    Returns the --format ndjson record of a file.
+    """
+    return {
+        "path": str(result.path),
+        "status": result.status,
+        "failed": result.failed or result.dependencies is None,
+        "modules": sorted(result.modules) if result.modules is not None else None,
+        "dependencies": result.dependencies,
+        "unresolved": sorted(result.unresolved) if result.unresolved is not None else None,
+    }
+
+def _print_status(result: FileResult) -> None:
+    if result.failed or result.dependencies is None:
+        print(f"{result.path}: {result.status}", file=sys.stderr)
     else:
-        print(new_source, end="")
+        names = ", ".join(sorted(result.dependencies)) or "no dependencies"
+        print(f"{result.path}: {result.status} ({names})", file=sys.stderr)
+
+def _report(tally, scan_counts=None):
+    """
+    Prints the run summary to stderr and exits non-zero if any file failed.
+    scan_counts: Scan cache (hits, misses) of this run.
+    """
+    failed = tally["failed"]
+    print(f"{tally['files']} file(s) processed, {failed} failed", file=sys.stderr)
+    changed = tally["updated"]
+    unchanged = tally["unchanged"]
+    if changed or unchanged:
+        print(f"{changed} file(s) changed, {unchanged} unchanged", file=sys.stderr)
+    if scan_counts is not None:
+        hits, misses = scan_counts
+        rate = hits / (hits + misses) if hits + misses else 0.0
+        print(f"scan cache: {hits} hit(s), {misses} miss(es), {rate:.0%} hit rate", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 
 if __name__ == "__main__":
     main()
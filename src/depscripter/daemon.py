@@ -0,0 +1,337 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from depscripter.cache import ScanCache, get_cache_dir
+from depscripter.resolver import Resolver
+
+if TYPE_CHECKING:
+    import threading
+
+# Bump whenever requests or responses change shape; a client talking to a
+# daemon of another format falls back to running in-process
+PROTOCOL = 2
+
+DEFAULT_POLL_INTERVAL = 1.0
+SCAN_CACHE_SAVE_INTERVAL = 60.0
+
+# How long the client waits for a daemon to accept the connection
+CONNECT_TIMEOUT = 0.5
+# How long the daemon waits for a connected client to send its request
+REQUEST_TIMEOUT = 5.0
+
+
+def get_socket_path() -> Path:
+    """
+    Returns the socket of the daemon serving the running interpreter. Like the
+    index cache, there is one per interpreter: a daemon only ever resolves
+    against its own environment.
+    """
+    interpreter = hashlib.sha256(sys.executable.encode()).hexdigest()[:16]
+    return get_cache_dir() / f"daemon-{interpreter}.sock"
+
+
+def _send(sock, message: Dict) -> None:
+    sock.sendall(json.dumps(message, separators=(",", ":")).encode("utf-8") + b"\n")
+
+
+def _receive(sock) -> Optional[Dict]:
+    # One JSON document per line
+    chunks = []
+    while True:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b"\n"):
+            break
+    try:
+        message = json.loads(b"".join(chunks).decode("utf-8"))
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def run_in_daemon(argv: List[str], socket_path: Optional[Path] = None) -> Optional[int]:
+    """
+    Thin client: forwards a command line to the daemon, copies its output to
+    stdout/stderr and returns its exit code.
+
+    Returns None, having printed nothing, when no compatible daemon is
+    listening so the caller can run in-process instead.
+    """
+    if socket_path is None:
+        socket_path = get_socket_path()
+    # Checked first so runs without a daemon do not even import socket
+    if not socket_path.exists():
+        return None
+
+    import socket
+
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        try:
+            sock.connect(str(socket_path))
+        except OSError:
+            # Stale socket left by a daemon that did not shut down cleanly
+            return None
+        # Big batches can take a while, wait as long as needed
+        sock.settimeout(None)
+        _send(sock, {
+            "protocol": PROTOCOL,
+            "executable": sys.executable,
+            # The daemon resolves against its own sys.path
+            "path": sys.path,
+            "cwd": os.getcwd(),
+            "argv": list(argv),
+        })
+        response = _receive(sock)
+    except OSError:
+        return None
+    finally:
+        sock.close()
+
+    if response is None or "code" not in response:
+        return None
+    sys.stdout.write(response.get("stdout", ""))
+    sys.stdout.flush()
+    sys.stderr.write(response.get("stderr", ""))
+    sys.stderr.flush()
+    return response["code"]
+
+
+class DaemonState:
+    """
+    What the daemon keeps warm between requests: the environment index, in a
+    Resolver session, and the scan cache.
+
+    The index is rebuilt when the environment changes, see Resolver. Changes
+    are checked both by the watcher thread and before each request; a request
+    arriving during a rebuild uses the previous index.
+    """
+
+    def __init__(self, use_cache: bool = True):
+        import threading
+
+        self.use_cache = use_cache
+        self.resolver = Resolver(use_cache=use_cache, check_interval=0)
+        self.scan_cache = ScanCache.load() if use_cache else ScanCache()
+        # Serializes requests and scan cache saves
+        self.lock = threading.RLock()
+
+    def index(self) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+        self.resolver.refresh(blocking=False)
+        return self.resolver.index()
+
+    def refresh(self) -> bool:
+        """
+        Rebuilds the index if the environment changed since it was built.
+        Returns True if it did.
+        """
+        return self.resolver.refresh()
+
+    def save(self) -> None:
+        if not self.use_cache:
+            return
+        with self.lock:
+            self.scan_cache.save()
+
+
+def _run_cli(argv: List[str], cwd: str, state: DaemonState) -> Dict:
+    """
+    Runs the CLI in this process against the warm state, capturing its output
+    and exit code. Requests are handled one at a time: the working directory
+    and sys.stdout/sys.stderr are process-wide.
+    """
+    import contextlib
+    import io
+
+    from depscripter.cli import main
+
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    code = 0
+    previous_cwd = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            try:
+                main(argv, index_loader=state.index, scan_cache=state.scan_cache)
+            except SystemExit as e:
+                # Same conventions as the interpreter's own exit handling
+                if e.code is None:
+                    code = 0
+                elif isinstance(e.code, int):
+                    code = e.code
+                else:
+                    print(e.code, file=sys.stderr)
+                    code = 1
+            except Exception as e:
+                print(f"Error: {e}", file=sys.stderr)
+                code = 1
+    except OSError as e:
+        stderr.write(f"Error: {e}\n")
+        code = 1
+    finally:
+        os.chdir(previous_cwd)
+    return {"protocol": PROTOCOL, "stdout": stdout.getvalue(), "stderr": stderr.getvalue(), "code": code}
+
+
+def handle_request(request: Optional[Dict], state: DaemonState) -> Dict:
+    """
+    Answers one client request. Anything the daemon cannot serve faithfully
+    gets a response without "code", telling the client to run in-process.
+    """
+    if request is None:
+        return {"protocol": PROTOCOL, "error": "malformed request"}
+    if request.get("protocol") != PROTOCOL:
+        return {"protocol": PROTOCOL, "error": "protocol mismatch"}
+    if request.get("executable") != sys.executable:
+        return {"protocol": PROTOCOL, "error": "interpreter mismatch"}
+    if request.get("command") == "stop":
+        return {"protocol": PROTOCOL, "stopping": True}
+    if request.get("path") != sys.path:
+        # PYTHONPATH, -s, -m from another directory...: other distributions
+        return {"protocol": PROTOCOL, "error": "environment mismatch"}
+    argv = request.get("argv")
+    cwd = request.get("cwd")
+    if not isinstance(argv, list) or not isinstance(cwd, str):
+        return {"protocol": PROTOCOL, "error": "malformed request"}
+    with state.lock:
+        return _run_cli([str(arg) for arg in argv], cwd, state)
+
+
+def _watch(state: DaemonState, stop: "threading.Event", poll_interval: float) -> None:
+    last_save = time.monotonic()
+    while not stop.wait(poll_interval):
+        # Rebuild in the background so the next request finds a warm index
+        state.refresh()
+        if time.monotonic() - last_save >= SCAN_CACHE_SAVE_INTERVAL:
+            state.save()
+            last_save = time.monotonic()
+
+
+def serve(socket_path: Optional[Path] = None, poll_interval: float = DEFAULT_POLL_INTERVAL, idle_timeout: float = 0, use_cache: bool = True) -> None:
+    """
+    Serves requests on a Unix socket until stopped (stop request, SIGINT or
+    SIGTERM) or, if idle_timeout is set, after that many seconds without one.
+    """
+    import signal
+    import socket
+    import threading
+
+    if socket_path is None:
+        socket_path = get_socket_path()
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+
+    state = DaemonState(use_cache=use_cache)
+    # Warm up before accepting connections
+    state.index()
+
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        socket_path.unlink()
+    except FileNotFoundError:
+        pass
+    server.bind(str(socket_path))
+    os.chmod(socket_path, 0o600)
+    server.listen()
+    server.settimeout(idle_timeout or None)
+
+    stop = threading.Event()
+    watcher = threading.Thread(target=_watch, args=(state, stop, poll_interval), daemon=True)
+    watcher.start()
+
+    def _terminate(signum, frame):
+        raise KeyboardInterrupt
+
+    # Signal handlers can only be installed from the main thread
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, _terminate)
+
+    try:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except socket.timeout:
+                break
+            with conn:
+                try:
+                    # A client that connects and sends nothing must not
+                    # block the others
+                    conn.settimeout(REQUEST_TIMEOUT)
+                    request = _receive(conn)
+                    conn.settimeout(None)
+                    response = handle_request(request, state)
+                    _send(conn, response)
+                except OSError:
+                    continue
+            if response.get("stopping"):
+                break
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        server.close()
+        try:
+            socket_path.unlink()
+        except FileNotFoundError:
+            pass
+        state.save()
+
+
+def stop_daemon(socket_path: Optional[Path] = None) -> bool:
+    """
+    Asks the daemon to shut down. Returns False if none was running.
+    """
+    import socket
+
+    if socket_path is None:
+        socket_path = get_socket_path()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.settimeout(CONNECT_TIMEOUT)
+        sock.connect(str(socket_path))
+        sock.settimeout(None)
+        _send(sock, {"protocol": PROTOCOL, "executable": sys.executable, "command": "stop"})
+        response = _receive(sock)
+    except OSError:
+        return False
+    finally:
+        sock.close()
+    return bool(response and response.get("stopping"))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="depscripter-daemon",
+        description="Keep the environment index and scan cache warm for depscripter runs.",
+    )
+    parser.add_argument("--socket", type=Path, help="Unix socket to listen on (default: in the cache directory, one per interpreter)")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL, help="Seconds between checks of site-packages for changes")
+    parser.add_argument("--idle-timeout", type=float, default=0, help="Exit after this many seconds without a request (0 = never)")
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or write the on-disk caches")
+    parser.add_argument("--stop", action="store_true", help="Stop the running daemon and exit")
+    args = parser.parse_args(argv)
+
+    if sys.platform == "win32":
+        sys.exit("Error: the daemon needs Unix domain sockets")
+
+    if args.stop:
+        if not stop_daemon(args.socket):
+            sys.exit("Error: no daemon is running")
+        return
+
+    socket_path = args.socket or get_socket_path()
+    print(f"Listening on {socket_path}", file=sys.stderr)
+    serve(socket_path, poll_interval=args.poll_interval, idle_timeout=args.idle_timeout, use_cache=not args.no_cache)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+import glob
+import re
+from pathlib import Path
+from typing import Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple
+
+# Directories that never contain scripts we want to touch.
+SKIP_DIRS = {"__pycache__", "node_modules"}
+
+
+def _is_skipped_dir(name: str) -> bool:
+    return name.startswith(".") or name in SKIP_DIRS
+
+
+def _translate(pattern: str) -> str:
+    # Glob -> regex, where * and ? never cross "/" and ** does
+    out = []
+    i = 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and pattern.find("]", i + 2) != -1:
+            end = pattern.find("]", i + 2)
+            body = pattern[i + 1:end]
+            if body.startswith("!"):
+                body = "^" + body[1:]
+            out.append("[" + body.replace("\\", "\\\\") + "]")
+            i = end + 1
+        elif pattern[i] == "\\" and i + 1 < len(pattern):
+            out.append(re.escape(pattern[i + 1]))
+            i += 2
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    return "".join(out)
+
+
+class IgnoreRules:
+    """
+    .gitignore-style patterns, matched against paths relative to the
+    directory they apply to.
+
+    Supports comments, "!" negation, a trailing "/" for directories only, a
+    leading or inner "/" to anchor the pattern to that directory, and *, ?,
+    [...] and ** wildcards. As in git, the last matching pattern wins.
+    """
+
+    def __init__(self, patterns: Iterable[str]):
+        self.rules: List[Tuple[Pattern[str], bool, bool]] = []
+        for line in patterns:
+            line = line.rstrip("\n\r")
+            if not line.strip() or line.startswith("#"):
+                continue
+            line = line.rstrip(" ")
+            negated = line.startswith("!")
+            if negated:
+                line = line[1:]
+            if line.startswith("\\"):
+                # "\#" or "\!" for names starting with those characters
+                line = line[1:]
+            dir_only = line.endswith("/")
+            line = line.rstrip("/")
+            if not line:
+                continue
+            if "/" in line:
+                regex = _translate(line.lstrip("/"))
+            else:
+                regex = "(?:.*/)?" + _translate(line)
+            self.rules.append((re.compile(regex + r"\Z", re.DOTALL), negated, dir_only))
+
+    @classmethod
+    def from_file(cls, path: Path) -> Optional["IgnoreRules"]:
+        """
+        Reads a .gitignore file, or returns None if there is none.
+        """
+        try:
+            text = path.read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            return None
+        return cls(text.splitlines())
+
+    def match(self, relative: str, is_dir: bool) -> Optional[bool]:
+        """
+        True if the path is ignored, False if a negated pattern re-includes
+        it, None if no pattern matches.
+        """
+        result = None
+        for regex, negated, dir_only in self.rules:
+            if dir_only and not is_dir:
+                continue
+            if regex.match(relative):
+                result = not negated
+        return result
+
+
+# (walked directory, its path relative to the directory the rules apply to,
+# rules), outermost first
+Ignores = Sequence[Tuple[Path, str, IgnoreRules]]
+
+
+def _is_ignored(path: Path, is_dir: bool, ignores: Ignores) -> bool:
+    # The innermost .gitignore that has an opinion wins
+    for base, prefix, rules in reversed(ignores):
+        result = rules.match(prefix + path.relative_to(base).as_posix(), is_dir)
+        if result is not None:
+            return result
+    return False
+
+
+def _repository_ignores(directory: Path) -> List[Tuple[Path, str, IgnoreRules]]:
+    # .gitignore files above `directory`, up to the root of its git work tree
+    resolved = directory.resolve()
+    if (resolved / ".git").exists():
+        return []
+    parents = []
+    for parent in resolved.parents:
+        parents.append(parent)
+        if (parent / ".git").exists():
+            break
+    else:
+        # Not in a git work tree, only the walked directories count
+        return []
+
+    ignores = []
+    for parent in reversed(parents):
+        rules = IgnoreRules.from_file(parent / ".gitignore")
+        if rules is not None:
+            ignores.append((directory, resolved.relative_to(parent).as_posix() + "/", rules))
+    return ignores
+
+
+def _walk_directory(directory: Path, ignores: Ignores = (), gitignore: bool = False) -> Iterator[Path]:
+    """
+    Yields *.py files below a directory in sorted order, skipping hidden
+    directories (.git, .venv, ...) and caches, and anything matched by
+    `ignores` (plus the .gitignore files found on the way, if `gitignore`).
+    Only one directory listing is held per level.
+    """
+    if gitignore:
+        rules = IgnoreRules.from_file(directory / ".gitignore")
+        if rules is not None:
+            ignores = list(ignores) + [(directory, "", rules)]
+
+    try:
+        entries = sorted(directory.iterdir())
+    except OSError:
+        return
+
+    for entry in entries:
+        if entry.is_dir():
+            if not _is_skipped_dir(entry.name) and not _is_ignored(entry, True, ignores):
+                yield from _walk_directory(entry, ignores, gitignore)
+        elif entry.suffix == ".py" and entry.is_file() and not _is_ignored(entry, False, ignores):
+            yield entry
+
+
+def iter_scripts(patterns: Iterable[str], exclude: Iterable[str] = (), gitignore: bool = False) -> Iterator[Path]:
+    """
+    Lazily expands files, directories and glob patterns into Python scripts,
+    see find_scripts().
+
+    exclude: .gitignore-style patterns, relative to each directory walked.
+    gitignore: Also honour the .gitignore files of the walked directories and
+    of their parents up to the root of the git work tree.
+
+    Both only apply while walking directories: files named explicitly are
+    always yielded. Duplicates are only tracked when several patterns are
+    given, so walking a single tree keeps memory flat.
+    """
+    patterns = list(patterns)
+    exclude = list(exclude)
+    seen = set() if len(patterns) > 1 else None
+
+    def walk(directory: Path) -> Iterator[Path]:
+        ignores = _repository_ignores(directory) if gitignore else []
+        if exclude:
+            ignores.append((directory, "", IgnoreRules(exclude)))
+        return _walk_directory(directory, ignores, gitignore)
+
+    def new(path: Path) -> bool:
+        if seen is None:
+            return True
+        key = path.resolve()
+        if key in seen:
+            return False
+        seen.add(key)
+        return True
+
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            for script in walk(path):
+                if new(script):
+                    yield script
+        elif path.exists():
+            if new(path):
+                yield path
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+            if not matches:
+                yield path
+            for match in matches:
+                match_path = Path(match)
+                if match_path.is_dir():
+                    for script in walk(match_path):
+                        if new(script):
+                            yield script
+                elif new(match_path):
+                    yield match_path
+        else:
+            # Missing file, let the caller complain about it
+            yield path
+
+
+def find_scripts(patterns: Iterable[str], exclude: Iterable[str] = (), gitignore: bool = False) -> List[Path]:
+    """
+    Expands files, directories and glob patterns into a list of Python scripts.
+
+    - A file is returned as-is (whatever its extension).
+    - A directory is searched recursively for *.py files.
+    - Anything else is treated as a glob pattern (supports **).
+
+    Patterns that match nothing are returned unchanged so the caller can
+    report them as missing. Duplicates are removed, first occurrence wins.
+    exclude, gitignore: See iter_scripts().
+    """
+    return list(iter_scripts(patterns, exclude, gitignore))
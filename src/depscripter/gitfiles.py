@@ -0,0 +1,95 @@
+import glob
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from depscripter.finder import IgnoreRules
+
+
+class GitError(RuntimeError):
+    """
+    Raised when git cannot be run or fails (not a repository, unknown ref...).
+    """
+
+
+def _git(args: List[str], cwd: Optional[Path] = None) -> str:
+    # Imported here, only this mode needs it
+    import subprocess
+
+    try:
+        result = subprocess.run(["git"] + args, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except OSError as e:
+        raise GitError(f"cannot run git: {e}") from e
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip()
+        raise GitError(message or f"git {args[0]} failed with exit code {result.returncode}")
+    return result.stdout.decode("utf-8", "surrogateescape")
+
+
+def changed_files(ref: Optional[str] = None, staged: bool = False, cwd: Optional[Path] = None) -> List[Path]:
+    """
+    Asks git for the files added, copied, modified or renamed, as absolute
+    paths. Deleted files are left out.
+
+    ref: Compare the working tree with the merge base of `ref` and HEAD, i.e.
+    what a branch changed since it forked from `ref` (e.g. "origin/main"),
+    committed or not.
+    staged: Only the changes staged for the next commit. Note that the files
+    are read from the working tree, as pre-commit does once it has stashed
+    the unstaged changes.
+
+    Raises GitError if git is missing or fails.
+    """
+    if staged == (ref is not None):
+        raise ValueError("pass either a ref or staged=True")
+    top = Path(_git(["rev-parse", "--show-toplevel"], cwd).strip())
+    if staged:
+        names = _git(["diff", "--cached", "--name-only", "-z", "--diff-filter=ACMR"], cwd)
+    else:
+        base = _git(["merge-base", ref, "HEAD"], cwd).strip()
+        names = _git(["diff", "--name-only", "-z", "--diff-filter=ACMR", base, "--"], cwd)
+    return [top / name for name in names.split("\0") if name]
+
+
+def _is_excluded(relative: Path, rules: IgnoreRules) -> bool:
+    # As when walking: an excluded directory excludes everything below it
+    parts = relative.parts
+    for depth in range(1, len(parts)):
+        if rules.match("/".join(parts[:depth]), True):
+            return True
+    return bool(rules.match(relative.as_posix(), False))
+
+
+def select_scripts(files: Iterable[Path], patterns: Iterable[str] = (), exclude: Iterable[str] = ()) -> List[Path]:
+    """
+    Keeps the existing *.py files among `files` that are, or are below, one
+    of the given files, directories or glob patterns (all of them if none is
+    given). Paths below the current directory are made relative to it.
+
+    exclude: .gitignore-style patterns, relative to the current directory.
+    """
+    patterns = list(patterns)
+    rules = IgnoreRules(exclude)
+    roots = []
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            # Files below a matching directory count too
+            roots.extend(Path(match).resolve() for match in glob.glob(pattern, recursive=True))
+        else:
+            roots.append(Path(pattern).resolve())
+
+    cwd = Path.cwd().resolve()
+    selected = []
+    for path in files:
+        if path.suffix != ".py" or not path.is_file():
+            continue
+        resolved = path.resolve()
+        if patterns and not any(root == resolved or root in resolved.parents for root in roots):
+            continue
+        try:
+            relative = resolved.relative_to(cwd)
+        except ValueError:
+            selected.append(resolved)
+            continue
+        if not _is_excluded(relative, rules):
+            selected.append(relative)
+    return selected
@@ -0,0 +1,125 @@
+import re
+from typing import TYPE_CHECKING, Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+from depscripter import stats
+from depscripter.markers import default_environment, evaluate_marker
+from depscripter.resolver import map_distributions, normalize_name
+
+if TYPE_CHECKING:
+    import importlib.metadata
+
+# Requires-Dist: name [extras] [specifier] [; marker]
+_REQUIRES_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+def requirement_edges(requires: Iterable[str], environment: Dict[str, str]) -> List[str]:
+    """
+    Returns the normalized names of the requirements that certainly apply in
+    `environment`. Requirements behind an extra, or with a marker that cannot
+    be evaluated, are left out: pruning must never drop a dependency that
+    might not be installed after all.
+    """
+    edges = []
+    for requirement in requires:
+        match = _REQUIRES_RE.match(requirement)
+        if not match:
+            continue
+        _, _, marker = requirement.partition(";")
+        if marker.strip():
+            try:
+                if not evaluate_marker(marker, environment):
+                    continue
+            except ValueError:
+                continue
+        edges.append(normalize_name(match.group(1)))
+    return edges
+
+
+def _read_requires(dist: "importlib.metadata.Distribution") -> Tuple[Optional[str], List[str]]:
+    metadata = dist.metadata
+    return metadata.get('Name'), metadata.get_all('Requires-Dist') or []
+
+
+class DependencyGraph:
+    """
+    Requires-Dist graph of the installed distributions, keyed by normalized
+    name, with memoized transitive closures.
+
+    Build it once (from_environment()) and share it across files: each
+    closure is computed on first use only.
+    """
+
+    def __init__(self, edges: Dict[str, List[str]]):
+        self.edges = edges
+        self._closures: Dict[str, FrozenSet[str]] = {}
+
+    @classmethod
+    def from_environment(cls, path: Optional[List[str]] = None, environment: Optional[Dict[str, str]] = None, workers: Optional[int] = None) -> "DependencyGraph":
+        """
+        Reads the requirements of every distribution on `path` (default
+        sys.path). Markers are evaluated for `environment`, by default the
+        running interpreter's.
+        """
+        import importlib.metadata
+
+        if environment is None:
+            environment = default_environment()
+        dists = importlib.metadata.distributions() if path is None else importlib.metadata.distributions(path=path)
+        edges: Dict[str, List[str]] = {}
+        found = map_distributions(_read_requires, dists, workers)
+        stats.count("distributions_read", len(found))
+        for name, requires in found:
+            if not name:
+                continue
+            key = normalize_name(name)
+            # The first distribution on the path wins, as for versions
+            if key not in edges:
+                edges[key] = requirement_edges(requires, environment)
+        return cls(edges)
+
+    def reachable(self, name: str) -> FrozenSet[str]:
+        """
+        Returns every distribution `name` depends on, directly or not.
+        """
+        start = normalize_name(name)
+        closure = self._closures.get(start)
+        if closure is not None:
+            return closure
+
+        found: Set[str] = set()
+        stack = list(self.edges.get(start, ()))
+        while stack:
+            node = stack.pop()
+            if node in found:
+                continue
+            found.add(node)
+            known = self._closures.get(node)
+            if known is not None:
+                # Already complete, no need to walk it again
+                found.update(known)
+                continue
+            stack.extend(self.edges.get(node, ()))
+        closure = frozenset(found)
+        self._closures[start] = closure
+        return closure
+
+
+def prune_transitive(dependencies: Dict[str, Optional[str]], graph: DependencyGraph) -> Dict[str, Optional[str]]:
+    """
+    Removes the dependencies that another dependency already requires, e.g.
+    numpy next to pandas. When two dependencies require each other, the
+    first by normalized name is kept.
+    """
+    keys = {name: normalize_name(name) for name in dependencies}
+    direct = set(keys.values())
+    redundant: Set[str] = set()
+    for key in direct:
+        reachable = graph.reachable(key)
+        for other in direct & reachable:
+            if other == key:
+                continue
+            # Mutual dependency: keep the first of the two
+            if key in graph.reachable(other) and other < key:
+                continue
+            redundant.add(other)
+    return {name: version for name, version in dependencies.items() if keys[name] not in redundant}
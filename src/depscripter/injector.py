@@ -1,56 +1,311 @@
+import json
 import re
 import sys
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
 
+from depscripter.resolver import normalize_name
 
-def generate_script_metadata(dependencies: Dict[str, Optional[str]], python_requires: Optional[str] = None, overrides: Optional[Dict[str, str]] = None) -> str:
+
+def normalize_python_requires(python_requires: Optional[str] = None) -> str:
     """
-    Generates the PEP 723 metadata block.
-    
-    overrides: Dictionary of package name -> version specifier (e.g. ">=2.0")
+    Returns the requires-python value to write: the running major.minor by
+    default, with ">=" prepended to bare version numbers (uv convention).
     """
     if python_requires is None:
         # Default to current running python version major.minor
         v = sys.version_info
-        python_requires = f">={v.major}.{v.minor}"
-    elif python_requires and python_requires[0].isdigit():
+        return f">={v.major}.{v.minor}"
+    if python_requires and python_requires[0].isdigit():
         # Prepend >= if it's just a version number (uv convention)
-        python_requires = f">={python_requires}"
-    
+        return f">={python_requires}"
+    return python_requires
+
+def format_dependencies(dependencies: Dict[str, Optional[str]], overrides: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Returns the sorted requirement strings for the dependencies array.
+    """
     if overrides is None:
         overrides = {}
 
-    lines = []
-    lines.append("# /// script")
-    lines.append(f'# requires-python = "{python_requires}"')
-    lines.append("# dependencies = [")
-    
+    requirements = []
+
     # Merge keys from dependencies and overrides
     all_packages = set(dependencies.keys()) | set(overrides.keys())
     sorted_deps = sorted(all_packages)
-    
+
     for pkg in sorted_deps:
         if pkg in overrides:
             # Use manual override specifier
-            spec = overrides[pkg]
-            lines.append(f'#     "{pkg}{spec}",')
+            requirements.append(f"{pkg}{overrides[pkg]}")
         else:
             version = dependencies[pkg]
             if version:
-                lines.append(f'#     "{pkg}=={version}",')
+                requirements.append(f"{pkg}=={version}")
             else:
-                lines.append(f'#     "{pkg}",')
-            
+                requirements.append(pkg)
+
+    return requirements
+
+def generate_script_metadata(dependencies: Dict[str, Optional[str]], python_requires: Optional[str] = None, overrides: Optional[Dict[str, str]] = None) -> str:
+    """
+    Generates the PEP 723 metadata block.
+    
+    overrides: Dictionary of package name -> version specifier (e.g. ">=2.0")
+    """
+    lines = []
+    lines.append("# /// script")
+    lines.append(f'# requires-python = "{normalize_python_requires(python_requires)}"')
+    lines.append("# dependencies = [")
+
+    for requirement in format_dependencies(dependencies, overrides):
+        lines.append(f'#     "{requirement}",')
+
     lines.append("# ]")
     lines.append("# ///")
     
     return "\n".join(lines)
 
-def inject_metadata(source_code: str, metadata_block: str) -> str:
+# Reference regex from PEP 723
+_BLOCK_RE = re.compile(r"(?m)^# /// (?P<type>[a-zA-Z0-9-]+)$\s(?P<content>(^#(| .*)$\s)+)^# ///$")
+
+_TOML_STRING_RE = re.compile(r'"((?:[^"\\]|\\.)*)"|\'([^\']*)\'')
+
+def _toml_strings(text: str) -> List[str]:
+    values = []
+    for match in _TOML_STRING_RE.finditer(text):
+        basic, literal = match.groups()
+        values.append(json.loads(f'"{basic}"') if basic is not None else literal)
+    return values
+
+def _strip_toml_comment(line: str) -> str:
+    # Drop a trailing comment, ignoring '#' inside strings
+    end = 0
+    for match in _TOML_STRING_RE.finditer(line):
+        if "#" in line[end:match.start()]:
+            break
+        end = match.end()
+    index = line.find("#", end)
+    return line if index == -1 else line[:index]
+
+def _parse_simple_toml(content: str) -> Dict[str, object]:
+    """
+    Minimal TOML reader for Python < 3.11 (no tomllib). Understands the
+    top-level `key = "string"` and `key = ["string", ...]` entries used by
+    script metadata; tables such as [tool.uv] are skipped.
+    """
+    data: Dict[str, object] = {}
+    lines = iter(content.splitlines())
+    for line in lines:
+        line = _strip_toml_comment(line).strip()
+        if not line:
+            continue
+        if line.startswith("["):
+            # Start of a table, top-level keys are over
+            break
+        key, sep, value = line.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid TOML line: {line!r}")
+        key = key.strip().strip('"\'')
+        value = value.strip()
+        if value.startswith("["):
+            # Arrays may span several lines
+            while value.count("[") - value.count("]") > 0:
+                try:
+                    value += " " + _strip_toml_comment(next(lines)).strip()
+                except StopIteration:
+                    raise ValueError(f"Unterminated array for {key!r}")
+            data[key] = _toml_strings(value)
+        else:
+            strings = _toml_strings(value)
+            data[key] = strings[0] if strings else value
+    return data
+
+def parse_script_metadata(source_code: str) -> Optional[Dict[str, object]]:
+    """
+    Parses the `# /// script` block of a script, as described in PEP 723.
+
+    Returns None if there is no block. Raises ValueError if the block is not
+    valid TOML.
+    """
+    for match in _BLOCK_RE.finditer(source_code):
+        if match.group("type") != "script":
+            continue
+        content = "".join(
+            line[2:] if line.startswith("# ") else line[1:]
+            for line in match.group("content").splitlines(keepends=True)
+        )
+        try:
+            import tomllib
+        except ImportError:
+            return _parse_simple_toml(content)
+        return tomllib.loads(content)
+    return None
+
+_REQUIREMENT_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[([^\]]*)\])?\s*(.*?)\s*$")
+
+def _requirement_key(requirement: str) -> Tuple[str, str]:
+    """
+    Returns (normalized name, comparison key) for a requirement string, so
+    "PyYAML >= 6.0" and "pyyaml>=6.0" compare equal.
+    """
+    match = _REQUIREMENT_RE.match(requirement)
+    if not match:
+        key = requirement.strip()
+        return key, key
+    name, extras, rest = match.groups()
+    name = normalize_name(name)
+    extras = ",".join(sorted(normalize_name(e.strip()) for e in extras.split(",") if e.strip())) if extras else ""
+    rest = re.sub(r"\s+", "", rest)
+    return name, f"{name}[{extras}]{rest}"
+
+def check_metadata(source_code: str, dependencies: Dict[str, Optional[str]], python_requires: Optional[str] = None, overrides: Optional[Dict[str, str]] = None) -> List[str]:
+    """
+    Compares the script's existing metadata block with the one that would be
+    generated. Requirements are compared by normalized name, extras and
+    specifier, ignoring order and formatting. requires-python is only compared
+    when python_requires is given.
+
+    Returns a list of human-readable differences (empty if up to date).
+    """
+    try:
+        metadata = parse_script_metadata(source_code)
+    except ValueError as e:
+        return [f"invalid metadata block: {e}"]
+    if metadata is None:
+        return ["no metadata block"]
+
+    problems = []
+
+    expected = {}
+    for requirement in format_dependencies(dependencies, overrides):
+        name, key = _requirement_key(requirement)
+        expected[name] = (key, requirement)
+    actual = {}
+    for requirement in metadata.get("dependencies") or []:
+        name, key = _requirement_key(str(requirement))
+        actual[name] = (key, requirement)
+
+    missing = [expected[name][1] for name in sorted(expected.keys() - actual.keys())]
+    unexpected = [actual[name][1] for name in sorted(actual.keys() - expected.keys())]
+    changed = [
+        f"{actual[name][1]} -> {expected[name][1]}"
+        for name in sorted(expected.keys() & actual.keys())
+        if expected[name][0] != actual[name][0]
+    ]
+    if missing:
+        problems.append("missing " + ", ".join(missing))
+    if unexpected:
+        problems.append("unexpected " + ", ".join(unexpected))
+    if changed:
+        problems.append("changed " + ", ".join(changed))
+
+    if python_requires is not None:
+        wanted = normalize_python_requires(python_requires)
+        found = metadata.get("requires-python")
+        if found is None or re.sub(r"\s+", "", str(found)) != re.sub(r"\s+", "", wanted):
+            problems.append(f"requires-python {found!r} -> {wanted!r}")
+
+    return problems
+
+_CODING_RE = re.compile(r"^[ \t\f]*#.*?coding[:=][ \t]*([-_.a-zA-Z0-9]+)")
+
+_DOCSTRING_START_RE = re.compile(r"^[rRuUbB]{0,2}(\"\"\"|\'\'\'|\"|\')")
+
+def _iter_line_spans(source_code: str) -> Iterator[Tuple[int, int]]:
+    # (start, end) offsets of each line, newline included, without copying
+    pos = 0
+    length = len(source_code)
+    while pos < length:
+        end = source_code.find("\n", pos)
+        end = length if end == -1 else end + 1
+        yield pos, end
+        pos = end
+
+def _inject_in_header(source_code: str, metadata_block: str) -> Optional[str]:
+    """
+    Fast path of inject_metadata(): only looks at the leading region of
+    comments, blank lines and module docstring, and splices the block in with
+    a single slice. Returns None when the full scan is needed (a block that
+    starts in the header but does not end there, or one further down, or a
+    header with line breaks other than "\n" and "\r\n").
+    """
+    block_text = "".join(line + "\n" for line in metadata_block.splitlines())
+
+    block_start = -1
+    first_lines = []
+    docstring_quote = None
+    seen_docstring = False
+    header_end = len(source_code)
+
+    for start, end in _iter_line_spans(source_code):
+        line = source_code[start:end]
+        # The full scan splits on every line break str.splitlines() knows
+        # ("\r", "\f"...); only "\n" is handled here
+        if len(line.splitlines()) > 1:
+            return None
+        if len(first_lines) < 2:
+            first_lines.append(end)
+
+        # Markers are matched on every line, docstring included, exactly
+        # like the full scan does
+        stripped = line.strip()
+        if stripped == "# /// script":
+            block_start = start
+        elif block_start != -1 and stripped == "# ///":
+            # Replace existing block
+            return source_code[:block_start] + block_text + source_code[end:]
+
+        if docstring_quote is not None:
+            if docstring_quote in line:
+                docstring_quote = None
+            continue
+        if not stripped or stripped.startswith("#"):
+            continue
+
+        match = _DOCSTRING_START_RE.match(stripped)
+        if match and not seen_docstring:
+            seen_docstring = True
+            quote = match.group(1)
+            if quote not in stripped[match.end():]:
+                docstring_quote = quote
+            continue
+
+        header_end = start
+        break
+
+    if block_start != -1 or source_code.find("# /// script", header_end) != -1:
+        return None
+
+    # Insert for the first time, after the shebang and encoding cookie
+    insert_at = 0
+    if first_lines:
+        first_line = source_code[:first_lines[0]]
+        if first_line.startswith("#!"):
+            insert_at = first_lines[0]
+            # Encoding cookie (must be line 1 or 2)
+            if len(first_lines) > 1 and _CODING_RE.match(source_code[first_lines[0]:first_lines[1]]):
+                insert_at = first_lines[1]
+        elif _CODING_RE.match(first_line):
+            insert_at = first_lines[0]
+
+    # Add an extra newline for separation from code/docstrings
+    return source_code[:insert_at] + block_text + "\n" + source_code[insert_at:]
+
+def inject_metadata(source_code: str, metadata_block: str, full_scan: bool = False) -> str:
     """
     Inserts the metadata block into the source code, replacing an existing one if present,
     or preserving shebang and encoding lines if inserting for the first time.
+
+    By default only the leading comments and docstring are scanned for an
+    existing block, which avoids copying very large files line by line; the
+    full line-by-line scan is still used when a block sits further down.
+    full_scan: Always use the line-by-line scan.
     """
+    if not full_scan:
+        injected = _inject_in_header(source_code, metadata_block)
+        if injected is not None:
+            return injected
+
     lines = source_code.splitlines(keepends=True)
     
     # Check for existing block
@@ -79,13 +334,11 @@ def inject_metadata(source_code: str, metadata_block: str) -> str:
                 insert_idx += 1
                 
                 # Encoding cookie (must be line 1 or 2)
-                coding_re = re.compile(r"^[ \t\f]*#.*?coding[:=][ \t]*([-_.a-zA-Z0-9]+)")
-                if len(lines) > 1 and coding_re.match(lines[1]):
+                if len(lines) > 1 and _CODING_RE.match(lines[1]):
                     insert_idx += 1
             else:
                 # Check line 1 for encoding
-                coding_re = re.compile(r"^[ \t\f]*#.*?coding[:=][ \t]*([-_.a-zA-Z0-9]+)")
-                if coding_re.match(lines[0]):
+                if _CODING_RE.match(lines[0]):
                     insert_idx += 1
         
         # Add an extra newline for separation from code/docstrings
@@ -0,0 +1,242 @@
+import argparse
+import sys
+from collections import Counter
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from depscripter.resolver import _module_name, normalize_name
+from depscripter.writer import write_text_atomic
+
+# Bundled table of well-known top-level modules and the PyPI distribution
+# providing them. One "module<TAB>distribution" line per module, sorted by
+# module (byte order), ASCII only, so it can be binary-searched in place.
+KNOWN_MODULES_FILE = Path(__file__).parent / "data" / "known_modules.tsv"
+
+# Top-level names some wheels ship by mistake; never attribute them to anyone
+_GENERIC_NAMES = frozenset({
+    "app", "benchmarks", "bin", "build", "config", "conftest", "doc", "docs",
+    "example", "examples", "lib", "main", "scripts", "setup", "src", "test",
+    "testing", "tests", "tools", "util", "utils",
+})
+
+
+class KnownModules:
+    """
+    Read-only module -> distribution lookup over a known-modules file.
+
+    The file is memory-mapped on first use and binary-searched line by line,
+    so a lookup touches a handful of pages instead of loading the whole table
+    into a dict.
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = KNOWN_MODULES_FILE if path is None else Path(path)
+        self._data = None
+
+    def _load(self):
+        if self._data is None:
+            import mmap
+
+            try:
+                with open(self.path, "rb") as f:
+                    self._data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                # Missing or empty table
+                self._data = b""
+        return self._data
+
+    def lookup(self, module: str) -> Optional[str]:
+        """
+        Returns the distribution known to provide `module`, or None.
+        """
+        try:
+            key = module.encode("ascii")
+        except UnicodeEncodeError:
+            return None
+        data = self._load()
+
+        # lo and hi always sit at the start of a line (or at the end)
+        lo, hi = 0, len(data)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = data.rfind(b"\n", 0, mid) + 1
+            end = data.find(b"\n", start)
+            if end == -1:
+                end = len(data)
+            line = data[start:end]
+            tab = line.find(b"\t")
+            line_key = line[:tab] if tab != -1 else line
+            if line_key == key:
+                return line[tab + 1:].decode("ascii") if tab != -1 else None
+            if line_key < key:
+                lo = end + 1
+            else:
+                hi = start
+        return None
+
+    def get(self, module: str, default: Optional[List[str]] = None) -> Optional[List[str]]:
+        # Same interface as the environment mappings
+        dist = self.lookup(module)
+        return default if dist is None else [dist]
+
+    def close(self) -> None:
+        if self._data is not None and not isinstance(self._data, bytes):
+            self._data.close()
+        self._data = None
+
+
+def _modules_from_names(names: Iterable[str]) -> List[str]:
+    # Top-level modules from the file names of a wheel or RECORD
+    modules = set()
+    for name in names:
+        parts = name.split("/")
+        if len(parts) > 1:
+            if parts[0].endswith((".dist-info", ".data")):
+                continue
+            module = parts[0]
+        else:
+            module = _module_name(parts[0])
+        if module and "." not in module and "-" not in module:
+            modules.add(module)
+    return sorted(modules)
+
+
+def _metadata_name(metadata: str) -> Optional[str]:
+    # The "Name:" header, without parsing the whole METADATA file
+    for line in metadata.splitlines():
+        if not line:
+            break
+        if line.lower().startswith("name:"):
+            return line[5:].strip() or None
+    return None
+
+
+def _read_wheel(path: Path) -> Optional[Tuple[str, List[str]]]:
+    import zipfile
+
+    name = None
+    try:
+        with zipfile.ZipFile(path) as wheel:
+            names = wheel.namelist()
+            dist_info = [n for n in names if n.count("/") == 1 and n.split("/")[0].endswith(".dist-info")]
+            top_level = [n for n in dist_info if n.endswith("/top_level.txt")]
+            if top_level:
+                modules = sorted(set(wheel.read(top_level[0]).decode("utf-8").split()))
+            else:
+                modules = _modules_from_names(names)
+            metadata = [n for n in dist_info if n.endswith("/METADATA")]
+            if metadata:
+                name = _metadata_name(wheel.read(metadata[0]).decode("utf-8"))
+    except (OSError, zipfile.BadZipFile, UnicodeDecodeError):
+        return None
+    # {distribution}-{version}(-{build})?-{python}-{abi}-{platform}.whl
+    return name or path.name.split("-")[0], modules
+
+
+def _read_dist_info(path: Path) -> Optional[Tuple[str, List[str]]]:
+    top_level = path / "top_level.txt"
+    record = path / "RECORD"
+    try:
+        if top_level.is_file():
+            modules = sorted(set(top_level.read_text(encoding="utf-8").split()))
+        elif record.is_file():
+            lines = record.read_text(encoding="utf-8").splitlines()
+            modules = _modules_from_names(line.split(",")[0] for line in lines if line)
+        else:
+            return None
+        metadata = path / "METADATA"
+        name = _metadata_name(metadata.read_text(encoding="utf-8")) if metadata.is_file() else None
+    except (OSError, UnicodeDecodeError):
+        return None
+    return name or path.name[:-len(".dist-info")].split("-")[0], modules
+
+
+def iter_cached_distributions(roots: Iterable[Path]) -> Iterator[Tuple[str, List[str]]]:
+    """
+    Yields (distribution name, top-level modules) for every wheel (*.whl) and
+    unpacked wheel (*.dist-info) found under the given directories, such as
+    pip's or uv's cache. Wheels are only read, never installed or imported.
+    """
+    for root in roots:
+        for path in sorted(Path(root).rglob("*.whl")):
+            found = _read_wheel(path)
+            if found is not None:
+                yield found
+        for path in sorted(Path(root).rglob("*.dist-info")):
+            if path.is_dir():
+                found = _read_dist_info(path)
+                if found is not None:
+                    yield found
+
+
+def build_known_modules(distributions: Iterable[Tuple[str, List[str]]]) -> Dict[str, str]:
+    """
+    Builds the module -> distribution table. When several distributions
+    provide the same module, the one named after it wins, then the one seen
+    most often (e.g. across versions), then the first alphabetically.
+    """
+    claims: Dict[str, Counter] = {}
+    display: Dict[str, str] = {}
+    for dist, modules in distributions:
+        # Wheel file names escape "-" as "_"; keep one spelling per project
+        key = normalize_name(dist)
+        display.setdefault(key, dist)
+        for module in modules:
+            if module.startswith("_") or module in _GENERIC_NAMES or not module.isidentifier() or not module.isascii():
+                continue
+            claims.setdefault(module, Counter())[key] += 1
+
+    table = {}
+    for module, counter in claims.items():
+        key = normalize_name(module)
+        if key in counter:
+            best = key
+        else:
+            best = min(counter, key=lambda k: (-counter[k], k))
+        table[module] = display[best]
+    return table
+
+
+def write_known_modules(table: Dict[str, str], path: Path) -> None:
+    """
+    Writes a table in the format KnownModules reads: sorted by module in byte
+    order, one "module<TAB>distribution" line each.
+    """
+    lines = [f"{module}\t{table[module]}\n" for module in sorted(table, key=lambda m: m.encode("ascii"))]
+    path.parent.mkdir(parents=True, exist_ok=True)
+    write_text_atomic(path, "".join(lines), encoding="ascii")
+
+
+def read_known_modules(path: Path) -> Dict[str, str]:
+    table = {}
+    for line in Path(path).read_text(encoding="ascii").splitlines():
+        module, _, dist = line.partition("\t")
+        if module and dist:
+            table[module] = dist
+    return table
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m depscripter.known",
+        description="Rebuild the known-modules table from a local wheel cache.",
+    )
+    parser.add_argument("roots", nargs="+", type=Path, metavar="dir", help="Directories holding wheels or unpacked wheels (e.g. ~/.cache/pip/wheels)")
+    # Required: the bundled table lives inside the installed package
+    parser.add_argument("-o", "--output", type=Path, required=True, help="Table to write (the bundled one is src/depscripter/data/known_modules.tsv in a source checkout)")
+    parser.add_argument("--merge", action="store_true", help="Keep the entries of the existing table for modules not found in the cache")
+    args = parser.parse_args(argv)
+
+    table = build_known_modules(iter_cached_distributions(args.roots))
+    if args.merge and args.output.exists():
+        for module, dist in read_known_modules(args.output).items():
+            table.setdefault(module, dist)
+    if not table:
+        sys.exit("Error: no wheels found")
+
+    write_known_modules(table, args.output)
+    print(f"Wrote {len(table)} module(s) to {args.output}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
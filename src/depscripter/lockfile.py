@@ -0,0 +1,99 @@
+import re
+from pathlib import Path
+from typing import Dict, List, Mapping, Optional, Tuple
+
+from depscripter.resolver import normalize_name
+
+# normalized name -> (name as written in the lock file, pinned version or None)
+LockTable = Dict[str, Tuple[str, Optional[str]]]
+
+# uv.lock: every [[package]] table starts with its name, then (usually) its
+# version. Matched directly instead of parsing the whole TOML document, which
+# is much slower on lock files of several hundred KB.
+_UV_PACKAGE_RE = re.compile(
+    r'^\[\[package\]\]\s*\n'
+    r'name\s*=\s*"([^"]+)"[ \t]*\n'
+    r'(?:version\s*=\s*"([^"]+)")?',
+    re.MULTILINE,
+)
+
+# requirements.txt: name[extras] == version (or ===), anything after is ignored
+_REQUIREMENT_LINE_RE = re.compile(
+    r'^\s*([A-Za-z0-9][A-Za-z0-9._-]*)\s*(?:\[[^\]]*\])?\s*(?:===?\s*([^\s;,#\\]+))?'
+)
+
+
+def parse_uv_lock(text: str) -> LockTable:
+    """
+    Extracts the name and version of every package in a uv.lock file. When a
+    package is locked more than once (e.g. per platform), the first entry wins.
+    """
+    table: LockTable = {}
+    for match in _UV_PACKAGE_RE.finditer(text):
+        name, version = match.group(1), match.group(2)
+        table.setdefault(normalize_name(name), (name, version))
+    return table
+
+
+def parse_requirements(text: str) -> LockTable:
+    """
+    Extracts the packages of a requirements.txt file (e.g. from `pip freeze`
+    or `uv pip compile`). Only `==` pins give a version; options (-r, -e,
+    --hash...), URLs and comments are skipped.
+    """
+    table: LockTable = {}
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith(("#", "-")):
+            continue
+        match = _REQUIREMENT_LINE_RE.match(line)
+        if not match:
+            continue
+        rest = line[match.end():].lstrip()
+        # Bare URLs and paths name no package
+        if rest.startswith((":", "/")):
+            continue
+        # "name @ https://..." direct references carry no version
+        name, version = match.group(1), match.group(2)
+        table.setdefault(normalize_name(name), (name, version))
+    return table
+
+
+def load_lock_file(path: Path) -> LockTable:
+    """
+    Reads a uv.lock or requirements.txt file into a table keyed by normalized
+    distribution name. Nothing from the locked environment is imported or run.
+
+    Raises OSError if the file cannot be read.
+    """
+    text = Path(path).read_text(encoding="utf-8")
+    if Path(path).suffix == ".lock" or _UV_PACKAGE_RE.search(text):
+        return parse_uv_lock(text)
+    return parse_requirements(text)
+
+
+class LockIndex:
+    """
+    Module -> distributions lookup pinned by a lock file.
+
+    Modules are mapped with `mapping` (an environment index, or a LazyIndex)
+    when it knows them, and otherwise matched by name against the locked
+    packages (e.g. "requests" -> requests). .versions holds the locked
+    versions, so resolve_packages() pins what the lock file says rather than
+    what happens to be installed; distributions missing from it stay unpinned.
+    """
+
+    def __init__(self, table: LockTable, mapping: Optional[Mapping[str, List[str]]] = None):
+        self.table = table
+        self.mapping = mapping
+        self.versions: Dict[str, str] = {key: version for key, (_, version) in table.items() if version}
+
+    def get(self, module: str, default: Optional[List[str]] = None) -> Optional[List[str]]:
+        if self.mapping is not None:
+            dists = self.mapping.get(module)
+            if dists:
+                return dists
+        entry = self.table.get(normalize_name(module))
+        if entry is not None:
+            return [entry[0]]
+        return default
@@ -0,0 +1,211 @@
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+# PEP 508 environment markers, without depending on `packaging`
+
+_TOKEN_RE = re.compile(r"""
+    \s*(
+        \(|\)
+      | ===|==|!=|<=|>=|~=|<|>
+      | not\s+in\b|in\b|and\b|or\b
+      | '[^']*'|"[^"]*"
+      | [A-Za-z_][A-Za-z0-9_.]*
+    )""", re.VERBOSE)
+
+_VARIABLES = frozenset({
+    "implementation_name", "implementation_version", "os_name",
+    "platform_machine", "platform_release", "platform_system",
+    "platform_version", "python_full_version", "platform_python_implementation",
+    "python_version", "sys_platform", "extra",
+    # Legacy spellings still found in old metadata
+    "os.name", "sys.platform", "platform.version", "platform.machine",
+    "platform.python_implementation", "python_implementation",
+})
+
+_LEGACY = {
+    "os.name": "os_name",
+    "sys.platform": "sys_platform",
+    "platform.version": "platform_version",
+    "platform.machine": "platform_machine",
+    "platform.python_implementation": "platform_python_implementation",
+    "python_implementation": "platform_python_implementation",
+}
+
+_VERSION_RE = re.compile(r"^\s*v?(\d+(?:\.\d+)*)(\.\*)?\s*$")
+
+
+def default_environment() -> Dict[str, str]:
+    """
+    Returns the marker variables of the running interpreter.
+    """
+    import platform
+
+    info = sys.implementation.version
+    implementation_version = f"{info.major}.{info.minor}.{info.micro}"
+    if info.releaselevel != "final":
+        implementation_version += info.releaselevel[0] + str(info.serial)
+    return {
+        "implementation_name": sys.implementation.name,
+        "implementation_version": implementation_version,
+        "os_name": os.name,
+        "platform_machine": platform.machine(),
+        "platform_release": platform.release(),
+        "platform_system": platform.system(),
+        "platform_version": platform.version(),
+        "python_full_version": platform.python_version(),
+        "platform_python_implementation": platform.python_implementation(),
+        "python_version": ".".join(platform.python_version_tuple()[:2]),
+        "sys_platform": sys.platform,
+        "extra": "",
+    }
+
+
+def _tokenize(marker: str) -> List[str]:
+    tokens = []
+    pos = 0
+    marker = marker.rstrip()
+    while pos < len(marker):
+        match = _TOKEN_RE.match(marker, pos)
+        if not match:
+            raise ValueError(f"invalid marker {marker!r} at {pos}")
+        tokens.append(match.group(1))
+        pos = match.end()
+    return tokens
+
+
+def _release(value: str) -> Optional[Tuple[Tuple[int, ...], bool]]:
+    # (release numbers, trailing ".*"), or None if not a plain release
+    match = _VERSION_RE.match(value)
+    if not match:
+        return None
+    return tuple(int(part) for part in match.group(1).split(".")), bool(match.group(2))
+
+
+def _prefix(version: Tuple[int, ...], length: int) -> Tuple[int, ...]:
+    # First `length` release numbers, zero padded
+    return (version + (0,) * length)[:length]
+
+
+def _compare_versions(op: str, left: str, right: str) -> bool:
+    lhs, rhs = _release(left), _release(right)
+    if lhs is None or rhs is None or lhs[1]:
+        raise ValueError(f"cannot compare {left!r} {op} {right!r}")
+    version, (spec, wildcard) = lhs[0], rhs
+
+    if wildcard:
+        if op not in ("==", "!="):
+            raise ValueError(f"wildcard not allowed with {op}")
+        matches = _prefix(version, len(spec)) == spec
+        return matches if op == "==" else not matches
+    if op == "~=":
+        # ~= 2.2 means >= 2.2, == 2.*
+        if len(spec) < 2:
+            raise ValueError("~= needs at least two release numbers")
+        length = max(len(version), len(spec))
+        return _prefix(version, length) >= _prefix(spec, length) and _prefix(version, len(spec) - 1) == spec[:-1]
+
+    length = max(len(version), len(spec))
+    a, b = _prefix(version, length), _prefix(spec, length)
+    return {
+        "==": a == b,
+        "!=": a != b,
+        "<": a < b,
+        "<=": a <= b,
+        ">": a > b,
+        ">=": a >= b,
+    }[op]
+
+
+def _compare(op: str, left: str, right: str) -> bool:
+    if op == "in":
+        return left in right
+    if op == "not in":
+        return left not in right
+    if op == "===":
+        return left == right
+    if _release(left) is not None and _release(right) is not None:
+        return _compare_versions(op, left, right)
+    if op == "==":
+        return left == right
+    if op == "!=":
+        return left != right
+    raise ValueError(f"cannot compare {left!r} {op} {right!r}")
+
+
+class _Parser:
+    def __init__(self, tokens: List[str], environment: Dict[str, str]):
+        self.tokens = tokens
+        self.pos = 0
+        self.environment = environment
+
+    def peek(self) -> Optional[str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self) -> str:
+        token = self.peek()
+        if token is None:
+            raise ValueError("unexpected end of marker")
+        self.pos += 1
+        return token
+
+    def parse_or(self) -> bool:
+        result = self.parse_and()
+        while self.peek() == "or":
+            self.take()
+            # Evaluate both sides so syntax errors are never hidden
+            right = self.parse_and()
+            result = result or right
+        return result
+
+    def parse_and(self) -> bool:
+        result = self.parse_expr()
+        while self.peek() == "and":
+            self.take()
+            right = self.parse_expr()
+            result = result and right
+        return result
+
+    def parse_expr(self) -> bool:
+        if self.peek() == "(":
+            self.take()
+            result = self.parse_or()
+            if self.take() != ")":
+                raise ValueError("expected ')'")
+            return result
+        left = self.parse_value()
+        op = self.take()
+        if op.startswith("not"):
+            op = "not in"
+        if op not in ("===", "==", "!=", "<=", ">=", "~=", "<", ">", "in", "not in"):
+            raise ValueError(f"unknown operator {op!r}")
+        right = self.parse_value()
+        return _compare(op, left, right)
+
+    def parse_value(self) -> str:
+        token = self.take()
+        if token[0] in "'\"":
+            return token[1:-1]
+        if token in _VARIABLES:
+            name = _LEGACY.get(token, token)
+            if name not in self.environment:
+                raise ValueError(f"unknown marker variable {token!r}")
+            return self.environment[name]
+        raise ValueError(f"unexpected {token!r} in marker")
+
+
+def evaluate_marker(marker: str, environment: Optional[Dict[str, str]] = None) -> bool:
+    """
+    Evaluates a PEP 508 environment marker (e.g. `python_version < "3.11" and
+    sys_platform == "win32"`). Versions are compared on their release numbers.
+
+    Raises ValueError for anything it cannot evaluate with certainty.
+    """
+    if environment is None:
+        environment = default_environment()
+    parser = _Parser(_tokenize(marker), environment)
+    result = parser.parse_or()
+    if parser.peek() is not None:
+        raise ValueError(f"unexpected {parser.peek()!r} in marker")
+    return result
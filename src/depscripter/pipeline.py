@@ -0,0 +1,81 @@
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, Iterator, List, Mapping, NamedTuple, Optional, Set, Union
+
+from depscripter.batch import scan_files
+from depscripter.cache import ScanCache, get_environment_index
+from depscripter.finder import iter_scripts
+from depscripter.injector import generate_script_metadata, inject_metadata
+from depscripter.resolver import resolve_packages
+from depscripter.writer import write_if_changed
+
+if TYPE_CHECKING:
+    from depscripter.known import KnownModules
+
+
+class ProcessResult(NamedTuple):
+    path: Path
+    modules: Optional[Set[str]]
+    dependencies: Optional[Dict[str, Optional[str]]]
+    unresolved: Optional[Set[str]]
+    new_source: Optional[str]
+    changed: bool = False
+    error: Optional[str] = None
+
+
+def iter_process(
+    paths: Iterable[Union[str, Path]],
+    pin_versions: bool = True,
+    python_requires: Optional[str] = None,
+    overrides: Optional[Dict[str, str]] = None,
+    exclude: Iterable[str] = (),
+    gitignore: bool = False,
+    in_place: bool = False,
+    engine: str = "ast",
+    jobs: int = 1,
+    mapping: Optional[Mapping[str, List[str]]] = None,
+    versions: Optional[Dict[str, str]] = None,
+    known: Optional["KnownModules"] = None,
+    cache: Optional[ScanCache] = None,
+) -> Iterator[ProcessResult]:
+    """
+    Adds PEP 723 metadata to many scripts, yielding a ProcessResult per file
+    as soon as it is done:
+
+        for result in iter_process(["monorepo/"], exclude=["tests/fixtures/"]):
+            print(result.path, result.dependencies or result.error)
+
+    paths: Files, directories and glob patterns, see iter_scripts().
+    Directories are walked lazily, and only the file being processed is held
+    in memory (plus a few per worker with jobs > 1), so memory stays flat
+    however many files there are.
+    exclude, gitignore: Patterns to skip while walking directories, and
+    whether to honour .gitignore files (off by default, as with the CLI), see
+    iter_scripts().
+    in_place: Write the new source back to each file (unchanged files are not
+    rewritten); otherwise it is only returned.
+    engine, jobs, cache: See scan_files().
+    mapping, versions, known: See resolve_packages(). One environment index
+    serves the whole stream; by default it is loaded (or built) with
+    get_environment_index() when the first file needs it.
+
+    Per-file problems (missing file, syntax error...) are reported in
+    ProcessResult.error, never raised.
+    """
+    scripts = iter_scripts((str(path) for path in paths), exclude=exclude, gitignore=gitignore)
+    for scanned in scan_files(scripts, jobs=jobs, engine=engine, cache=cache):
+        if scanned.error is not None:
+            yield ProcessResult(scanned.path, None, None, None, None, error=scanned.error)
+            continue
+
+        if mapping is None:
+            mapping, versions = get_environment_index()
+        unresolved: Set[str] = set()
+        imported: Set[str] = set()
+        dependencies = resolve_packages(scanned.modules, pin_versions=pin_versions, mapping=mapping, versions=versions, known=known, unresolved=unresolved, imported=imported)
+
+        metadata = generate_script_metadata(dependencies, python_requires=python_requires, overrides=overrides)
+        new_source = inject_metadata(scanned.source, metadata)
+        changed = new_source != scanned.source
+        if in_place and changed:
+            changed = write_if_changed(scanned.path, new_source, current=scanned.source)
+        yield ProcessResult(scanned.path, imported, dependencies, unresolved, new_source, changed)
@@ -1,62 +1,526 @@
+import os
+import re
 import sys
-from typing import Dict, List, Optional, Set
-import importlib.metadata
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Dict, Iterable, List, Optional, Set, Tuple, TypeVar
+import importlib.machinery
 
-def _get_packages_distributions_fallback() -> Dict[str, List[str]]:
+from depscripter import stats
+from depscripter.stdlib import is_stdlib_module
+
+if TYPE_CHECKING:
+    # known imports this module
+    from depscripter.known import KnownModules
+
+_NORMALIZE_RE = re.compile(r"[-_.]+")
+
+T = TypeVar("T")
+
+def normalize_name(name: str) -> str:
+    """
+    Normalizes a distribution name as described in PEP 503 (e.g. "Foo_Bar" -> "foo-bar").
+    """
+    return _NORMALIZE_RE.sub("-", name).lower()
+
+def _get_packages_distributions_fallback(workers: Optional[int] = None) -> Dict[str, List[str]]:
     """
     Fallback for importlib.metadata.packages_distributions() for generic Python < 3.10.
-    Builds a mapping of top-level module names to distribution names.
+    Builds a mapping of top-level module names to distribution names, from
+    top_level.txt or, for wheels that lack it, from the files listed in RECORD.
+
+    workers: Threads used to read the distributions' metadata, see
+    read_distributions().
     """
-    pkg_to_dist = {}
-    for dist in importlib.metadata.distributions():
-        # Try to get top-level modules
-        try:
-            # .read_text('top_level.txt') might return None if file missing
-            top_level = dist.read_text('top_level.txt')
-            if top_level:
-                for module in top_level.splitlines():
-                    module = module.strip()
-                    if module:
-                        pkg_to_dist.setdefault(module, []).append(dist.metadata['Name'])
-                continue
-        except Exception:
-            pass
+    import importlib.metadata
 
-        # If top_level.txt is missing (e.g. some wheels), inspect files?
-        # This is expensive and complex to do perfectly correctly without external libs.
-        # For now, rely on top_level.txt which covers most cases.
-        # Alternatively, name matching? e.g. dist "requests" provides "requests"
-        
-        # Simple heuristic: normalized name matches?
-        # This is risky. Let's just stick to top_level.txt for now as per stdlib implementation inspiration.
-        # Actually stdlib implementation also checks for extension modules, but that's hard.
-        pass
-    
+    pkg_to_dist: Dict[str, List[str]] = {}
+    for found in read_distributions(importlib.metadata.distributions(), workers):
+        if found is None:
+            continue
+        name, _, modules, _ = found
+        for module in modules:
+            pkg_to_dist.setdefault(module, []).append(name)
     return pkg_to_dist
 
 def get_packages_distributions() -> Dict[str, List[str]]:
+    import importlib.metadata
+
     if hasattr(importlib.metadata, 'packages_distributions'):
         return importlib.metadata.packages_distributions()
     return _get_packages_distributions_fallback()
 
-def resolve_packages(module_names: Set[str], pin_versions: bool = True) -> Dict[str, Optional[str]]:
+# Extension modules built for any interpreter, e.g. foo.cpython-311-darwin.so,
+# foo.abi3.so or foo.cp39-win_amd64.pyd
+_EXTENSION_SUFFIXES = (".so", ".pyd")
+
+def _module_name(filename: str) -> Optional[str]:
+    # Like inspect.getmodulename(), without importing inspect
+    if filename.endswith(_EXTENSION_SUFFIXES):
+        return filename.split(".", 1)[0]
+    for suffix in sorted(importlib.machinery.all_suffixes(), key=len, reverse=True):
+        if filename.endswith(suffix):
+            return filename[:-len(suffix)]
+    return None
+
+def _top_level_inferred(dist: "importlib.metadata.Distribution") -> Iterable[str]:
+    """
+    Infers top-level module names from the files listed in RECORD, like
+    importlib.metadata.packages_distributions() does on Python 3.10+, also
+    recognizing extension modules built for other interpreters.
+    """
+    names = set()
+    for path in dist.files or ():
+        parts = path.parts
+        # Directories cover packages, namespace packages included
+        name = parts[0] if len(parts) > 1 else _module_name(parts[0])
+        if name and '.' not in name and name != "__pycache__":
+            names.add(name)
+    return names
+
+# (name, version, top-level modules, distribution), None without a name
+DistributionInfo = Optional[Tuple[str, str, List[str], "importlib.metadata.Distribution"]]
+
+def _read_distribution(dist: "importlib.metadata.Distribution") -> DistributionInfo:
+    metadata = dist.metadata
+    name = metadata.get('Name')
+    if not name:
+        return None
+    return name, metadata['Version'], list(_dist_modules(dist)), dist
+
+def _default_workers() -> int:
+    try:
+        return int(os.environ.get("DEPSCRIPTER_METADATA_THREADS", "1"))
+    except ValueError:
+        return 1
+
+def map_distributions(func: Callable[["importlib.metadata.Distribution"], T], dists: Iterable["importlib.metadata.Distribution"], workers: Optional[int] = None) -> List[T]:
+    """
+    Applies `func` to many distributions, returning the results in the same
+    order.
+
+    Reading metadata is dominated by opening small files (METADATA,
+    top_level.txt, RECORD). On a local disk that is fast and a thread pool
+    only adds overhead (see benchmarks/bench_resolver.py), but on network
+    filesystems every open waits on the server and spreading the reads over
+    threads pays off.
+
+    workers: Number of threads, 1 reads serially. By default the
+    DEPSCRIPTER_METADATA_THREADS environment variable, or 1.
+    """
+    dists = list(dists)
+    if workers is None:
+        workers = _default_workers()
+    workers = min(workers, len(dists))
+    if workers <= 1:
+        return [func(dist) for dist in dists]
+
+    # Imported here, small environments never need it
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(func, dists))
+
+def read_distributions(dists: Iterable["importlib.metadata.Distribution"], workers: Optional[int] = None) -> List[DistributionInfo]:
+    """
+    Reads the name, version and top-level modules of many distributions,
+    returned in the same order, see map_distributions().
+    """
+    return map_distributions(_read_distribution, dists, workers)
+
+def build_environment_index(path: Optional[List[str]] = None, workers: Optional[int] = None) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+    """
+    Builds, in a single pass over the installed distributions:
+    - the module -> distribution names mapping (as get_packages_distributions())
+    - a version table keyed by PEP 503 normalized distribution name
+
+    Each distribution's metadata is parsed once, so pinning versions later
+    needs no further filesystem access. Like importlib.metadata.version(), the
+    first distribution found on sys.path wins when a name is installed twice.
+
+    path: Directories to search instead of sys.path.
+    workers: Threads reading the metadata, see read_distributions().
+    """
+    import importlib.metadata
+
+    mapping: Dict[str, List[str]] = {}
+    versions: Dict[str, str] = {}
+    providers: Dict[str, List[Tuple[str, "importlib.metadata.Distribution"]]] = {}
+    dists = importlib.metadata.distributions() if path is None else importlib.metadata.distributions(path=path)
+    infos = read_distributions(dists, workers)
+    stats.count("distributions_read", len(infos))
+    for found in infos:
+        if found is None:
+            continue
+        name, version, modules, dist = found
+
+        key = normalize_name(name)
+        if key not in versions:
+            versions[key] = version
+
+        for module in modules:
+            mapping.setdefault(module, []).append(name)
+            providers.setdefault(module, []).append((name, dist))
+
+    # Only packages shared by several distributions, or namespace packages,
+    # need their RECORD files read to tell their subpackages apart
+    for module, provided_by in providers.items():
+        if len(provided_by) > 1 or _is_namespace_dir(provided_by[0][1], module):
+            mapping.update(_dotted_prefixes(module, provided_by))
+
+    return mapping, versions
+
+def _namespace_key(prefix: str) -> str:
+    # Marks a namespace package in the mapping: a trailing dot can never be
+    # part of a module name
+    return prefix + "."
+
+def _is_namespace_dir(dist: "importlib.metadata.Distribution", module: str) -> bool:
+    location = str(dist.locate_file(module))
+    return os.path.isdir(location) and not os.path.exists(os.path.join(location, "__init__.py"))
+
+def _dotted_prefixes(top: str, provided_by: List[Tuple[str, "importlib.metadata.Distribution"]]) -> Dict[str, List[str]]:
+    """
+    Builds the dotted part of the module trie below the top-level package
+    `top`, flattened into mapping entries ("google.cloud.storage" ->
+    ["google-cloud-storage"]) so a longest-prefix match takes one dict lookup
+    per level (see lookup_module()).
+
+    Only prefixes whose providers differ from their parent's are kept, plus a
+    _namespace_key() marker for every namespace package (a directory without
+    __init__.py): lookups must not fall back past one of those, since the
+    package itself belongs to nobody.
+    """
+    owners: Dict[str, List[str]] = {}
+    regular: Set[str] = set()
+    for name, dist in provided_by:
+        try:
+            record = dist.read_text('RECORD') or ""
+        except Exception:
+            continue
+        seen: Set[str] = set()
+        for line in record.splitlines():
+            parts = line.split(",", 1)[0].split("/")
+            if len(parts) < 2 or parts[0] != top:
+                continue
+            package = parts[:-1]
+            if not all(part.isidentifier() for part in package):
+                continue
+            if parts[-1] == "__init__.py":
+                regular.add(".".join(package))
+            module = _module_name(parts[-1])
+            if module and module != "__init__" and module.isidentifier():
+                package = package + [module]
+                regular.add(".".join(package))
+            for depth in range(1, len(package) + 1):
+                prefix = ".".join(package[:depth])
+                if prefix not in seen:
+                    seen.add(prefix)
+                    owners.setdefault(prefix, []).append(name)
+
+    entries: Dict[str, List[str]] = {}
+    for prefix, names in owners.items():
+        parent, _, _ = prefix.rpartition(".")
+        if prefix not in regular:
+            entries[_namespace_key(prefix)] = names
+        if parent and (names != owners.get(parent) or parent not in regular):
+            entries[prefix] = names
+    return entries
+
+def find_site_packages(location: str) -> List[str]:
+    """
+    Returns the directories holding the distributions of another environment,
+    given either a virtual environment (or any prefix with a lib/pythonX.Y or
+    Lib directory) or a site-packages directory itself.
+
+    Only directory names are inspected, nothing from the environment is
+    imported or run. Raises FileNotFoundError if none is found.
+    """
+    root = Path(location)
+    if root.name in ("site-packages", "dist-packages") and root.is_dir():
+        return [str(root)]
+
+    found: List[str] = []
+    seen: Set[str] = set()
+    candidates = (
+        sorted(root.glob("lib/python*/site-packages"))
+        + sorted(root.glob("lib64/python*/site-packages"))
+        + [root / "Lib" / "site-packages"]
+    )
+    for candidate in candidates:
+        if not candidate.is_dir():
+            continue
+        # lib64 is often a symlink to lib
+        real = os.path.realpath(candidate)
+        if real not in seen:
+            seen.add(real)
+            found.append(str(candidate))
+
+    if not found:
+        # A plain directory of distributions (e.g. pip install --target)
+        if root.is_dir() and any(name.endswith((".dist-info", ".egg-info")) for name in os.listdir(root)):
+            return [str(root)]
+        raise FileNotFoundError(f"no site-packages directory found in {location}")
+    return found
+
+def _dist_modules(dist: "importlib.metadata.Distribution") -> Iterable[str]:
+    """
+    Returns the top-level modules a distribution provides, from top_level.txt
+    or, when the wheel has none, inferred from RECORD.
+    """
+    try:
+        top_level = dist.read_text('top_level.txt')
+    except Exception:
+        top_level = None
+    if top_level:
+        return top_level.split()
+    return _top_level_inferred(dist)
+
+def _ships_module(dist: "importlib.metadata.Distribution", module: str) -> bool:
+    """
+    True if the RECORD of a distribution lists the dotted module, as a package
+    directory or as a module file.
+    """
+    try:
+        record = dist.read_text('RECORD') or ""
+    except Exception:
+        return False
+    path = module.replace(".", "/")
+    parent = path.rpartition("/")[0]
+    last = module.rpartition(".")[2]
+    for line in record.splitlines():
+        entry = line.split(",", 1)[0]
+        if entry.startswith(path + "/"):
+            return True
+        directory, _, filename = entry.rpartition("/")
+        if directory == parent and _module_name(filename) == last:
+            return True
+    return False
+
+IndexLoader = Callable[[], Tuple[Dict[str, List[str]], Dict[str, str]]]
+
+class LazyIndex:
+    """
+    Module -> distributions lookup that only inspects what is asked for.
+
+    Usable wherever a mapping from get_packages_distributions() is accepted
+    (it implements .get()), with .versions standing in for the version table.
+    For each module it:
+    1. probes dist-info/egg-info directories whose normalized name matches the
+       module name and checks that the distribution really provides it;
+    2. otherwise locates the module's .py file or package directory on the
+       path; if it lives outside any site-packages (stdlib, local code) it is
+       not provided by a distribution;
+    3. only when both fail, builds the full index (once) and uses that.
+
+    Directory listings, probed distributions and answers are all memoized.
+    """
+
+    def __init__(self, path: Optional[List[str]] = None, full_index: Optional[IndexLoader] = None):
+        self.path = list(sys.path if path is None else path)
+        self.versions: Dict[str, str] = {}
+        self._full_index = full_index or (lambda: build_environment_index(self.path))
+        self._full_mapping: Optional[Dict[str, List[str]]] = None
+        self._answers: Dict[str, Optional[List[str]]] = {}
+        self._listings: Optional[List[Tuple[str, Set[str], Dict[str, str]]]] = None
+        # Number of distributions whose metadata was read, for benchmarks
+        self.metadata_reads = 0
+
+    def _get_listings(self) -> List[Tuple[str, Set[str], Dict[str, str]]]:
+        # (directory, entry names, normalized dist name -> metadata dir name)
+        if self._listings is None:
+            self._listings = []
+            for entry in self.path:
+                directory = entry or "."
+                try:
+                    names = set(os.listdir(directory))
+                except OSError:
+                    continue
+                dist_dirs: Dict[str, str] = {}
+                for name in names:
+                    if name.endswith((".dist-info", ".egg-info")):
+                        # name-version.dist-info, with "-" escaped to "_" in name
+                        key = normalize_name(name.rsplit(".", 1)[0].split("-")[0])
+                        dist_dirs.setdefault(key, name)
+                self._listings.append((directory, names, dist_dirs))
+        return self._listings
+
+    def _probe_distribution(self, module: str) -> Optional[List[str]]:
+        key = normalize_name(module)
+        for directory, _, dist_dirs in self._get_listings():
+            dist_dir = dist_dirs.get(key)
+            if dist_dir is None:
+                continue
+            import importlib.metadata
+
+            dist = importlib.metadata.PathDistribution(Path(directory) / dist_dir)
+            self.metadata_reads += 1
+            stats.count("distributions_read")
+            # "google.cloud.storage" is probed as google-cloud-storage
+            top = module.split(".")[0]
+            if top not in _dist_modules(dist):
+                continue
+            # Being named after a dotted path is not enough, it must ship it
+            if top != module and not _ships_module(dist, module):
+                continue
+            # A namespace package is shared, whoever happens to be named after it
+            if top == module and _is_namespace_dir(dist, top):
+                continue
+            metadata = dist.metadata
+            name = metadata.get('Name')
+            if not name:
+                continue
+            self.versions.setdefault(normalize_name(name), metadata['Version'])
+            return [name]
+        return None
+
+    def _locate_outside_site_packages(self, module: str) -> bool:
+        """
+        True if the module is found first in a directory holding no
+        distribution metadata (stdlib, the script's own directory...).
+        """
+        if module in sys.builtin_module_names:
+            return True
+        candidates = [module] + [module + suffix for suffix in importlib.machinery.all_suffixes()]
+        for _, names, dist_dirs in self._get_listings():
+            if any(candidate in names for candidate in candidates):
+                return not dist_dirs
+        return False
+
+    def _full_lookup(self, module: str) -> Optional[List[str]]:
+        if self._full_mapping is None:
+            self._full_mapping, full_versions = self._full_index()
+            for key, version in full_versions.items():
+                self.versions.setdefault(key, version)
+        return self._full_mapping.get(module)
+
+    def _get_dotted(self, module: str) -> Optional[List[str]]:
+        if module.endswith("."):
+            # Namespace markers only exist in the full index
+            return self._full_mapping.get(module) if self._full_mapping is not None else None
+        # Distributions named after a dotted prefix, longest first:
+        # "google.cloud.storage.blob" -> google-cloud-storage
+        parts = module.split(".")
+        for depth in range(len(parts), 1, -1):
+            prefix = ".".join(parts[:depth])
+            answer = self._answers.get(prefix) if prefix in self._answers else self._probe_distribution(prefix)
+            if answer is not None:
+                self._answers[prefix] = answer
+                # Like the full index, only the prefix itself is known:
+                # lookup_module() finds it when walking up from longer names
+                if depth < len(parts):
+                    answer = None
+                self._answers[module] = answer
+                return answer
+        # Resolving the top-level module builds the full index if needed,
+        # which then knows the dotted prefixes
+        self.get(parts[0])
+        answer = None
+        if self._full_mapping is not None:
+            answer = self._full_mapping.get(module)
+            self._answers[module] = answer
+        return answer
+
+    def get(self, module: str, default: Optional[List[str]] = None) -> Optional[List[str]]:
+        if module in self._answers:
+            answer = self._answers[module]
+        elif "." in module:
+            answer = self._get_dotted(module)
+        else:
+            answer = self._probe_distribution(module)
+            if answer is None and not self._locate_outside_site_packages(module):
+                answer = self._full_lookup(module)
+            self._answers[module] = answer
+        return default if answer is None else answer
+
+    @property
+    def used_full_index(self) -> bool:
+        return self._full_mapping is not None
+
+def _match_module(mapping, module: str) -> Tuple[str, Optional[List[str]]]:
+    # (longest prefix found and its distributions), or (last prefix tried, None)
+    prefix = module
+    while True:
+        dists = mapping.get(prefix)
+        if dists:
+            return prefix, dists
+        parent, _, _ = prefix.rpartition(".")
+        if not parent or mapping.get(_namespace_key(parent)):
+            return prefix, None
+        prefix = parent
+
+def lookup_module(mapping, module: str) -> Optional[List[str]]:
+    """
+    Returns the distributions providing `module` (a dotted path) from the
+    longest prefix the mapping knows, e.g. "google.cloud.storage.blob" ->
+    "google.cloud.storage" -> ["google-cloud-storage"]. Takes at most one
+    lookup per level, and never falls back past a namespace package.
+    """
+    return _match_module(mapping, module)[1]
+
+def resolve_packages(module_names: Set[str], pin_versions: bool = True, mapping: Optional[Dict[str, List[str]]] = None, versions: Optional[Dict[str, str]] = None, known: Optional["KnownModules"] = None, unresolved: Optional[Set[str]] = None, imported: Optional[Set[str]] = None) -> Dict[str, Optional[str]]:
     """
     Resolves module names to PyPI package names and optional versions.
+    Names can be dotted paths (see scan_imports(dotted=True)), matched on the
+    longest known prefix.
+    
+    mapping: Pre-built result of build_environment_index() or
+    get_packages_distributions(), or a LazyIndex. By default the index of
+    default_resolver() is used, built once and kept up to date across calls.
+    versions: Version table from build_environment_index(), keyed by normalized
+    distribution name. When given, versions are looked up there instead of
+    querying importlib.metadata.
+    known: Fallback for modules the mapping does not know (i.e. not installed),
+    such as depscripter.known.KnownModules(). Their distributions are added
+    unpinned unless the version table has them.
+    unresolved: When given, the modules no distribution was found for (local
+    modules, packages that are not installed...) are added to this set, as
+    their top-level name ("helpers" for "helpers.util"), or below a namespace
+    package the first name under it. Standard library and private modules are
+    not reported.
+    imported: When given, the module each name was matched as is added to
+    this set: the longest prefix a distribution provides ("requests" for
+    "requests.adapters.HTTPAdapter"), as reported in unresolved, or the
+    top-level name of standard library and private modules. Unlike the
+    names, which may end with a class or function imported with `from`,
+    these are all modules.
     
     Returns a dict: {package_name: version_string_or_None}
     """
-    mapping = get_packages_distributions()
+    if mapping is None:
+        return default_resolver().resolve(module_names, pin_versions=pin_versions, known=known, unresolved=unresolved, imported=imported)
     resolved = {}
     
-    for module in module_names:
+    # Sorted so that, whatever the set order, a distribution is always
+    # reached through the same module
+    for module in sorted(module_names):
+        top = module.split('.')[0]
+
         # Skip private modules or special keys
-        if module.startswith('_'):
+        if top.startswith('_'):
+            if imported is not None:
+                imported.add(top)
+            continue
+
+        # Never look up the standard library, even if an installed backport
+        # (e.g. "typing", "enum34") claims the same name
+        if is_stdlib_module(module):
+            if imported is not None:
+                imported.add(top)
             continue
             
-        dists = mapping.get(module)
+        prefix, dists = _match_module(mapping, module)
+        if not dists and known is not None:
+            known_prefix, dists = _match_module(known, module)
+            if dists:
+                prefix = known_prefix
+        if imported is not None:
+            imported.add(prefix)
         if not dists:
             # Perhaps it's a standard library module or local file.
             # We skip it.
+            if unresolved is not None:
+                unresolved.add(prefix)
             continue
         
         # If multiple distributions provide the same module, pick the first one?
@@ -67,7 +531,11 @@ def resolve_packages(module_names: Set[str], pin_versions: bool = True) -> Dict[
             continue
             
         version = None
-        if pin_versions:
+        if pin_versions and versions is not None:
+            version = versions.get(normalize_name(dist_name))
+        elif pin_versions:
+            import importlib.metadata
+
             try:
                 version = importlib.metadata.version(dist_name)
             except importlib.metadata.PackageNotFoundError:
@@ -76,3 +544,180 @@ def resolve_packages(module_names: Set[str], pin_versions: bool = True) -> Dict[
         resolved[dist_name] = version
         
     return resolved
+
+def _deep_size(obj, seen: Optional[Set[int]] = None) -> int:
+    # Approximate memory held by nested dicts, lists, tuples and strings
+    if seen is None:
+        seen = set()
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(_deep_size(key, seen) + _deep_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(_deep_size(item, seen) for item in obj)
+    return size
+
+class Resolver:
+    """
+    Resolution session holding one environment index across calls, for
+    long-running applications.
+
+    The index is built on first use and then shared: resolve() can be called
+    from many threads at once and takes no lock once the index exists. Only
+    one thread rebuilds a stale index; the others keep resolving against the
+    old one until the new one replaces it as a whole.
+
+    path: Directories to index instead of sys.path, see build_environment_index().
+    known: Fallback for modules that are not installed, see resolve_packages().
+    use_cache: Load and save the index in the on-disk cache, see
+    get_environment_index().
+    check_interval: Seconds between automatic staleness checks made by
+    resolve(); 0 checks on every call, None only when refresh() is called.
+    A check stats the searched directories and, if they changed, compares
+    the environment_fingerprint(): installing, upgrading or removing a
+    distribution triggers a rebuild.
+    """
+
+    def __init__(self, path: Optional[List[str]] = None, known: Optional["KnownModules"] = None, use_cache: bool = False, check_interval: Optional[float] = None, workers: Optional[int] = None):
+        import threading
+
+        self.path = path
+        self.known = known
+        self.use_cache = use_cache
+        self.check_interval = check_interval
+        self.workers = workers
+        self._lock = threading.RLock()
+        # (mapping, versions), replaced as a whole so readers need no lock
+        self._index: Optional[Tuple[Dict[str, List[str]], Dict[str, str]]] = None
+        self._fingerprint: Optional[str] = None
+        self._stamp: Optional[List[Tuple[str, int]]] = None
+        self._checked_at = 0.0
+        self.builds = 0
+        # Held only for the counter, never while building
+        self._count_lock = threading.Lock()
+        self._resolutions = 0
+        self.build_seconds = 0.0
+        self.built_at: Optional[float] = None
+
+    def _path_entries(self) -> List[str]:
+        return sys.path if self.path is None else self.path
+
+    def _build(self) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+        from depscripter.cache import environment_fingerprint, get_environment_index, path_stamp
+
+        start = time.perf_counter()
+        # Taken before building, so a change made meanwhile is seen next time
+        stamp = path_stamp(self._path_entries())
+        fingerprint = environment_fingerprint(self.path)
+        if self.use_cache:
+            index = get_environment_index(path=self.path)
+        else:
+            index = build_environment_index(self.path, self.workers)
+        self._stamp, self._fingerprint = stamp, fingerprint
+        self._index = index
+        self.builds += 1
+        self.build_seconds = time.perf_counter() - start
+        self.built_at = time.time()
+        return index
+
+    def index(self) -> Tuple[Dict[str, List[str]], Dict[str, str]]:
+        """
+        Returns (mapping, versions), building them on first use.
+        """
+        index = self._index
+        if index is not None:
+            return index
+        with self._lock:
+            if self._index is None:
+                return self._build()
+            return self._index
+
+    def is_stale(self) -> bool:
+        """
+        True if the environment changed since the index was built.
+        """
+        from depscripter.cache import environment_fingerprint, path_stamp
+
+        if self._index is None:
+            return False
+        stamp = path_stamp(self._path_entries())
+        if stamp == self._stamp:
+            return False
+        if environment_fingerprint(self.path) == self._fingerprint:
+            # Something unrelated changed, no need to look again
+            self._stamp = stamp
+            return False
+        return True
+
+    def refresh(self, force: bool = False, blocking: bool = True) -> bool:
+        """
+        Rebuilds the index if it is stale (or unconditionally with force).
+        Returns True if it was rebuilt.
+
+        blocking: Wait for a rebuild running in another thread (and then
+        check again); otherwise return False right away, as resolve() does.
+        """
+        self._checked_at = time.monotonic()
+        if self._index is None or not (force or self.is_stale()):
+            return False
+        if not self._lock.acquire(blocking):
+            return False
+        try:
+            # Another thread may have rebuilt it while we waited
+            if not (force or self.is_stale()):
+                return False
+            self._build()
+            return True
+        finally:
+            self._lock.release()
+
+    def resolve(self, module_names: Set[str], pin_versions: bool = True, known: Optional["KnownModules"] = None, unresolved: Optional[Set[str]] = None, imported: Optional[Set[str]] = None) -> Dict[str, Optional[str]]:
+        """
+        Resolves module names like resolve_packages(), against this session's
+        index. known: Overrides the session's fallback for this call.
+        """
+        if self.check_interval is not None and time.monotonic() - self._checked_at >= self.check_interval:
+            self.refresh(blocking=False)
+        mapping, versions = self.index()
+        with self._count_lock:
+            self._resolutions += 1
+        return resolve_packages(module_names, pin_versions=pin_versions, mapping=mapping, versions=versions, known=known if known is not None else self.known, unresolved=unresolved, imported=imported)
+
+    @property
+    def resolutions(self) -> int:
+        with self._count_lock:
+            return self._resolutions
+
+    def stats(self) -> Dict[str, object]:
+        """
+        Returns the size of the index (modules, distributions, approximate
+        memory in bytes) and counters of builds and resolutions.
+        """
+        index = self._index
+        mapping, versions = index if index is not None else ({}, {})
+        return {
+            "modules": len(mapping),
+            "distributions": len(versions),
+            "memory_bytes": _deep_size(mapping) + _deep_size(versions),
+            "builds": self.builds,
+            "resolutions": self.resolutions,
+            "build_seconds": self.build_seconds,
+            "built_at": self.built_at,
+        }
+
+# Shared by resolve_packages() calls that pass no mapping
+_default_resolver: Optional[Resolver] = None
+
+def default_resolver() -> Resolver:
+    """
+    Returns the Resolver used by resolve_packages() when no mapping is given.
+    It checks for environment changes on every call, which is far cheaper
+    than indexing the environment again.
+    """
+    global _default_resolver
+    if _default_resolver is None:
+        # Two threads may race here; either instance is as good
+        _default_resolver = Resolver(check_interval=0)
+    return _default_resolver
@@ -1,35 +1,260 @@
 import ast
-from typing import Set
+import io
+import token
+from typing import TYPE_CHECKING, Dict, Iterator, List, Set, Tuple, Type
 
-def scan_imports(source_code: str) -> Set[str]:
+if TYPE_CHECKING:
+    import tokenize
+
+ENGINES = ("ast", "tokenize")
+
+# Fields that hold nested statements (or handlers/match cases whose .body
+# holds statements). Imports are statements, so nothing else can contain one.
+_BODY_FIELDS = ("body", "orelse", "finalbody", "handlers", "cases")
+
+_body_fields_by_type: Dict[Type[ast.AST], Tuple[str, ...]] = {}
+
+def _body_fields(node_type: Type[ast.AST]) -> Tuple[str, ...]:
+    fields = _body_fields_by_type.get(node_type)
+    if fields is None:
+        fields = tuple(f for f in _BODY_FIELDS if f in node_type._fields)
+        _body_fields_by_type[node_type] = fields
+    return fields
+
+def _iter_import_nodes(statements: List[ast.stmt]) -> Iterator[ast.stmt]:
+    """
+    Yields every Import/ImportFrom node reachable through statement bodies
+    (functions, classes, if/try/with/for/while/match blocks), without visiting
+    expressions, names or constants like ast.walk() would.
+    """
+    stack = list(statements)
+    while stack:
+        node = stack.pop()
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            yield node
+            continue
+        for field in _body_fields(type(node)):
+            stack.extend(getattr(node, field))
+
+class _Ambiguous(Exception):
+    """
+    Raised by the tokenize engine when it meets something it cannot classify
+    with certainty. The caller falls back to the AST engine.
+    """
+
+# Token types that do not affect statement boundaries
+_SKIPPED_TOKENS = (token.NL, token.COMMENT)
+_STATEMENT_ENDS = (token.NEWLINE, token.ENDMARKER)
+
+def _next_token(tokens: Iterator["tokenize.TokenInfo"]) -> "tokenize.TokenInfo":
+    for tok in tokens:
+        if tok.type not in _SKIPPED_TOKENS:
+            return tok
+    raise _Ambiguous("unexpected end of input")
+
+def _is_statement_end(tok: "tokenize.TokenInfo") -> bool:
+    return tok.type in _STATEMENT_ENDS or (tok.type == token.OP and tok.string == ";")
+
+def _read_dotted_name(first: "tokenize.TokenInfo", tokens: Iterator["tokenize.TokenInfo"]) -> Tuple[str, "tokenize.TokenInfo"]:
+    """
+    Reads NAME ('.' NAME)* starting at `first`. Returns the dotted name and the
+    token that follows it.
+    """
+    if first.type != token.NAME:
+        raise _Ambiguous(f"expected a module name, got {first.string!r}")
+    parts = [first.string]
+    tok = _next_token(tokens)
+    while tok.type == token.OP and tok.string == ".":
+        tok = _next_token(tokens)
+        if tok.type != token.NAME:
+            raise _Ambiguous(f"expected a module name, got {tok.string!r}")
+        parts.append(tok.string)
+        tok = _next_token(tokens)
+    return ".".join(parts), tok
+
+def _read_import(tokens: Iterator["tokenize.TokenInfo"], modules: Set[str], dotted: bool = False) -> None:
+    # import a.b [as c] (, d [as e])*
+    while True:
+        name, tok = _read_dotted_name(_next_token(tokens), tokens)
+        modules.add(name if dotted else name.split('.')[0])
+        if tok.type == token.NAME and tok.string == "as":
+            alias = _next_token(tokens)
+            if alias.type != token.NAME:
+                raise _Ambiguous(f"expected an alias, got {alias.string!r}")
+            tok = _next_token(tokens)
+        if tok.type == token.OP and tok.string == ",":
+            continue
+        if _is_statement_end(tok):
+            return
+        raise _Ambiguous(f"unexpected {tok.string!r} in import statement")
+
+def _read_imported_names(tokens: Iterator["tokenize.TokenInfo"]) -> List[str]:
+    # * | name [as alias] (, name [as alias])* [,] | '(' ... ')'
+    tok = _next_token(tokens)
+    if tok.type == token.OP and tok.string == "*":
+        if not _is_statement_end(_next_token(tokens)):
+            raise _Ambiguous("unexpected token after 'import *'")
+        return ["*"]
+    parenthesized = tok.type == token.OP and tok.string == "("
+    if parenthesized:
+        tok = _next_token(tokens)
+
+    names = []
+    while True:
+        if parenthesized and tok.type == token.OP and tok.string == ")":
+            tok = _next_token(tokens)
+            break
+        if tok.type != token.NAME:
+            raise _Ambiguous(f"expected an imported name, got {tok.string!r}")
+        names.append(tok.string)
+        tok = _next_token(tokens)
+        if tok.type == token.NAME and tok.string == "as":
+            if _next_token(tokens).type != token.NAME:
+                raise _Ambiguous("expected an alias")
+            tok = _next_token(tokens)
+        if tok.type == token.OP and tok.string == ",":
+            tok = _next_token(tokens)
+            if not parenthesized and _is_statement_end(tok):
+                raise _Ambiguous("trailing comma outside parentheses")
+            continue
+        if parenthesized and not (tok.type == token.OP and tok.string == ")"):
+            raise _Ambiguous(f"unexpected {tok.string!r} in import statement")
+        if not parenthesized:
+            break
+
+    if not _is_statement_end(tok):
+        raise _Ambiguous(f"unexpected {tok.string!r} after import statement")
+    return names
+
+def _read_from_import(tokens: Iterator["tokenize.TokenInfo"], modules: Set[str], dotted: bool = False) -> None:
+    # from [.]* [a.b] import ...
+    level = 0
+    tok = _next_token(tokens)
+    while tok.type == token.OP and tok.string in (".", "..."):
+        level += len(tok.string)
+        tok = _next_token(tokens)
+
+    module = None
+    if not (tok.type == token.NAME and tok.string == "import"):
+        module, tok = _read_dotted_name(tok, tokens)
+    if not (tok.type == token.NAME and tok.string == "import"):
+        raise _Ambiguous(f"expected 'import', got {tok.string!r}")
+    if module is None and level == 0:
+        raise _Ambiguous("'from import' without a module")
+
+    if dotted:
+        names = _read_imported_names(tokens)
+        if level == 0:
+            modules.update(_from_import_paths(module, names))
+        return
+
+    if level == 0:
+        modules.add(module.split('.')[0])
+
+    # Skip the imported names; inside parentheses the tokenizer emits NL,
+    # not NEWLINE, so the statement ends at the first NEWLINE or ';'.
+    tok = _next_token(tokens)
+    while not _is_statement_end(tok):
+        tok = _next_token(tokens)
+
+def _from_import_paths(module: str, names: List[str]) -> List[str]:
+    # from a.b import c -> a.b.c: c may be a submodule, and resolution falls
+    # back to the longest known prefix anyway
+    return [module if name == "*" else f"{module}.{name}" for name in names]
+
+def _scan_imports_tokenize(source_code: str, dotted: bool = False) -> Set[str]:
+    """
+    Extracts imports from the token stream without building an AST.
+
+    Only `import` and `from` at the start of a statement are inspected: after a
+    NEWLINE, INDENT, DEDENT, ';' or the ':' of a one-line compound statement.
+    `import` is a hard keyword, so seeing it anywhere else means the engine has
+    misread the code and raises _Ambiguous. Note that, unlike the AST engine,
+    this does not validate the rest of the file.
+    """
+    # Imported here, it is only needed by this engine
+    import tokenize
+
+    modules: Set[str] = set()
+    tokens = tokenize.generate_tokens(io.StringIO(source_code).readline)
+    at_statement_start = True
+
+    try:
+        for tok in tokens:
+            tok_type = tok.type
+            if tok_type == token.NAME:
+                if tok.string == "import":
+                    if not at_statement_start:
+                        raise _Ambiguous("'import' in the middle of a statement")
+                    _read_import(tokens, modules, dotted)
+                    at_statement_start = True
+                elif tok.string == "from" and at_statement_start:
+                    _read_from_import(tokens, modules, dotted)
+                    at_statement_start = True
+                else:
+                    at_statement_start = False
+            elif tok_type == token.OP:
+                at_statement_start = tok.string in (";", ":")
+            elif tok_type in (token.NEWLINE, token.INDENT, token.DEDENT):
+                at_statement_start = True
+            elif tok_type == token.ERRORTOKEN:
+                raise _Ambiguous(f"error token {tok.string!r}")
+            elif tok_type not in _SKIPPED_TOKENS:
+                at_statement_start = False
+    except (tokenize.TokenError, SyntaxError) as e:
+        raise _Ambiguous(str(e))
+
+    return modules
+
+def scan_imports(source_code: str, engine: str = "ast", dotted: bool = False) -> Set[str]:
     """
     Scans the source code for import statements and returns a set of top-level
-    module names.
-    
+    module names, or of full dotted paths with dotted=True.
+
     Handles:
     - import x
     - import x.y
     - from x import y
     - from x.y import z
-    
+
     Ignores relative imports (e.g., from . import y).
+
+    engine: "ast" parses the whole file (and raises SyntaxError on invalid code).
+    "tokenize" only looks at the token stream, which is faster for long files
+    with few imports; it falls back to "ast" whenever it is unsure.
+    dotted: Keep the full path of each import, e.g. "google.cloud.storage" for
+    both `import google.cloud.storage` and `from google.cloud import storage`,
+    so namespace packages can be told apart. Names imported with `from` are
+    appended since they may be submodules.
     """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown scanner engine {engine!r}, expected one of {', '.join(ENGINES)}")
+
+    if engine == "tokenize":
+        try:
+            return _scan_imports_tokenize(source_code, dotted)
+        except _Ambiguous:
+            pass
+
     tree = ast.parse(source_code)
     modules = set()
 
-    for node in ast.walk(tree):
+    for node in _iter_import_nodes(tree.body):
         if isinstance(node, ast.Import):
             for alias in node.names:
                 # import x.y -> x
-                name = alias.name.split('.')[0]
+                name = alias.name if dotted else alias.name.split('.')[0]
                 modules.add(name)
         elif isinstance(node, ast.ImportFrom):
             if node.level and node.level > 0:
                 # Relative import, skip
                 continue
             if node.module:
+                if dotted:
+                    modules.update(_from_import_paths(node.module, [alias.name for alias in node.names]))
+                    continue
                 # from x.y import z -> x
                 name = node.module.split('.')[0]
                 modules.add(name)
-    
+
     return modules
@@ -0,0 +1,162 @@
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+# Phases of a run, in the order they are reported
+PHASES = ("read", "parse", "index", "resolve", "graph", "generate", "write")
+
+
+class RunStats:
+    """
+    Wall time per phase and event counts (files, modules, distributions
+    read, cache hits and misses...) of a run.
+
+    Times of the same phase add up, e.g. "parse" is the sum over every file.
+    With several worker processes, "read" and "parse" are summed over the
+    workers and can exceed the run's wall time.
+    """
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+        self.counts: Dict[str, int] = {}
+        self._started = time.perf_counter()
+
+    def add_time(self, phase: str, seconds: float) -> None:
+        self.timings[phase] = self.timings.get(phase, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, phase: str) -> Iterator[None]:
+        """
+        Times the enclosed block as part of `phase`.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(phase, time.perf_counter() - start)
+
+    def count(self, name: str, n: int = 1) -> None:
+        self.counts[name] = self.counts.get(name, 0) + n
+
+    @property
+    def elapsed(self) -> float:
+        return time.perf_counter() - self._started
+
+    def as_dict(self) -> Dict[str, object]:
+        """
+        Returns the statistics as plain data (JSON serializable).
+        """
+        ordered = [phase for phase in PHASES if phase in self.timings]
+        ordered += sorted(phase for phase in self.timings if phase not in PHASES)
+        return {
+            "total_seconds": self.elapsed,
+            "timings": {phase: self.timings[phase] for phase in ordered},
+            "counts": dict(sorted(self.counts.items())),
+            "peak_memory_bytes": peak_memory(),
+        }
+
+
+def peak_memory() -> Optional[int]:
+    """
+    Returns the peak resident set size of this process in bytes, or None
+    where it is not available (Windows).
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+# Statistics collected by the library while a collect_stats() block is active
+_current: Optional[RunStats] = None
+
+
+@contextmanager
+def collect_stats(stats: Optional[RunStats] = None) -> Iterator[RunStats]:
+    """
+    Records what the library does inside the block (distributions read, cache
+    hits and misses...) into `stats`, a new RunStats by default:
+
+        with collect_stats() as stats:
+            resolve_packages({"requests"})
+        print(stats.as_dict())
+    """
+    global _current
+    if stats is None:
+        stats = RunStats()
+    previous = _current
+    _current = stats
+    try:
+        yield stats
+    finally:
+        _current = previous
+
+
+def count(name: str, n: int = 1) -> None:
+    """
+    Adds to a counter of the active collect_stats() block, if any.
+    """
+    if _current is not None:
+        _current.count(name, n)
+
+
+def format_table(stats: RunStats) -> str:
+    data = stats.as_dict()
+    lines = ["phase          seconds"]
+    for phase, seconds in data["timings"].items():
+        lines.append(f"{phase:<12} {seconds:>9.4f}")
+    lines.append(f"{'total':<12} {data['total_seconds']:>9.4f}")
+    if data["counts"]:
+        lines.append("")
+        width = max(len(name) for name in data["counts"])
+        for name, value in data["counts"].items():
+            lines.append(f"{name:<{width}}  {value}")
+    if data["peak_memory_bytes"] is not None:
+        lines.append("")
+        lines.append(f"peak memory: {data['peak_memory_bytes'] / 2**20:.1f} MiB")
+    return "\n".join(lines) + "\n"
+
+
+def format_json(stats: RunStats) -> str:
+    import json
+
+    return json.dumps(stats.as_dict(), indent=2) + "\n"
+
+
+def format_prometheus(stats: RunStats, prefix: str = "depscripter") -> str:
+    """
+    Renders the statistics in the Prometheus text exposition format, e.g. for
+    node_exporter's textfile collector.
+    """
+    data = stats.as_dict()
+    lines = [
+        f"# HELP {prefix}_phase_seconds Wall time spent in each phase of the last run.",
+        f"# TYPE {prefix}_phase_seconds gauge",
+    ]
+    for phase, seconds in data["timings"].items():
+        lines.append(f'{prefix}_phase_seconds{{phase="{phase}"}} {seconds:.6f}')
+    lines += [
+        f"# HELP {prefix}_run_seconds Wall time of the last run.",
+        f"# TYPE {prefix}_run_seconds gauge",
+        f"{prefix}_run_seconds {data['total_seconds']:.6f}",
+        f"# HELP {prefix}_events Events counted during the last run.",
+        f"# TYPE {prefix}_events gauge",
+    ]
+    for name, value in data["counts"].items():
+        lines.append(f'{prefix}_events{{name="{name}"}} {value}')
+    if data["peak_memory_bytes"] is not None:
+        lines += [
+            f"# HELP {prefix}_peak_memory_bytes Peak resident set size of the last run.",
+            f"# TYPE {prefix}_peak_memory_bytes gauge",
+            f"{prefix}_peak_memory_bytes {data['peak_memory_bytes']}",
+        ]
+    lines += [
+        f"# HELP {prefix}_last_run_timestamp_seconds Time the last run finished.",
+        f"# TYPE {prefix}_last_run_timestamp_seconds gauge",
+        f"{prefix}_last_run_timestamp_seconds {time.time():.3f}",
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,82 @@
+import sys
+from typing import FrozenSet
+
+# Top-level standard library modules of CPython 3.9 on any platform. Taken from
+# sys.stdlib_module_names of 3.10, plus the modules 3.10 removed.
+_STDLIB_3_9 = frozenset({
+    "__future__", "_abc", "_aix_support", "_ast", "_asyncio", "_bisect", "_blake2",
+    "_bootlocale", "_bootsubprocess", "_bz2", "_codecs", "_codecs_cn", "_codecs_hk",
+    "_codecs_iso2022", "_codecs_jp", "_codecs_kr", "_codecs_tw", "_collections",
+    "_collections_abc", "_compat_pickle", "_compression", "_contextvars", "_crypt",
+    "_csv", "_ctypes", "_curses", "_curses_panel", "_datetime", "_dbm", "_decimal",
+    "_elementtree", "_frozen_importlib", "_frozen_importlib_external", "_functools",
+    "_gdbm", "_hashlib", "_heapq", "_imp", "_io", "_json", "_locale", "_lsprof",
+    "_lzma", "_markupbase", "_md5", "_msi", "_multibytecodec", "_multiprocessing",
+    "_opcode", "_operator", "_osx_support", "_overlapped", "_peg_parser", "_pickle",
+    "_posixshmem", "_posixsubprocess", "_py_abc", "_pydecimal", "_pyio", "_queue",
+    "_random", "_scproxy", "_sha1", "_sha256", "_sha3", "_sha512", "_signal",
+    "_sitebuiltins", "_socket", "_sqlite3", "_sre", "_ssl", "_stat", "_statistics",
+    "_string", "_strptime", "_struct", "_symtable", "_thread", "_threading_local",
+    "_tkinter", "_tracemalloc", "_uuid", "_warnings", "_weakref", "_weakrefset",
+    "_winapi", "_zoneinfo", "abc", "aifc", "antigravity", "argparse", "array",
+    "ast", "asynchat", "asyncio", "asyncore", "atexit", "audioop", "base64", "bdb",
+    "binascii", "binhex", "bisect", "builtins", "bz2", "cProfile", "calendar",
+    "cgi", "cgitb", "chunk", "cmath", "cmd", "code", "codecs", "codeop",
+    "collections", "colorsys", "compileall", "concurrent", "configparser",
+    "contextlib", "contextvars", "copy", "copyreg", "crypt", "csv", "ctypes",
+    "curses", "dataclasses", "datetime", "dbm", "decimal", "difflib", "dis",
+    "distutils", "doctest", "email", "encodings", "ensurepip", "enum", "errno",
+    "faulthandler", "fcntl", "filecmp", "fileinput", "fnmatch", "formatter",
+    "fractions", "ftplib", "functools", "gc", "genericpath", "getopt", "getpass",
+    "gettext", "glob", "graphlib", "grp", "gzip", "hashlib", "heapq", "hmac",
+    "html", "http", "idlelib", "imaplib", "imghdr", "imp", "importlib", "inspect",
+    "io", "ipaddress", "itertools", "json", "keyword", "lib2to3", "linecache",
+    "locale", "logging", "lzma", "mailbox", "mailcap", "marshal", "math",
+    "mimetypes", "mmap", "modulefinder", "msilib", "msvcrt", "multiprocessing",
+    "netrc", "nis", "nntplib", "nt", "ntpath", "nturl2path", "numbers", "opcode",
+    "operator", "optparse", "os", "ossaudiodev", "parser", "pathlib", "pdb",
+    "pickle", "pickletools", "pipes", "pkgutil", "platform", "plistlib", "poplib",
+    "posix", "posixpath", "pprint", "profile", "pstats", "pty", "pwd", "py_compile",
+    "pyclbr", "pydoc", "pydoc_data", "pyexpat", "queue", "quopri", "random", "re",
+    "readline", "reprlib", "resource", "rlcompleter", "runpy", "sched", "secrets",
+    "select", "selectors", "shelve", "shlex", "shutil", "signal", "site", "smtpd",
+    "smtplib", "sndhdr", "socket", "socketserver", "spwd", "sqlite3", "sre_compile",
+    "sre_constants", "sre_parse", "ssl", "stat", "statistics", "string",
+    "stringprep", "struct", "subprocess", "sunau", "symbol", "symtable", "sys",
+    "sysconfig", "syslog", "tabnanny", "tarfile", "telnetlib", "tempfile",
+    "termios", "textwrap", "this", "threading", "time", "timeit", "tkinter",
+    "token", "tokenize", "trace", "traceback", "tracemalloc", "tty", "turtle",
+    "turtledemo", "types", "typing", "unicodedata", "unittest", "urllib", "uu",
+    "uuid", "venv", "warnings", "wave", "weakref", "webbrowser", "winreg",
+    "winsound", "wsgiref", "xdrlib", "xml", "xmlrpc", "zipapp", "zipfile",
+    "zipimport", "zlib", "zoneinfo",
+})
+
+# 3.9 added graphlib and zoneinfo (which have PyPI backports for 3.8) and
+# removed dummy_threading.
+_STDLIB_3_8 = (_STDLIB_3_9 - {
+    "_aix_support", "_bootsubprocess", "_peg_parser", "_zoneinfo", "graphlib", "zoneinfo",
+}) | {"_dummy_thread", "dummy_threading"}
+
+
+def get_stdlib_module_names() -> FrozenSet[str]:
+    """
+    Returns the names of the top-level standard library modules of the running
+    Python: sys.stdlib_module_names on 3.10+, a bundled list on 3.8/3.9.
+    """
+    names = getattr(sys, "stdlib_module_names", None)
+    if names is not None:
+        return frozenset(names)
+    if sys.version_info >= (3, 9):
+        return _STDLIB_3_9
+    return _STDLIB_3_8
+
+
+STDLIB_MODULE_NAMES = get_stdlib_module_names()
+
+
+def is_stdlib_module(module_name: str) -> bool:
+    """
+    True if the (possibly dotted) module name belongs to the standard library.
+    """
+    return module_name.split(".")[0] in STDLIB_MODULE_NAMES
@@ -0,0 +1,52 @@
+import os
+from pathlib import Path
+from typing import Optional
+
+
+def write_text_atomic(path: Path, text: str, encoding: str = "utf-8") -> None:
+    """
+    Writes text to path through a temporary file in the same directory that is
+    renamed over the target, so a crash never leaves a truncated file behind.
+
+    The permission bits of an existing target are preserved, and a symlinked
+    target is replaced at its destination, not the link itself.
+    """
+    path = Path(os.path.realpath(path))
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    try:
+        mode = os.stat(path).st_mode
+    except FileNotFoundError:
+        mode = None
+
+    try:
+        with open(tmp_path, "w", encoding=encoding) as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp_path, mode & 0o7777)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def write_if_changed(path: Path, text: str, current: Optional[str] = None, encoding: str = "utf-8") -> bool:
+    """
+    Atomically writes text to path unless the file already holds exactly that
+    text, which would only churn its mtime. Returns True if the file was written.
+
+    current: The file's current contents, if already known (saves a read).
+    """
+    if current is None:
+        try:
+            current = path.read_text(encoding=encoding)
+        except (OSError, UnicodeDecodeError):
+            current = None
+    if current == text:
+        return False
+    write_text_atomic(path, text, encoding=encoding)
+    return True
@@ -0,0 +1,37 @@
+import pytest
+
+@pytest.fixture(autouse=True)
+def isolated_cache_dir(tmp_path_factory, monkeypatch):
+    """Keep every test (and the subprocesses it spawns) away from the user's real cache."""
+    cache_dir = tmp_path_factory.mktemp("depscripter-cache")
+    monkeypatch.setenv("DEPSCRIPTER_CACHE_DIR", str(cache_dir))
+    return cache_dir
+
+@pytest.fixture(autouse=True)
+def fresh_default_resolver(monkeypatch):
+    """Do not let the index built by one test leak into the next."""
+    monkeypatch.setattr("depscripter.resolver._default_resolver", None)
+
+def _make_dist(site, name, version, top_level=None, record=None, requires=()):
+    # Installers escape "-" in the name as "_"
+    dist_info = site / f"{name.replace('-', '_')}-{version}.dist-info"
+    dist_info.mkdir(parents=True)
+    metadata = f"Metadata-Version: 2.1\nName: {name}\nVersion: {version}\n"
+    metadata += "".join(f"Requires-Dist: {requirement}\n" for requirement in requires)
+    (dist_info / "METADATA").write_text(metadata, encoding="utf-8")
+    if top_level is not None:
+        (dist_info / "top_level.txt").write_text("\n".join(top_level) + "\n", encoding="utf-8")
+    if record is not None:
+        (dist_info / "RECORD").write_text("".join(f"{entry},,\n" for entry in record), encoding="utf-8")
+        # Python 3.12+ drops RECORD entries that do not exist on disk
+        for entry in record:
+            target = site / entry
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if not target.exists():
+                target.write_text("", encoding="utf-8")
+    return dist_info
+
+@pytest.fixture
+def make_dist():
+    """Factory for fake installed distributions: make_dist(site, name, version, top_level=..., record=..., requires=...)."""
+    return _make_dist
@@ -0,0 +1,127 @@
+from unittest.mock import MagicMock, patch
+from depscripter.cache import ScanCache, content_digest
+from depscripter.batch import scan_file, scan_files
+
+def make_corpus(tmp_path, count):
+    paths = []
+    for i in range(count):
+        f = tmp_path / f"script_{i:02d}.py"
+        f.write_text(f"import mod_{i}\nfrom pkg_{i}.sub import thing", encoding="utf-8")
+        paths.append(f)
+    return paths
+
+def test_scan_file(tmp_path):
+    f = tmp_path / "a.py"
+    f.write_text("import requests", encoding="utf-8")
+    
+    result = scan_file(f)
+    assert result.path == f
+    assert result.source == "import requests"
+    assert result.modules == {"requests"}
+    assert result.error is None
+
+def test_scan_file_missing(tmp_path):
+    result = scan_file(tmp_path / "missing.py")
+    assert result.modules is None
+    assert result.error == "not found"
+
+def test_scan_file_syntax_error(tmp_path):
+    f = tmp_path / "bad.py"
+    f.write_text("def broken(:", encoding="utf-8")
+    
+    result = scan_file(f)
+    assert result.modules is None
+    assert result.error.startswith("error:")
+
+def test_scan_files_serial_order(tmp_path):
+    paths = make_corpus(tmp_path, 5)
+    results = list(scan_files(paths, jobs=1))
+    
+    assert [r.path for r in results] == paths
+    # Full dotted paths are kept for resolution
+    assert results[3].modules == {"mod_3", "pkg_3.sub.thing"}
+
+def without_timings(results):
+    return [result._replace(read_seconds=0.0, parse_seconds=0.0) for result in results]
+
+def test_scan_files_parallel_matches_serial(tmp_path):
+    paths = make_corpus(tmp_path, 20)
+    paths.insert(7, tmp_path / "missing.py")
+    
+    serial = list(scan_files(paths, jobs=1))
+    parallel = list(scan_files(paths, jobs=3))
+    
+    assert without_timings(parallel) == without_timings(serial)
+
+def test_scan_files_tokenize_engine(tmp_path):
+    paths = make_corpus(tmp_path, 4)
+    
+    assert without_timings(scan_files(paths, engine="tokenize")) == without_timings(scan_files(paths, engine="ast"))
+
+def test_scan_files_cache_skips_parsing(tmp_path):
+    paths = make_corpus(tmp_path, 3)
+    cache = ScanCache(tmp_path / "scans.json")
+    
+    cold = list(scan_files(paths, cache=cache))
+    assert (cache.hits, cache.misses) == (0, 3)
+    
+    with patch("depscripter.batch.scan_imports") as mock_scan:
+        warm = list(scan_files(paths, cache=cache))
+        mock_scan.assert_not_called()
+    
+    assert (cache.hits, cache.misses) == (3, 3)
+    assert [r.modules for r in warm] == [r.modules for r in cold]
+    assert all(r.cached for r in warm)
+
+def test_scan_files_cache_detects_changes(tmp_path):
+    paths = make_corpus(tmp_path, 2)
+    cache = ScanCache(tmp_path / "scans.json")
+    list(scan_files(paths, cache=cache))
+    
+    paths[0].write_text("import changed", encoding="utf-8")
+    results = list(scan_files(paths, cache=cache))
+    
+    assert results[0].modules == {"changed"}
+    assert not results[0].cached
+    assert results[1].cached
+
+def test_scan_files_parallel_uses_cache(tmp_path):
+    paths = make_corpus(tmp_path, 8)
+    cache = ScanCache(tmp_path / "scans.json")
+    list(scan_files(paths, cache=cache))
+    
+    results = list(scan_files(paths, jobs=2, cache=cache))
+    
+    assert all(r.cached for r in results)
+    assert cache.hits == 8
+
+def test_scan_file_reports_timings(tmp_path):
+    path = make_corpus(tmp_path, 1)[0]
+
+    result = scan_file(path)
+    assert result.read_seconds >= 0
+    assert result.parse_seconds > 0
+
+    cached = scan_file(path, known={content_digest(result.source): ["os"]})
+    assert cached.cached
+    assert cached.parse_seconds == 0.0
+
+def test_scan_files_parallel_is_bounded(tmp_path):
+    paths = make_corpus(tmp_path, 40)
+    submitted = []
+
+    class RecordingExecutor:
+        def submit(self, func, chunk, engine):
+            submitted.append(len(chunk))
+            future = MagicMock()
+            future.result.return_value = func(chunk, engine)
+            return future
+
+    from depscripter.batch import _iter_chunks
+
+    results = _iter_chunks(RecordingExecutor(), paths, "ast", chunksize=4, window=2)
+    first = next(results)
+    assert first.path == paths[0]
+    assert submitted == [4, 4]
+    assert [r.path for r in results] == paths[1:]
+    assert sum(submitted) == 40
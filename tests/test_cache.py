@@ -0,0 +1,132 @@
+from unittest.mock import patch
+from depscripter.cache import (
+    ScanCache,
+    content_digest,
+    environment_fingerprint,
+    get_cache_dir,
+    get_environment_index,
+    load_cached_index,
+    save_cached_index,
+)
+
+def test_cache_dir_override(tmp_path, monkeypatch):
+    monkeypatch.setenv("DEPSCRIPTER_CACHE_DIR", str(tmp_path))
+    assert get_cache_dir() == tmp_path
+
+def test_fingerprint_stable(tmp_path, make_dist):
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0")
+    assert environment_fingerprint([str(site)]) == environment_fingerprint([str(site)])
+
+def test_fingerprint_changes_on_install(tmp_path, make_dist):
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0")
+    before = environment_fingerprint([str(site)])
+    
+    make_dist(site, "PyYAML", "6.0")
+    
+    assert environment_fingerprint([str(site)]) != before
+
+def test_fingerprint_changes_with_sys_path(tmp_path, make_dist):
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0")
+    assert environment_fingerprint([str(site)]) != environment_fingerprint([str(site), str(tmp_path)])
+
+def test_save_and_load_roundtrip(tmp_path):
+    save_cached_index({"yaml": ["PyYAML"]}, {"PyYAML": "6.0"}, cache_dir=tmp_path, fingerprint="abc")
+    
+    assert load_cached_index(tmp_path, "abc") == ({"yaml": ["PyYAML"]}, {"PyYAML": "6.0"})
+
+def test_load_stale_fingerprint(tmp_path):
+    save_cached_index({"yaml": ["PyYAML"]}, {"PyYAML": "6.0"}, cache_dir=tmp_path, fingerprint="abc")
+    
+    assert load_cached_index(tmp_path, "def") is None
+
+def test_load_corrupt_file(tmp_path):
+    save_cached_index({}, {}, cache_dir=tmp_path, fingerprint="abc")
+    for f in tmp_path.iterdir():
+        f.write_text("{not json", encoding="utf-8")
+    
+    assert load_cached_index(tmp_path, "abc") is None
+
+def test_warm_run_skips_metadata_walk(tmp_path):
+    with patch("depscripter.cache.build_environment_index", return_value=({"yaml": ["PyYAML"]}, {"pyyaml": "6.0"})) as mock_build:
+        
+        cold = get_environment_index(cache_dir=tmp_path)
+        warm = get_environment_index(cache_dir=tmp_path)
+        
+        assert cold == warm == ({"yaml": ["PyYAML"]}, {"pyyaml": "6.0"})
+        assert mock_build.call_count == 1
+
+def test_no_cache_always_walks(tmp_path):
+    with patch("depscripter.cache.build_environment_index", return_value=({}, {})) as mock_build:
+        
+        get_environment_index(use_cache=False, cache_dir=tmp_path)
+        get_environment_index(use_cache=False, cache_dir=tmp_path)
+        
+        assert mock_build.call_count == 2
+        assert list(tmp_path.iterdir()) == []
+
+def test_scan_cache_get_put(tmp_path):
+    cache = ScanCache(tmp_path / "scans.json")
+    assert cache.get("abc") is None
+    
+    cache.put("abc", {"requests", "os"})
+    
+    assert cache.get("abc") == {"requests", "os"}
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert cache.hit_rate == 0.5
+
+def test_scan_cache_persists(tmp_path):
+    cache = ScanCache(tmp_path / "scans.json")
+    cache.put("abc", {"requests"})
+    cache.save()
+    
+    assert ScanCache.load(tmp_path / "scans.json").get("abc") == {"requests"}
+
+def test_scan_cache_evicts_least_recently_used(tmp_path):
+    cache = ScanCache(tmp_path / "scans.json", max_entries=2)
+    cache.put("a", {"a"})
+    cache.put("b", {"b"})
+    cache.get("a")
+    cache.put("c", {"c"})
+    
+    assert list(cache.entries) == ["a", "c"]
+
+def test_scan_cache_read_only(tmp_path):
+    cache = ScanCache(tmp_path / "scans.json")
+    cache.put("a", {"a"})
+    cache.put("b", {"b"})
+    cache.save()
+    cache.read_only = True
+    
+    assert cache.get("a") == {"a"}
+    cache.record("c", {"c"}, cached=False)
+    cache.save()
+    
+    assert list(cache.entries) == ["a", "b"]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert not cache._dirty
+
+def test_scan_cache_ignores_other_format(tmp_path):
+    (tmp_path / "scans.json").write_text('{"format": -1, "entries": {"abc": ["x"]}}', encoding="utf-8")
+    
+    assert ScanCache.load(tmp_path / "scans.json").entries == {}
+
+def test_content_digest():
+    assert content_digest("import os") == content_digest("import os")
+    assert content_digest("import os") != content_digest("import sys")
+
+def test_index_cache_per_path(tmp_path):
+    site = tmp_path / "site-packages"
+    site.mkdir()
+    
+    with patch("depscripter.cache.build_environment_index", side_effect=lambda path=None: ({}, {"path": str(path)})) as mock_build:
+        local = get_environment_index(cache_dir=tmp_path)
+        foreign = get_environment_index(cache_dir=tmp_path, path=[str(site)])
+        foreign_again = get_environment_index(cache_dir=tmp_path, path=[str(site)])
+        
+        assert mock_build.call_count == 2
+    
+    assert local == ({}, {"path": "None"})
+    assert foreign == foreign_again == ({}, {"path": str([str(site)])})
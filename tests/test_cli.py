@@ -1,8 +1,13 @@
+import json
+import os
 import sys
 from unittest.mock import patch, MagicMock
 from pathlib import Path
 import pytest
 from depscripter.cli import main
+from depscripter.cache import get_environment_index
+from depscripter.graph import DependencyGraph
+from depscripter.lockfile import load_lock_file
 
 def test_cli_file_not_found(tmp_path):
     with patch("sys.argv", ["depscripter", str(tmp_path / "missing.py")]):
@@ -14,7 +19,7 @@ def test_cli_successful_run(tmp_path, capsys):
     f.write_text("import requests", encoding="utf-8")
     
     with patch("sys.argv", ["depscripter", str(f), "--no-pin"]):
-        with patch("depscripter.cli.scan_imports", return_value={"requests"}), \
+        with patch("depscripter.batch.scan_imports", return_value={"requests"}), \
              patch("depscripter.cli.resolve_packages", return_value={"requests": None}), \
              patch("depscripter.cli.generate_script_metadata", return_value="# /// metadata"), \
              patch("depscripter.cli.inject_metadata", return_value="# /// metadata\nimport requests"):
@@ -29,7 +34,7 @@ def test_cli_in_place(tmp_path):
     f.write_text("import requests", encoding="utf-8")
     
     with patch("sys.argv", ["depscripter", str(f), "--in-place", "--no-pin"]):
-        with patch("depscripter.cli.scan_imports", return_value={"requests"}), \
+        with patch("depscripter.batch.scan_imports", return_value={"requests"}), \
              patch("depscripter.cli.resolve_packages", return_value={"requests": None}), \
              patch("depscripter.cli.generate_script_metadata", return_value="# /// metadata"), \
              patch("depscripter.cli.inject_metadata", return_value="# /// metadata\nimport requests"):
@@ -44,7 +49,7 @@ def test_cli_output_option(tmp_path):
     out = tmp_path / "output.py"
     
     with patch("sys.argv", ["depscripter", str(f), "-o", str(out), "--no-pin"]):
-        with patch("depscripter.cli.scan_imports", return_value={"requests"}), \
+        with patch("depscripter.batch.scan_imports", return_value={"requests"}), \
              patch("depscripter.cli.resolve_packages", return_value={"requests": None}), \
              patch("depscripter.cli.generate_script_metadata", return_value="# /// metadata"), \
              patch("depscripter.cli.inject_metadata", return_value="# /// metadata\nimport requests"):
@@ -59,7 +64,7 @@ def test_cli_python_version_option(tmp_path):
     f.write_text("import requests", encoding="utf-8")
     
     with patch("sys.argv", ["depscripter", str(f), "--python", ">=3.11"]):
-        with patch("depscripter.cli.scan_imports", return_value={"requests"}), \
+        with patch("depscripter.batch.scan_imports", return_value={"requests"}), \
              patch("depscripter.cli.resolve_packages", return_value={"requests": None}), \
              patch("depscripter.cli.generate_script_metadata", return_value="metadata") as mock_gen, \
              patch("depscripter.cli.inject_metadata", return_value="output"):
@@ -75,7 +80,7 @@ def test_cli_python_version_exact(tmp_path):
     f.write_text("import requests", encoding="utf-8")
     
     with patch("sys.argv", ["depscripter", str(f), "--python", "3.10"]):
-        with patch("depscripter.cli.scan_imports", return_value={"requests"}), \
+        with patch("depscripter.batch.scan_imports", return_value={"requests"}), \
              patch("depscripter.cli.resolve_packages", return_value={"requests": None}), \
              patch("depscripter.cli.generate_script_metadata") as mock_gen, \
              patch("depscripter.cli.inject_metadata"):
@@ -89,7 +94,7 @@ def test_cli_manual_option(tmp_path):
     f.write_text("import requests", encoding="utf-8")
     
     with patch("sys.argv", ["depscripter", str(f), "--manual", "requests>=2.0", "--manual", "pandas"]):
-        with patch("depscripter.cli.scan_imports", return_value={"requests"}), \
+        with patch("depscripter.batch.scan_imports", return_value={"requests"}), \
              patch("depscripter.cli.resolve_packages", return_value={"requests": "2.31.0"}), \
              patch("depscripter.cli.generate_script_metadata") as mock_gen, \
              patch("depscripter.cli.inject_metadata"):
@@ -100,3 +105,306 @@ def test_cli_manual_option(tmp_path):
              overrides = call_kwargs['overrides']
              assert overrides["requests"] == ">=2.0"
              assert overrides["pandas"] == "" # no specifier
+
+def test_cli_batch_builds_index_once(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("import requests", encoding="utf-8")
+    (tmp_path / "b.py").write_text("import yaml", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "--in-place", "--no-pin"]):
+        with patch("depscripter.cli.get_environment_index", return_value=({"requests": ["requests"], "yaml": ["PyYAML"]}, {})) as mock_dist:
+            main()
+            
+            assert mock_dist.call_count == 1
+    
+    assert '"requests",' in (tmp_path / "a.py").read_text(encoding="utf-8")
+    assert '"PyYAML",' in (tmp_path / "b.py").read_text(encoding="utf-8")
+    
+    captured = capsys.readouterr()
+    assert "a.py: updated (requests)" in captured.err
+    assert "b.py: updated (PyYAML)" in captured.err
+    assert "2 file(s) processed, 0 failed" in captured.err
+
+def test_cli_batch_reports_failures(tmp_path, capsys):
+    (tmp_path / "good.py").write_text("import os", encoding="utf-8")
+    (tmp_path / "bad.py").write_text("def broken(:", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "--no-pin"]):
+        with patch("depscripter.cli.get_environment_index", return_value=({}, {})):
+            with pytest.raises(SystemExit) as exc:
+                main()
+    
+    assert exc.value.code == 1
+    captured = capsys.readouterr()
+    assert "# ==> " in captured.out
+    assert "bad.py: error" in captured.err
+    assert "good.py: ok (no dependencies)" in captured.err
+
+def test_cli_batch_rejects_output(tmp_path):
+    (tmp_path / "a.py").write_text("", encoding="utf-8")
+    (tmp_path / "b.py").write_text("", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "-o", str(tmp_path / "out.py")]):
+        with pytest.raises(SystemExit):
+            main()
+
+def test_cli_jobs_output_order(tmp_path, capsys):
+    for name in ["c.py", "a.py", "b.py"]:
+        (tmp_path / name).write_text("import os", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "--jobs", "2", "--no-pin"]):
+        with patch("depscripter.cli.get_environment_index", return_value=({}, {})):
+            main()
+    
+    captured = capsys.readouterr()
+    headers = [line for line in captured.out.splitlines() if line.startswith("# ==> ")]
+    assert headers == [f"# ==> {tmp_path / name} <==" for name in ["a.py", "b.py", "c.py"]]
+
+def test_cli_batch_reports_scan_cache(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("import os", encoding="utf-8")
+    (tmp_path / "b.py").write_text("import sys", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "--no-pin"]):
+        with patch("depscripter.cli.get_environment_index", return_value=({}, {})):
+            main()
+            assert "0 hit(s), 2 miss(es)" in capsys.readouterr().err
+            
+            main()
+            assert "2 hit(s), 0 miss(es), 100% hit rate" in capsys.readouterr().err
+
+def test_cli_lazy_option(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("import requests", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(f), "--lazy", "--no-pin"]):
+        with patch("depscripter.cli.get_environment_index") as mock_index, \
+             patch("depscripter.cli.resolve_packages", return_value={}) as mock_resolve:
+            main()
+            
+            mock_index.assert_not_called()
+            from depscripter.resolver import LazyIndex
+            assert isinstance(mock_resolve.call_args.kwargs["mapping"], LazyIndex)
+
+def test_cli_check_up_to_date(tmp_path, capsys, isolated_cache_dir):
+    f = tmp_path / "script.py"
+    content = "# /// script\n# requires-python = \">=3.9\"\n# dependencies = [\n#     \"requests==2.31.0\",\n# ]\n# ///\nimport requests\n"
+    f.write_text(content, encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(f), "--check"]):
+        with patch("depscripter.cli.get_environment_index", return_value=({"requests": ["requests"]}, {"requests": "2.31.0"})):
+            main()
+    
+    assert "up to date" in capsys.readouterr().err
+    assert f.read_text(encoding="utf-8") == content
+    assert list(isolated_cache_dir.iterdir()) == []
+
+def test_cli_check_drift(tmp_path, capsys):
+    (tmp_path / "current.py").write_text("# /// script\n# requires-python = \">=3.9\"\n# dependencies = [\n# ]\n# ///\nimport os\n", encoding="utf-8")
+    (tmp_path / "stale.py").write_text("# /// script\n# requires-python = \">=3.9\"\n# dependencies = [\n#     \"requests==2.30.0\",\n# ]\n# ///\nimport requests\n", encoding="utf-8")
+    (tmp_path / "missing_block.py").write_text("import requests\n", encoding="utf-8")
+    before = {p: p.read_text(encoding="utf-8") for p in tmp_path.iterdir()}
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "--check"]):
+        with patch("depscripter.cli.get_environment_index", return_value=({"requests": ["requests"]}, {"requests": "2.31.0"})):
+            with pytest.raises(SystemExit) as exc:
+                main()
+    
+    assert exc.value.code == 1
+    err = capsys.readouterr().err
+    assert "current.py: up to date" in err
+    assert "stale.py: outdated: changed requests==2.30.0 -> requests==2.31.0" in err
+    assert "missing_block.py: outdated: no metadata block" in err
+    assert {p: p.read_text(encoding="utf-8") for p in tmp_path.iterdir()} == before
+
+def test_cli_check_excludes_in_place(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("import os", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(f), "--check", "--in-place"]):
+        with pytest.raises(SystemExit) as exc:
+            main()
+    
+    assert exc.value.code == 2
+
+def test_cli_in_place_skips_unchanged(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("import os\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("import sys\n", encoding="utf-8")
+    argv = ["depscripter", str(tmp_path), "--in-place", "--python", "3.9"]
+    
+    with patch("depscripter.cli.get_environment_index", return_value=({}, {})):
+        with patch("sys.argv", argv):
+            main()
+        assert "2 file(s) changed, 0 unchanged" in capsys.readouterr().err
+        
+        (tmp_path / "b.py").write_text("import json\n", encoding="utf-8")
+        os.utime(tmp_path / "a.py", ns=(1_000_000_000, 1_000_000_000))
+        
+        with patch("sys.argv", argv):
+            main()
+        err = capsys.readouterr().err
+    
+    assert "a.py: unchanged" in err
+    assert "b.py: updated" in err
+    assert "1 file(s) changed, 1 unchanged" in err
+    assert os.stat(tmp_path / "a.py").st_mtime_ns == 1_000_000_000
+
+def test_cli_venv_option(tmp_path, capsys, make_dist):
+    site = tmp_path / "venv" / "lib" / "python3.12" / "site-packages"
+    make_dist(site, "FooBar", "1.2.3", top_level=["foobar"])
+    f = tmp_path / "script.py"
+    f.write_text("import foobar\n", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(f), "--venv", str(tmp_path / "venv")]):
+        with patch("depscripter.cli.get_environment_index", wraps=get_environment_index) as mock_index:
+            main()
+    
+    assert mock_index.call_args.kwargs["path"] == [str(site)]
+    assert '"FooBar==1.2.3",' in capsys.readouterr().out
+
+def test_cli_venv_not_found(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(f), "--venv", str(tmp_path / "missing")]):
+        with pytest.raises(SystemExit) as exc:
+            main()
+    
+    assert exc.value.code == 2
+
+def test_cli_lock_option(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("import yaml\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("import requests\n", encoding="utf-8")
+    lock = tmp_path / "requirements.txt"
+    lock.write_text("pyyaml==6.0.1\nrequests==2.32.0\n", encoding="utf-8")
+    
+    with patch("sys.argv", ["depscripter", str(tmp_path), "--lock", str(lock)]):
+        with patch("depscripter.cli.get_environment_index", return_value=({"yaml": ["PyYAML"]}, {"pyyaml": "5.4"})), \
+             patch("depscripter.lockfile.load_lock_file", wraps=load_lock_file) as mock_load:
+            main()
+    
+    assert mock_load.call_count == 1
+    out = capsys.readouterr().out
+    assert '"PyYAML==6.0.1",' in out
+    assert '"requests==2.32.0",' in out
+
+def test_cli_known_modules_fallback(tmp_path, capsys):
+    f = tmp_path / "script.py"
+    f.write_text("import cv2\n", encoding="utf-8")
+    
+    with patch("depscripter.cli.get_environment_index", return_value=({}, {})):
+        with patch("sys.argv", ["depscripter", str(f)]):
+            main()
+        assert '"opencv-python",' in capsys.readouterr().out
+        
+        with patch("sys.argv", ["depscripter", str(f), "--no-known-modules"]):
+            main()
+        assert "opencv-python" not in capsys.readouterr().out
+
+def test_cli_prune_transitive(tmp_path, capsys):
+    f = tmp_path / "script.py"
+    f.write_text("import numpy\nimport pandas\n", encoding="utf-8")
+    index = ({"numpy": ["numpy"], "pandas": ["pandas"]}, {"numpy": "1.26.4", "pandas": "2.2.2"})
+    graph = DependencyGraph({"pandas": ["numpy"], "numpy": []})
+
+    with patch("depscripter.cli.get_environment_index", return_value=index):
+        with patch("sys.argv", ["depscripter", str(f)]):
+            main()
+        assert '"numpy==1.26.4",' in capsys.readouterr().out
+
+        with patch("depscripter.graph.DependencyGraph.from_environment", return_value=graph) as mock_graph:
+            with patch("sys.argv", ["depscripter", str(f), "--prune-transitive"]):
+                main()
+
+    out = capsys.readouterr().out
+    assert '"pandas==2.2.2",' in out
+    assert "numpy==" not in out
+    mock_graph.assert_called_once_with(None)
+
+def test_cli_stats(tmp_path, capsys):
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+    prom = tmp_path / "depscripter.prom"
+    index = ({"requests": ["requests"]}, {"requests": "2.31.0"})
+
+    with patch("depscripter.cli.get_environment_index", return_value=index):
+        with patch("sys.argv", ["depscripter", str(f), "--no-cache", "--stats-format", "json", "--stats-prometheus", str(prom)]):
+            main()
+
+    captured = capsys.readouterr()
+    assert '"requests==2.31.0",' in captured.out
+    data = json.loads(captured.err)
+    assert data["counts"] == {"dependencies": 1, "files": 1, "modules": 1}
+    assert list(data["timings"]) == ["read", "parse", "index", "resolve", "generate", "write"]
+    assert 'depscripter_events{name="files"} 1' in prom.read_text(encoding="utf-8")
+
+def test_cli_stats_reported_on_failure(tmp_path, capsys):
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.cli.get_environment_index", return_value=({}, {})):
+        with patch("sys.argv", ["depscripter", str(f), "--check", "--timings"]):
+            with pytest.raises(SystemExit):
+                main()
+
+    assert "phase          seconds" in capsys.readouterr().err
+
+def test_cli_ndjson_format(tmp_path, capsys):
+    (tmp_path / "a.py").write_text("import os\nfrom typing import Iterable\nfrom requests import Session\nfrom helpers import util\n", encoding="utf-8")
+    (tmp_path / "b.py").write_text("def broken(:\n", encoding="utf-8")
+    index = ({"requests": ["requests"]}, {"requests": "2.31.0"})
+
+    with patch("depscripter.cli.get_environment_index", return_value=index):
+        with patch("sys.argv", ["depscripter", str(tmp_path), "--format", "ndjson", "--no-known-modules"]):
+            with pytest.raises(SystemExit) as exc:
+                main()
+
+    assert exc.value.code == 1
+    captured = capsys.readouterr()
+    records = [json.loads(line) for line in captured.out.splitlines()]
+    assert records[0] == {
+        "path": str(tmp_path / "a.py"),
+        "status": "ok",
+        "failed": False,
+        "modules": ["helpers", "os", "requests", "typing"],
+        "dependencies": {"requests": "2.31.0"},
+        "unresolved": ["helpers"],
+    }
+    assert records[1]["path"] == str(tmp_path / "b.py")
+    assert records[1]["failed"]
+    assert records[1]["status"].startswith("error:")
+    assert "2 file(s) processed, 1 failed" in captured.err
+
+def test_cli_ndjson_in_place(tmp_path, capsys):
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.cli.get_environment_index", return_value=({"requests": ["requests"]}, {})):
+        with patch("sys.argv", ["depscripter", str(f), "--format", "ndjson", "--in-place", "--no-pin"]):
+            main()
+
+    out = capsys.readouterr().out
+    assert json.loads(out)["status"] == "updated"
+    assert '"requests",' in f.read_text(encoding="utf-8")
+
+def test_cli_ndjson_skips_daemon(tmp_path, capsys):
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.cli.get_environment_index", return_value=({"requests": ["requests"]}, {})), \
+         patch("depscripter.daemon.run_in_daemon", return_value=0) as mock_daemon:
+        with patch("sys.argv", ["depscripter", str(f), "--format", "ndjson", "--no-pin"]):
+            main()
+
+    mock_daemon.assert_not_called()
+    assert json.loads(capsys.readouterr().out)["dependencies"] == {"requests": None}
+
+def test_cli_glob_matching_no_scripts(tmp_path, capsys, monkeypatch):
+    (tmp_path / "dir_empty").mkdir()
+    (tmp_path / "dir_empty" / "notes.txt").write_text("", encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    with patch("sys.argv", ["depscripter", "dir_*", "--no-daemon"]):
+        with patch("depscripter.cli.get_environment_index") as mock_index:
+            main()
+
+    mock_index.assert_not_called()
+    assert "0 file(s) processed, 0 failed" in capsys.readouterr().err
@@ -0,0 +1,166 @@
+import os
+import sys
+import threading
+import time
+from unittest.mock import patch
+
+import pytest
+
+from depscripter.cli import main
+from depscripter.daemon import DaemonState, get_socket_path, handle_request, PROTOCOL, run_in_daemon, serve, stop_daemon
+
+pytestmark = pytest.mark.skipif(sys.platform == "win32", reason="needs Unix domain sockets")
+
+INDEX = ({"requests": ["requests"]}, {"requests": "2.31.0"})
+
+def make_request(argv, cwd):
+    return {"protocol": PROTOCOL, "executable": sys.executable, "path": sys.path, "cwd": str(cwd), "argv": argv}
+
+def test_client_without_daemon(tmp_path):
+    assert run_in_daemon(["script.py"], socket_path=tmp_path / "missing.sock") is None
+
+def test_client_ignores_stale_socket(tmp_path, capsys):
+    stale = tmp_path / "stale.sock"
+    stale.write_text("", encoding="utf-8")
+
+    assert run_in_daemon(["script.py"], socket_path=stale) is None
+    assert capsys.readouterr() == ("", "")
+
+def test_cli_falls_back_to_in_process(tmp_path, capsys):
+    get_socket_path().parent.mkdir(parents=True, exist_ok=True)
+    get_socket_path().write_text("", encoding="utf-8")
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+
+    with patch("sys.argv", ["depscripter", str(f)]):
+        with patch("depscripter.cli.get_environment_index", return_value=INDEX):
+            main()
+
+    assert '"requests==2.31.0",' in capsys.readouterr().out
+
+def test_handle_request_reuses_index(tmp_path):
+    (tmp_path / "script.py").write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.resolver.build_environment_index", return_value=INDEX) as mock_index:
+        state = DaemonState(use_cache=False)
+        first = handle_request(make_request(["script.py"], tmp_path), state)
+        second = handle_request(make_request(["script.py", "--in-place"], tmp_path), state)
+
+    assert mock_index.call_count == 1
+    assert first["code"] == 0
+    assert '"requests==2.31.0",' in first["stdout"]
+    assert second["code"] == 0
+    assert '"requests==2.31.0",' in (tmp_path / "script.py").read_text(encoding="utf-8")
+
+def test_handle_request_reports_exit_code(tmp_path):
+    with patch("depscripter.resolver.build_environment_index", return_value=INDEX):
+        response = handle_request(make_request(["missing.py"], tmp_path), DaemonState(use_cache=False))
+
+    assert response["code"] == 1
+    assert "not found" in response["stderr"]
+
+def test_handle_request_reports_scan_cache_per_request(tmp_path):
+    scripts = tmp_path / "scripts"
+    scripts.mkdir()
+    (scripts / "a.py").write_text("import requests\n", encoding="utf-8")
+    (scripts / "b.py").write_text("import os\n", encoding="utf-8")
+
+    with patch("depscripter.resolver.build_environment_index", return_value=INDEX):
+        state = DaemonState(use_cache=False)
+        first = handle_request(make_request(["scripts"], tmp_path), state)
+        second = handle_request(make_request(["scripts", "--stats-format", "json"], tmp_path), state)
+
+        # --check reads the warm cache but leaves it as it was
+        (scripts / "c.py").write_text("import sys\n", encoding="utf-8")
+        entries = list(state.scan_cache.entries)
+        third = handle_request(make_request(["scripts", "--check"], tmp_path), state)
+
+    assert "scan cache: 0 hit(s), 2 miss(es)" in first["stderr"]
+    assert "scan cache: 2 hit(s), 0 miss(es)" in second["stderr"]
+    assert '"scan_cache_hits": 2' in second["stderr"]
+    assert '"scan_cache_misses": 0' in second["stderr"]
+    assert "scan cache: 2 hit(s), 1 miss(es)" in third["stderr"]
+    assert list(state.scan_cache.entries) == entries
+    assert not state.scan_cache.read_only
+
+def test_handle_request_rejects_mismatch(tmp_path):
+    state = DaemonState(use_cache=False)
+    request = make_request(["script.py"], tmp_path)
+
+    assert "code" not in handle_request(dict(request, protocol=PROTOCOL + 1), state)
+    assert "code" not in handle_request(dict(request, executable="/other/python"), state)
+    assert "code" not in handle_request(dict(request, path=["/elsewhere"] + sys.path), state)
+    assert "code" not in handle_request(None, state)
+
+def test_state_rebuilds_when_site_packages_change(tmp_path, monkeypatch, make_dist):
+    site = tmp_path / "site-packages"
+    site.mkdir()
+    monkeypatch.setattr(sys, "path", [str(site)])
+
+    with patch("depscripter.resolver.build_environment_index", return_value=INDEX) as mock_index:
+        state = DaemonState(use_cache=False)
+        state.index()
+        assert not state.refresh()
+
+        make_dist(site, "requests", "2.32.0")
+        # Make sure the directory mtime moves even on coarse clocks
+        os.utime(site, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+
+        assert state.refresh()
+        state.index()
+
+    assert mock_index.call_count == 2
+
+def test_serve_end_to_end(tmp_path, capsys):
+    socket_path = tmp_path / "d.sock"
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.resolver.build_environment_index", return_value=INDEX):
+        server = threading.Thread(target=serve, args=(socket_path,), kwargs={"use_cache": False})
+        server.start()
+        try:
+            for _ in range(100):
+                if socket_path.exists():
+                    break
+                time.sleep(0.05)
+
+            code = run_in_daemon([str(f)], socket_path=socket_path)
+        finally:
+            assert stop_daemon(socket_path)
+            server.join(5)
+
+    assert code == 0
+    assert '"requests==2.31.0",' in capsys.readouterr().out
+    assert not server.is_alive()
+    assert not socket_path.exists()
+    assert not stop_daemon(socket_path)
+
+def test_serve_times_out_silent_clients(tmp_path, capsys):
+    import socket
+
+    socket_path = tmp_path / "d.sock"
+    f = tmp_path / "script.py"
+    f.write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.resolver.build_environment_index", return_value=INDEX), \
+         patch("depscripter.daemon.REQUEST_TIMEOUT", 0.2):
+        server = threading.Thread(target=serve, args=(socket_path,), kwargs={"use_cache": False})
+        server.start()
+        silent = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            for _ in range(100):
+                if socket_path.exists():
+                    break
+                time.sleep(0.05)
+
+            # Connects and never sends its request
+            silent.connect(str(socket_path))
+            code = run_in_daemon([str(f)], socket_path=socket_path)
+        finally:
+            silent.close()
+            assert stop_daemon(socket_path)
+            server.join(5)
+
+    assert code == 0
+    assert '"requests==2.31.0",' in capsys.readouterr().out
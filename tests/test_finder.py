@@ -0,0 +1,90 @@
+from depscripter.finder import IgnoreRules, find_scripts
+
+def test_find_single_file(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("import os", encoding="utf-8")
+    assert find_scripts([str(f)]) == [f]
+
+def test_find_directory_recursive(tmp_path):
+    (tmp_path / "a.py").write_text("", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "sub" / "b.py").write_text("", encoding="utf-8")
+    (tmp_path / "notes.txt").write_text("", encoding="utf-8")
+
+    assert find_scripts([str(tmp_path)]) == [tmp_path / "a.py", tmp_path / "sub" / "b.py"]
+
+def test_find_skips_hidden_and_cache_dirs(tmp_path):
+    (tmp_path / ".venv").mkdir()
+    (tmp_path / ".venv" / "site.py").write_text("", encoding="utf-8")
+    (tmp_path / "__pycache__").mkdir()
+    (tmp_path / "__pycache__" / "x.py").write_text("", encoding="utf-8")
+    (tmp_path / "main.py").write_text("", encoding="utf-8")
+
+    assert find_scripts([str(tmp_path)]) == [tmp_path / "main.py"]
+
+def test_find_glob(tmp_path):
+    (tmp_path / "a.py").write_text("", encoding="utf-8")
+    (tmp_path / "b.py").write_text("", encoding="utf-8")
+    (tmp_path / "c.txt").write_text("", encoding="utf-8")
+
+    assert find_scripts([str(tmp_path / "*.py")]) == [tmp_path / "a.py", tmp_path / "b.py"]
+
+def test_find_deduplicates(tmp_path):
+    f = tmp_path / "a.py"
+    f.write_text("", encoding="utf-8")
+    assert find_scripts([str(f), str(tmp_path)]) == [f]
+
+def test_find_missing_is_kept(tmp_path):
+    missing = tmp_path / "missing.py"
+    assert find_scripts([str(missing)]) == [missing]
+
+def test_ignore_rules():
+    rules = IgnoreRules([
+        "# comment",
+        "",
+        "*.gen.py",
+        "build/",
+        "/top.py",
+        "docs/**/conf.py",
+        "!keep.gen.py",
+        "\\#odd.py",
+    ])
+
+    assert rules.match("a/b/x.gen.py", False)
+    assert rules.match("keep.gen.py", False) is False
+    assert rules.match("build", True)
+    assert rules.match("build", False) is None
+    assert rules.match("top.py", False)
+    assert rules.match("sub/top.py", False) is None
+    assert rules.match("docs/conf.py", False)
+    assert rules.match("docs/a/b/conf.py", False)
+    assert rules.match("#odd.py", False)
+    assert rules.match("main.py", False) is None
+
+def test_find_exclude(tmp_path):
+    (tmp_path / "a.py").write_text("", encoding="utf-8")
+    (tmp_path / "tests" / "fixtures").mkdir(parents=True)
+    (tmp_path / "tests" / "fixtures" / "x.py").write_text("", encoding="utf-8")
+    (tmp_path / "tests" / "test_a.py").write_text("", encoding="utf-8")
+
+    assert find_scripts([str(tmp_path)], exclude=["tests/fixtures"]) == [tmp_path / "a.py", tmp_path / "tests" / "test_a.py"]
+    assert find_scripts([str(tmp_path)], exclude=["test_*.py", "x.py"]) == [tmp_path / "a.py"]
+    # Explicit files are never excluded
+    assert find_scripts([str(tmp_path / "tests" / "test_a.py")], exclude=["*.py"]) == [tmp_path / "tests" / "test_a.py"]
+
+def test_find_gitignore(tmp_path):
+    (tmp_path / ".git").mkdir()
+    (tmp_path / ".gitignore").write_text("generated/\n*_pb2.py\n", encoding="utf-8")
+    src = tmp_path / "src"
+    (src / "generated").mkdir(parents=True)
+    (src / "generated" / "g.py").write_text("", encoding="utf-8")
+    (src / "api_pb2.py").write_text("", encoding="utf-8")
+    (src / "main.py").write_text("", encoding="utf-8")
+    (src / "vendored").mkdir()
+    (src / "vendored" / ".gitignore").write_text("*\n!.gitignore\n!keep.py\n", encoding="utf-8")
+    (src / "vendored" / "keep.py").write_text("", encoding="utf-8")
+    (src / "vendored" / "drop.py").write_text("", encoding="utf-8")
+
+    # .gitignore files above the walked directory count too
+    assert find_scripts([str(src)], gitignore=True) == [src / "main.py", src / "vendored" / "keep.py"]
+    assert len(find_scripts([str(src)])) == 5
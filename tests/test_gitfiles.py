@@ -0,0 +1,92 @@
+import shutil
+import subprocess
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from depscripter.cli import main
+from depscripter.gitfiles import GitError, changed_files, select_scripts
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+def git(repo, *args):
+    subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com"] + list(args), cwd=repo, check=True, capture_output=True)
+
+@pytest.fixture
+def repo(tmp_path, monkeypatch):
+    git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "app").mkdir()
+    (tmp_path / "app" / "old.py").write_text("import os\n", encoding="utf-8")
+    (tmp_path / "app" / "gone.py").write_text("import os\n", encoding="utf-8")
+    (tmp_path / "README.md").write_text("", encoding="utf-8")
+    git(tmp_path, "add", ".")
+    git(tmp_path, "commit", "-q", "-m", "initial")
+    git(tmp_path, "checkout", "-q", "-b", "feature")
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+def test_changed_files_since_ref(repo):
+    (repo / "app" / "new.py").write_text("import requests\n", encoding="utf-8")
+    git(repo, "add", "app/new.py")
+    git(repo, "commit", "-q", "-m", "add new")
+    (repo / "app" / "old.py").write_text("import requests\n", encoding="utf-8")
+    git(repo, "rm", "-q", "app/gone.py")
+
+    changed = changed_files("main")
+    assert sorted(changed) == [repo.resolve() / "app" / "new.py", repo.resolve() / "app" / "old.py"]
+
+def test_changed_files_staged(repo):
+    (repo / "app" / "old.py").write_text("import requests\n", encoding="utf-8")
+    (repo / "app" / "staged.py").write_text("import requests\n", encoding="utf-8")
+    (repo / "notes.txt").write_text("", encoding="utf-8")
+    git(repo, "add", "app/staged.py", "notes.txt")
+
+    assert sorted(changed_files(staged=True)) == [repo.resolve() / "app" / "staged.py", repo.resolve() / "notes.txt"]
+
+def test_changed_files_errors(repo, tmp_path_factory):
+    with pytest.raises(GitError):
+        changed_files("no-such-ref")
+    with pytest.raises(GitError):
+        changed_files(staged=True, cwd=tmp_path_factory.mktemp("not-a-repo"))
+
+def test_select_scripts(repo):
+    (repo / "tools" / "fixtures").mkdir(parents=True)
+    for name in ("tools/a.py", "tools/fixtures/f.py", "tools/data.json", "app/old.py"):
+        (repo / name).write_text("", encoding="utf-8")
+    files = [repo / name for name in ("tools/a.py", "tools/fixtures/f.py", "tools/data.json", "app/old.py", "app/deleted.py")]
+
+    assert select_scripts(files) == [Path("tools/a.py"), Path("tools/fixtures/f.py"), Path("app/old.py")]
+    assert select_scripts(files, ["tools"]) == [Path("tools/a.py"), Path("tools/fixtures/f.py")]
+    assert select_scripts(files, ["app/old.py", "tools/*.py"]) == [Path("tools/a.py"), Path("app/old.py")]
+    assert select_scripts(files, exclude=["fixtures/"]) == [Path("tools/a.py"), Path("app/old.py")]
+
+def test_cli_staged(repo, capsys):
+    (repo / "app" / "staged.py").write_text("import requests\n", encoding="utf-8")
+    (repo / "app" / "unstaged.py").write_text("import requests\n", encoding="utf-8")
+    git(repo, "add", "app/staged.py")
+
+    with patch("depscripter.cli.get_environment_index", return_value=({"requests": ["requests"]}, {"requests": "2.31.0"})):
+        with patch("sys.argv", ["depscripter", "--staged", "--in-place", "--no-daemon"]):
+            main()
+
+    assert '"requests==2.31.0",' in (repo / "app" / "staged.py").read_text(encoding="utf-8")
+    assert "///" not in (repo / "app" / "unstaged.py").read_text(encoding="utf-8")
+    assert "1 file(s) processed, 0 failed" in capsys.readouterr().err
+
+def test_cli_nothing_changed_skips_index(repo, capsys):
+    (repo / "README.md").write_text("changed\n", encoding="utf-8")
+
+    with patch("depscripter.cli.get_environment_index") as mock_index, patch("depscripter.cli.ScanCache") as mock_cache:
+        with patch("sys.argv", ["depscripter", "--changed-since", "main", "--check", "--no-daemon"]):
+            main()
+
+    mock_index.assert_not_called()
+    mock_cache.load.assert_not_called()
+    assert "No changed Python scripts" in capsys.readouterr().err
+
+def test_cli_requires_paths_without_git_mode():
+    with patch("sys.argv", ["depscripter"]):
+        with pytest.raises(SystemExit) as exc:
+            main()
+    assert exc.value.code == 2
@@ -0,0 +1,50 @@
+from depscripter.graph import DependencyGraph, prune_transitive, requirement_edges
+from depscripter.markers import default_environment
+
+ENV = dict(default_environment(), python_version="3.10", sys_platform="linux")
+
+def test_requirement_edges():
+    requires = [
+        "numpy>=1.22.4",
+        "python-dateutil (>=2.8.2)",
+        'tomli; python_version < "3.11"',
+        'pywin32; sys_platform == "win32"',
+        'pytest; extra == "test"',
+        "Typing_Extensions[all]>=4",
+        'weird; not_a_variable == "x"',
+    ]
+    assert requirement_edges(requires, ENV) == ["numpy", "python-dateutil", "tomli", "typing-extensions"]
+
+def test_reachable_is_transitive_and_memoized():
+    graph = DependencyGraph({"a": ["b"], "b": ["c"], "c": [], "d": ["a"]})
+
+    assert graph.reachable("a") == {"b", "c"}
+    assert graph.reachable("D") == {"a", "b", "c"}
+    assert graph.reachable("missing") == set()
+
+    graph.edges["a"] = []
+    assert graph.reachable("a") == {"b", "c"}
+
+def test_reachable_handles_cycles():
+    graph = DependencyGraph({"a": ["b"], "b": ["a", "c"], "c": []})
+    assert graph.reachable("a") == {"a", "b", "c"}
+
+def test_prune_transitive():
+    graph = DependencyGraph({"pandas": ["numpy", "python-dateutil"], "python-dateutil": ["six"], "numpy": []})
+    dependencies = {"numpy": "1.26.4", "pandas": "2.2.2", "requests": None, "six": None}
+
+    assert prune_transitive(dependencies, graph) == {"pandas": "2.2.2", "requests": None}
+
+def test_prune_transitive_keeps_one_of_a_cycle():
+    graph = DependencyGraph({"beta": ["alpha"], "alpha": ["beta"]})
+    assert prune_transitive({"beta": None, "Alpha": None}, graph) == {"Alpha": None}
+
+def test_from_environment(tmp_path, make_dist):
+    make_dist(tmp_path, "pandas", "2.2.2", requires=["numpy>=1.22.4", 'tzdata; sys_platform == "win32"', 'pytest; extra == "test"'])
+    make_dist(tmp_path, "numpy", "1.26.4")
+    make_dist(tmp_path, "Sphinx-Theme", "1.0", requires=["Pandas"])
+
+    graph = DependencyGraph.from_environment([str(tmp_path)], environment=ENV)
+
+    assert graph.edges == {"pandas": ["numpy"], "numpy": [], "sphinx-theme": ["pandas"]}
+    assert graph.reachable("sphinx_theme") == {"pandas", "numpy"}
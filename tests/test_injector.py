@@ -99,3 +99,97 @@ def test_inject_preserve_shebang_and_encoding():
     assert lines[0] == "#!/usr/bin/env python3"
     assert lines[1].startswith("# -*- coding")
     assert lines[2] == "# /// script"
+
+HEADER_CASES = [
+    "",
+    "import os\n",
+    "#!/usr/bin/env python\nimport os\n",
+    "# -*- coding: utf-8 -*-\nimport os",
+    "#!/usr/bin/env python\n# coding: latin-1\n\nprint(1)\n",
+    '"""Docstring."""\nimport os\n',
+    '"""\nMulti-line\n# /// script\n"""\n\n# /// script\n# dependencies = []\n# ///\nimport os\n',
+    "# comment\n\n# /// script\n# dependencies = []\n# ///\n\nimport os\n",
+    '"""Doc."""\n# /// script\n# dependencies = []\n# ///\nx = 1\n',
+    "import os\n\n# /// script\n# dependencies = []\n# ///\n",
+    "# /// script\n# dependencies = []\nimport os\n# ///\n",
+    "# /// script\n# dependencies = []\n",
+    "x = 1\r\n# /// script\r\n# ///\r\n",
+    # Line breaks other than "\n"
+    "# /// script\r# dependencies = []\r# ///\rimport x\r",
+    "# /// script\r\n# dependencies = []\r\n# ///\r\nimport x\r\n",
+    "#!/usr/bin/env python\r# -*- coding: utf-8 -*-\rimport x\r",
+    '#!/usr/bin/env python\r\n"""Doc."""\r\n# /// script\r\n# ///\r\nimport x\r\n',
+    "# comment\x0c# /// script\n# ///\nimport x\n",
+]
+
+def test_inject_replaces_block_with_cr_line_endings():
+    block = generate_script_metadata({"requests": "2.31.0"})
+    source = "# /// script\r# dependencies = []\r# ///\rimport x\r"
+
+    assert inject_metadata(source, block) == block + "\nimport x\r"
+
+def test_inject_header_path_matches_full_scan():
+    block = generate_script_metadata({"requests": "2.31.0"})
+    for source in HEADER_CASES:
+        assert inject_metadata(source, block) == inject_metadata(source, block, full_scan=True), source
+
+def test_inject_large_file_replaces_header_block():
+    block = generate_script_metadata({"requests": "2.31.0"})
+    body = "x = 1\n" * 100_000
+    source = "#!/usr/bin/env python\n# /// script\n# dependencies = []\n# ///\n" + body
+
+    result = inject_metadata(source, block)
+
+    assert result == "#!/usr/bin/env python\n" + block + "\n" + body
+    assert result == inject_metadata(source, block, full_scan=True)
+
+def test_parse_script_metadata():
+    from depscripter.injector import parse_script_metadata
+    code = "#!/usr/bin/env python3\n# /// script\n# requires-python = \">=3.9\"\n# dependencies = [\n#     \"requests==2.31.0\",\n#     \"numpy\",\n# ]\n# ///\nimport requests"
+    
+    assert parse_script_metadata(code) == {"requires-python": ">=3.9", "dependencies": ["requests==2.31.0", "numpy"]}
+
+def test_parse_script_metadata_missing():
+    from depscripter.injector import parse_script_metadata
+    assert parse_script_metadata("import requests") is None
+    # Other block types are not script metadata
+    assert parse_script_metadata("# /// pyproject\n# x = 1\n# ///\n") is None
+
+def test_parse_simple_toml():
+    # Used on Python < 3.11, where tomllib is not available
+    from depscripter.injector import _parse_simple_toml
+    content = 'requires-python = ">=3.9"  # comment\ndependencies = [\n  "a>=1",  # pinned\n  \'b\',\n  "c; python_version < \'3.10\'",\n]\n\n[tool.uv]\nexclude-newer = "2024-01-01"\n'
+    
+    assert _parse_simple_toml(content) == {
+        "requires-python": ">=3.9",
+        "dependencies": ["a>=1", "b", "c; python_version < '3.10'"],
+    }
+
+def test_check_metadata_up_to_date():
+    from depscripter.injector import check_metadata
+    code = "# /// script\n# requires-python = \">=3.9\"\n# dependencies = [\n#     \"PyYAML >= 6.0\",\n#     \"requests==2.31.0\",\n# ]\n# ///\nimport requests"
+    
+    assert check_metadata(code, {"requests": "2.31.0"}, python_requires="3.9", overrides={"pyyaml": ">=6.0"}) == []
+
+def test_check_metadata_drift():
+    from depscripter.injector import check_metadata
+    code = "# /// script\n# requires-python = \">=3.9\"\n# dependencies = [\n#     \"requests==2.31.0\",\n#     \"pandas\",\n# ]\n# ///\nimport requests"
+    
+    problems = check_metadata(code, {"requests": "2.32.0", "numpy": None}, python_requires=">=3.10")
+    
+    assert problems == [
+        "missing numpy",
+        "unexpected pandas",
+        "changed requests==2.31.0 -> requests==2.32.0",
+        "requires-python '>=3.9' -> '>=3.10'",
+    ]
+
+def test_check_metadata_ignores_python_unless_given():
+    from depscripter.injector import check_metadata
+    code = "# /// script\n# requires-python = \">=3.6\"\n# dependencies = []\n# ///\n"
+    
+    assert check_metadata(code, {}) == []
+
+def test_check_metadata_no_block():
+    from depscripter.injector import check_metadata
+    assert check_metadata("import requests", {"requests": None}) == ["no metadata block"]
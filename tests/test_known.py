@@ -0,0 +1,125 @@
+import zipfile
+
+import pytest
+
+from depscripter.known import (
+    KNOWN_MODULES_FILE,
+    KnownModules,
+    build_known_modules,
+    iter_cached_distributions,
+    main,
+    read_known_modules,
+    write_known_modules,
+)
+from depscripter.resolver import resolve_packages
+
+def make_wheel(directory, filename, files, name=None):
+    directory.mkdir(parents=True, exist_ok=True)
+    with zipfile.ZipFile(directory / filename, "w") as wheel:
+        for path, content in files.items():
+            wheel.writestr(path, content)
+        if name is not None:
+            dist_info = filename.split("-")[0] + "-" + filename.split("-")[1] + ".dist-info"
+            wheel.writestr(f"{dist_info}/METADATA", f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n\nBody\n")
+
+def test_bundled_table_is_sorted():
+    data = KNOWN_MODULES_FILE.read_bytes()
+    keys = [line.split(b"\t")[0] for line in data.splitlines()]
+    
+    assert keys == sorted(keys)
+    assert len(keys) == len(set(keys))
+    assert all(line.count(b"\t") == 1 for line in data.splitlines())
+
+def test_bundled_lookups():
+    known = KnownModules()
+    
+    assert known.lookup("yaml") == "PyYAML"
+    assert known.lookup("cv2") == "opencv-python"
+    assert known.lookup("sklearn") == "scikit-learn"
+    assert known.lookup("PIL") == "Pillow"
+    assert known.lookup("definitely_not_a_module") is None
+    assert known.lookup("yam") is None
+    assert known.lookup("mödule") is None
+    assert known.get("yaml") == ["PyYAML"]
+    assert known.get("nope", []) == []
+
+def test_lookup_every_entry(tmp_path):
+    table = {f"mod{i:04d}": f"dist-{i}" for i in range(0, 2000, 3)}
+    path = tmp_path / "known.tsv"
+    write_known_modules(table, path)
+    known = KnownModules(path)
+    
+    for i in range(2000):
+        assert known.lookup(f"mod{i:04d}") == table.get(f"mod{i:04d}")
+    assert known.lookup("a") is None
+    assert known.lookup("zzz") is None
+    known.close()
+
+def test_missing_or_empty_table(tmp_path):
+    assert KnownModules(tmp_path / "missing.tsv").lookup("yaml") is None
+    (tmp_path / "empty.tsv").write_bytes(b"")
+    assert KnownModules(tmp_path / "empty.tsv").lookup("yaml") is None
+
+def test_resolve_packages_falls_back_to_known():
+    resolved = resolve_packages({"yaml", "requests", "local_helpers"}, mapping={"requests": ["requests"]}, versions={"requests": "2.31.0"}, known=KnownModules())
+    
+    assert resolved == {"requests": "2.31.0", "PyYAML": None}
+
+def test_iter_cached_distributions(tmp_path):
+    make_wheel(tmp_path / "pip" / "ab", "PyYAML-6.0-cp312-cp312-linux_x86_64.whl", {
+        "PyYAML-6.0.dist-info/top_level.txt": "_yaml\nyaml\n",
+    }, name="PyYAML")
+    make_wheel(tmp_path / "pip" / "cd", "scikit_learn-1.4.0-cp312-cp312-linux_x86_64.whl", {
+        "sklearn/__init__.py": "",
+        "scikit_learn-1.4.0.dist-info/RECORD": "",
+    }, name="scikit-learn")
+    make_wheel(tmp_path / "pip", "broken-1.0-py3-none-any.whl", {"broken.py": ""})
+    dist_info = tmp_path / "uv" / "archive" / "opencv_python-4.9.0.dist-info"
+    dist_info.mkdir(parents=True)
+    (dist_info / "METADATA").write_text("Name: opencv-python\nVersion: 4.9.0\n", encoding="utf-8")
+    (dist_info / "RECORD").write_text("cv2/__init__.py,,\ncv2/data/x.xml,,\nopencv_python-4.9.0.dist-info/RECORD,,\n", encoding="utf-8")
+    
+    found = list(iter_cached_distributions([tmp_path]))
+    
+    assert sorted(found) == sorted([
+        ("PyYAML", ["_yaml", "yaml"]),
+        ("scikit-learn", ["sklearn"]),
+        ("broken", ["broken"]),
+        ("opencv-python", ["cv2"]),
+    ])
+
+def test_build_known_modules_conflicts():
+    table = build_known_modules([
+        ("PyYAML", ["yaml", "_yaml", "tests"]),
+        ("opencv-python", ["cv2"]),
+        ("opencv-python-headless", ["cv2"]),
+        ("opencv_python", ["cv2"]),
+        ("attrs", ["attr", "attrs"]),
+        ("attr", ["attr"]),
+    ])
+    
+    assert table == {
+        "yaml": "PyYAML",
+        # Seen most often
+        "cv2": "opencv-python",
+        # Named after the module
+        "attr": "attr",
+        "attrs": "attrs",
+    }
+
+def test_generator_command(tmp_path):
+    make_wheel(tmp_path / "wheels", "PyYAML-6.0-py3-none-any.whl", {"yaml/__init__.py": ""}, name="PyYAML")
+    output = tmp_path / "known.tsv"
+    write_known_modules({"cv2": "opencv-python", "yaml": "old"}, output)
+    
+    main([str(tmp_path / "wheels"), "-o", str(output), "--merge"])
+    
+    assert read_known_modules(output) == {"cv2": "opencv-python", "yaml": "PyYAML"}
+    assert KnownModules(output).lookup("yaml") == "PyYAML"
+
+def test_generator_command_requires_output(tmp_path, capsys):
+    with pytest.raises(SystemExit) as exc:
+        main([str(tmp_path)])
+
+    assert exc.value.code == 2
+    assert "--output" in capsys.readouterr().err
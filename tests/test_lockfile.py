@@ -0,0 +1,89 @@
+from depscripter.lockfile import LockIndex, load_lock_file, parse_requirements, parse_uv_lock
+from depscripter.resolver import resolve_packages
+
+UV_LOCK = """version = 1
+requires-python = ">=3.9"
+
+[[package]]
+name = "certifi"
+version = "2024.2.2"
+source = { registry = "https://pypi.org/simple" }
+sdist = { url = "https://files.pythonhosted.org/certifi-2024.2.2.tar.gz", hash = "sha256:0" }
+
+[[package]]
+name = "pyyaml"
+version = "6.0.1"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "numpy"
+version = "1.26.4"
+source = { registry = "https://pypi.org/simple" }
+resolution-markers = ["python_full_version < '3.10'"]
+
+[[package]]
+name = "numpy"
+version = "2.0.0"
+source = { registry = "https://pypi.org/simple" }
+
+[[package]]
+name = "my-project"
+source = { editable = "." }
+dependencies = [
+    { name = "pyyaml" },
+]
+"""
+
+REQUIREMENTS = """# This file was autogenerated by uv
+certifi==2024.2.2 \\
+    --hash=sha256:0
+PyYAML[extra] == 6.0.1 ; python_version >= "3.9"
+requests>=2.0
+-e ./local
+mypkg @ https://example.com/mypkg-1.0.tar.gz
+https://example.com/other.zip
+"""
+
+def test_parse_uv_lock():
+    table = parse_uv_lock(UV_LOCK)
+    
+    assert table["certifi"] == ("certifi", "2024.2.2")
+    assert table["pyyaml"] == ("pyyaml", "6.0.1")
+    # First entry wins for packages locked per platform
+    assert table["numpy"] == ("numpy", "1.26.4")
+    assert table["my-project"] == ("my-project", None)
+
+def test_parse_requirements():
+    table = parse_requirements(REQUIREMENTS)
+    
+    assert table == {
+        "certifi": ("certifi", "2024.2.2"),
+        "pyyaml": ("PyYAML", "6.0.1"),
+        "requests": ("requests", None),
+        "mypkg": ("mypkg", None),
+    }
+
+def test_load_lock_file_detects_format(tmp_path):
+    uv_lock = tmp_path / "uv.lock"
+    uv_lock.write_text(UV_LOCK, encoding="utf-8")
+    requirements = tmp_path / "requirements.txt"
+    requirements.write_text(REQUIREMENTS, encoding="utf-8")
+    
+    assert load_lock_file(uv_lock)["pyyaml"] == ("pyyaml", "6.0.1")
+    assert load_lock_file(requirements)["pyyaml"] == ("PyYAML", "6.0.1")
+
+def test_lock_index_pins_locked_versions():
+    index = LockIndex(parse_uv_lock(UV_LOCK), mapping={"yaml": ["PyYAML"], "requests": ["requests"]})
+    
+    resolved = resolve_packages({"yaml", "certifi", "requests", "unknown"}, mapping=index, versions=index.versions)
+    
+    # Environment names the distribution, the lock file pins it; packages
+    # missing from the lock stay unpinned
+    assert resolved == {"PyYAML": "6.0.1", "certifi": "2024.2.2", "requests": None}
+
+def test_lock_index_without_environment():
+    index = LockIndex(parse_requirements(REQUIREMENTS))
+    
+    assert index.get("certifi") == ["certifi"]
+    assert index.get("yaml") is None
+    assert index.get("yaml", []) == []
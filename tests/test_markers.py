@@ -0,0 +1,40 @@
+import pytest
+
+from depscripter.markers import default_environment, evaluate_marker
+
+ENV = dict(default_environment(), python_version="3.10", python_full_version="3.10.4", sys_platform="linux", os_name="posix", platform_system="Linux")
+
+def test_default_environment():
+    env = default_environment()
+    assert env["extra"] == ""
+    assert env["python_version"].count(".") == 1
+
+@pytest.mark.parametrize("marker,expected", [
+    ('python_version < "3.11"', True),
+    ('python_version >= "3.11"', False),
+    ('python_version > "3.9.5"', True),
+    ('python_full_version == "3.10.*"', True),
+    ('python_full_version != "3.10.*"', False),
+    ('python_version ~= "3.8"', True),
+    ('python_version ~= "3.11"', False),
+    ('sys_platform == "win32"', False),
+    ("'linux' in sys_platform", True),
+    ('sys_platform not in "win32 cygwin"', True),
+    ('os_name == "posix" and (sys_platform == "win32" or platform_system == "Linux")', True),
+    ('sys.platform == "linux"', True),
+    ('extra == "dev"', False),
+])
+def test_evaluate_marker(marker, expected):
+    assert evaluate_marker(marker, ENV) is expected
+
+@pytest.mark.parametrize("marker", [
+    'python_version <',
+    'python_version < "3.11" and',
+    '(python_version < "3.11"',
+    'unknown_variable == "x"',
+    'python_version >= "3.*"',
+    'platform_release < "abc"',
+])
+def test_evaluate_marker_invalid(marker):
+    with pytest.raises(ValueError):
+        evaluate_marker(marker, ENV)
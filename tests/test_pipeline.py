@@ -0,0 +1,61 @@
+from unittest.mock import patch
+
+from depscripter import batch
+from depscripter.pipeline import iter_process
+
+INDEX = ({"requests": ["requests"]}, {"requests": "2.31.0"})
+
+def make_tree(root):
+    (root / "app").mkdir(parents=True)
+    (root / "app" / "main.py").write_text("import requests\nimport helpers\n", encoding="utf-8")
+    (root / "app" / "broken.py").write_text("def broken(:\n", encoding="utf-8")
+    (root / "build").mkdir()
+    (root / "build" / "generated.py").write_text("import requests\n", encoding="utf-8")
+    (root / "fixtures").mkdir()
+    (root / "fixtures" / "sample.py").write_text("import requests\n", encoding="utf-8")
+    (root / ".gitignore").write_text("build/\n", encoding="utf-8")
+
+def test_iter_process(tmp_path):
+    make_tree(tmp_path)
+
+    with patch("depscripter.pipeline.get_environment_index", return_value=INDEX) as mock_index:
+        results = list(iter_process([tmp_path], exclude=["fixtures/"], gitignore=True))
+
+    assert mock_index.call_count == 1
+    assert [r.path for r in results] == [tmp_path / "app" / "broken.py", tmp_path / "app" / "main.py"]
+    broken, main = results
+    assert broken.error.startswith("error:")
+    assert main.dependencies == {"requests": "2.31.0"}
+    assert main.unresolved == {"helpers"}
+    assert main.changed
+    assert '"requests==2.31.0",' in main.new_source
+    # Nothing is written unless asked
+    assert "///" not in (tmp_path / "app" / "main.py").read_text(encoding="utf-8")
+
+def test_iter_process_in_place(tmp_path):
+    make_tree(tmp_path)
+
+    results = list(iter_process([tmp_path / "app" / "main.py"], in_place=True, mapping=INDEX[0], versions=INDEX[1]))
+    assert results[0].changed
+    assert '"requests==2.31.0",' in (tmp_path / "app" / "main.py").read_text(encoding="utf-8")
+
+    again = list(iter_process([tmp_path / "app" / "main.py"], in_place=True, mapping=INDEX[0], versions=INDEX[1]))
+    assert not again[0].changed
+
+def test_iter_process_is_lazy(tmp_path):
+    for i in range(5):
+        (tmp_path / f"script_{i}.py").write_text("import requests\n", encoding="utf-8")
+
+    with patch("depscripter.batch.scan_file", wraps=batch.scan_file) as mock_scan:
+        results = iter_process([tmp_path], mapping=INDEX[0], versions=INDEX[1])
+        first = next(results)
+
+    assert first.path == tmp_path / "script_0.py"
+    assert mock_scan.call_count == 1
+
+def test_iter_process_ignores_gitignore_by_default(tmp_path):
+    make_tree(tmp_path)
+
+    results = list(iter_process([tmp_path], exclude=["fixtures/"], mapping=INDEX[0], versions=INDEX[1]))
+
+    assert tmp_path / "build" / "generated.py" in [r.path for r in results]
@@ -1,3 +1,4 @@
+import pytest
 import sys
 from unittest.mock import patch, MagicMock
 from depscripter.resolver import resolve_packages
@@ -5,25 +6,22 @@ from depscripter.resolver import resolve_packages
 def test_resolve_packages_simple():
     module_names = {"requests", "yaml"}
     
-    with patch("depscripter.resolver.get_packages_distributions") as mock_dist:
-        mock_dist.return_value = {
-            "requests": ["requests"],
-            "yaml": ["PyYAML"],
-        }
-        
-        with patch("importlib.metadata.version") as mock_ver:
-            mock_ver.side_effect = lambda x: "2.31.0" if x == "requests" else "6.0"
-            
-            resolved = resolve_packages(module_names, pin_versions=True)
-            
-            assert resolved["requests"] == "2.31.0"
-            assert resolved["PyYAML"] == "6.0"
+    with patch("depscripter.resolver.build_environment_index") as mock_index:
+        mock_index.return_value = (
+            {"requests": ["requests"], "yaml": ["PyYAML"]},
+            {"requests": "2.31.0", "pyyaml": "6.0"},
+        )
+        
+        resolved = resolve_packages(module_names, pin_versions=True)
+        
+        assert resolved["requests"] == "2.31.0"
+        assert resolved["PyYAML"] == "6.0"
 
 def test_resolve_packages_no_pin():
     module_names = {"requests"}
     
-    with patch("depscripter.resolver.get_packages_distributions") as mock_dist:
-        mock_dist.return_value = {"requests": ["requests"]}
+    with patch("depscripter.resolver.build_environment_index") as mock_index:
+        mock_index.return_value = ({"requests": ["requests"]}, {"requests": "2.31.0"})
         
         resolved = resolve_packages(module_names, pin_versions=False)
         assert resolved["requests"] is None
@@ -32,23 +30,443 @@ def test_resolve_missing_distribution():
     # e.g. stdlib "sys"
     module_names = {"sys"}
     
-    with patch("depscripter.resolver.get_packages_distributions") as mock_dist:
-        mock_dist.return_value = {} # sys not in external dists
+    with patch("depscripter.resolver.build_environment_index") as mock_index:
+        mock_index.return_value = ({}, {}) # sys not in external dists
         
         resolved = resolve_packages(module_names)
         assert resolved == {}
 
 def test_resolve_package_not_found_version():
-    # package exists in map but not installed? (shouldn't happen technically if map comes from installed)
-    # But just in case
+    # A distribution without a version in its metadata
     module_names = {"foo"}
     
+    with patch("depscripter.resolver.build_environment_index") as mock_index:
+        mock_index.return_value = ({"foo": ["foo-pkg"]}, {})
+        
+        resolved = resolve_packages(module_names, pin_versions=True)
+        assert resolved["foo-pkg"] is None
+
+def test_resolve_packages_reuses_default_resolver():
+    with patch("depscripter.resolver.build_environment_index", return_value=({"requests": ["requests"]}, {})) as mock_index:
+        resolve_packages({"requests"})
+        resolve_packages({"requests"})
+    
+    assert mock_index.call_count == 1
+
+def test_resolve_with_prebuilt_mapping():
     with patch("depscripter.resolver.get_packages_distributions") as mock_dist:
-        mock_dist.return_value = {"foo": ["foo-pkg"]}
-        
-        with patch("importlib.metadata.version") as mock_ver:
-            from importlib.metadata import PackageNotFoundError
-            mock_ver.side_effect = PackageNotFoundError
-            
-            resolved = resolve_packages(module_names, pin_versions=True)
-            assert resolved["foo-pkg"] is None
+        resolved = resolve_packages({"yaml"}, pin_versions=False, mapping={"yaml": ["PyYAML"]})
+        
+        mock_dist.assert_not_called()
+        assert resolved == {"PyYAML": None}
+
+def test_resolve_with_prebuilt_versions():
+    with patch("importlib.metadata.version") as mock_ver:
+        resolved = resolve_packages({"yaml"}, mapping={"yaml": ["PyYAML"]}, versions={"pyyaml": "6.0"})
+        
+        mock_ver.assert_not_called()
+        assert resolved == {"PyYAML": "6.0"}
+
+def test_normalize_name():
+    from depscripter.resolver import normalize_name
+    assert normalize_name("PyYAML") == "pyyaml"
+    assert normalize_name("zope.interface") == "zope-interface"
+    assert normalize_name("Foo__Bar-._baz") == "foo-bar-baz"
+
+def test_build_environment_index_single_pass(tmp_path, make_dist):
+    from depscripter.resolver import build_environment_index
+    make_dist(tmp_path, "PyYAML", "6.0", top_level=["yaml", "_yaml"])
+    make_dist(tmp_path, "Typing_Extensions", "4.9.0", record=["typing_extensions.py", "Typing_Extensions-4.9.0.dist-info/RECORD"])
+    
+    mapping, versions = build_environment_index(path=[str(tmp_path)])
+    
+    assert mapping["yaml"] == ["PyYAML"]
+    assert mapping["_yaml"] == ["PyYAML"]
+    if sys.version_info >= (3, 10):
+        assert mapping["typing_extensions"] == ["Typing_Extensions"]
+    assert versions == {"pyyaml": "6.0", "typing-extensions": "4.9.0"}
+
+def test_find_site_packages(tmp_path, make_dist):
+    from depscripter.resolver import find_site_packages
+    venv = tmp_path / "venv"
+    site = venv / "lib" / "python3.12" / "site-packages"
+    site.mkdir(parents=True)
+    (venv / "lib64").symlink_to(venv / "lib")
+    target = tmp_path / "target"
+    make_dist(target, "requests", "2.31.0", top_level=["requests"])
+    
+    assert find_site_packages(str(venv)) == [str(site)]
+    assert find_site_packages(str(site)) == [str(site)]
+    assert find_site_packages(str(target)) == [str(target)]
+    with pytest.raises(FileNotFoundError):
+        find_site_packages(str(tmp_path / "missing"))
+
+def test_resolve_versions_normalized_lookup():
+    with patch("importlib.metadata.version") as mock_ver:
+        resolved = resolve_packages({"typing_extensions"}, mapping={"typing_extensions": ["Typing_Extensions"]}, versions={"typing-extensions": "4.9.0"})
+        
+        mock_ver.assert_not_called()
+        assert resolved == {"Typing_Extensions": "4.9.0"}
+
+@pytest.fixture
+def lazy_env(tmp_path, make_dist):
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0", top_level=["requests"], record=["requests/__init__.py"])
+    make_dist(site, "PyYAML", "6.0", top_level=["yaml"], record=["yaml/__init__.py"])
+    make_dist(site, "attrs", "23.1.0", top_level=["attr", "attrs"], record=["attr/__init__.py", "attrs/__init__.py"])
+    stdlib = tmp_path / "stdlib"
+    stdlib.mkdir()
+    (stdlib / "json").mkdir()
+    (stdlib / "os.py").write_text("", encoding="utf-8")
+    return [str(stdlib), str(site)]
+
+def test_lazy_index_probes_matching_distribution(lazy_env):
+    from depscripter.resolver import LazyIndex
+    full_index = MagicMock()
+    index = LazyIndex(path=lazy_env, full_index=full_index)
+    
+    assert index.get("requests") == ["requests"]
+    assert index.get("attrs") == ["attrs"]
+    assert index.versions == {"requests": "2.31.0", "attrs": "23.1.0"}
+    full_index.assert_not_called()
+    assert index.metadata_reads == 2
+
+def test_lazy_index_skips_modules_outside_site_packages(lazy_env):
+    from depscripter.resolver import LazyIndex
+    full_index = MagicMock()
+    index = LazyIndex(path=lazy_env, full_index=full_index)
+    
+    assert index.get("os") is None
+    assert index.get("json") is None
+    assert index.get("sys") is None
+    full_index.assert_not_called()
+
+def test_lazy_index_falls_back_to_full_index(lazy_env):
+    from depscripter.resolver import LazyIndex
+    path = lazy_env
+    index = LazyIndex(path=path)
+    
+    # "yaml" does not match the "PyYAML" distribution name
+    assert index.get("yaml") == ["PyYAML"]
+    assert index.get("attr") == ["attrs"]
+    assert index.used_full_index
+    assert index.versions["pyyaml"] == "6.0"
+
+def test_lazy_index_full_index_built_once(lazy_env):
+    from depscripter.resolver import LazyIndex
+    full_index = MagicMock(return_value=({"yaml": ["PyYAML"]}, {"pyyaml": "6.0"}))
+    index = LazyIndex(path=lazy_env, full_index=full_index)
+    
+    index.get("yaml")
+    index.get("not_installed")
+    index.get("yaml")
+    
+    assert full_index.call_count == 1
+
+def test_resolve_packages_with_lazy_index(lazy_env):
+    from depscripter.resolver import LazyIndex
+    index = LazyIndex(path=lazy_env)
+    
+    resolved = resolve_packages({"requests", "yaml", "os"}, mapping=index, versions=index.versions)
+    
+    assert resolved == {"requests": "2.31.0", "PyYAML": "6.0"}
+
+def test_resolve_skips_stdlib_backports():
+    # An installed backport claiming a stdlib name must not be picked up
+    module_names = {"typing", "requests"}
+    mapping = {"typing": ["typing"], "requests": ["requests"]}
+    
+    resolved = resolve_packages(module_names, pin_versions=False, mapping=mapping)
+    assert resolved == {"requests": None}
+
+def test_resolve_stdlib_never_hits_mapping():
+    mapping = MagicMock()
+    mapping.get.return_value = None
+    
+    resolve_packages({"os", "json", "tkinter", "foo"}, mapping=mapping)
+    
+    mapping.get.assert_called_once_with("foo")
+
+@pytest.fixture
+def make_namespace_env(make_dist):
+    def make(site, with_protobuf=True):
+        make_dist(site, "google-cloud-storage", "2.14.0", top_level=["google"], record=[
+            "google/cloud/storage/__init__.py",
+            "google/cloud/storage/blob.py",
+        ])
+        make_dist(site, "google-cloud-bigquery", "3.17.0", top_level=["google"], record=[
+            "google/cloud/bigquery/__init__.py",
+            "google/cloud/bigquery/table.py",
+        ])
+        if with_protobuf:
+            make_dist(site, "protobuf", "4.25.0", top_level=["google"], record=[
+                "google/protobuf/__init__.py",
+                "google/protobuf/message.py",
+                "google/protobuf/internal/__init__.py",
+            ])
+    return make
+
+def test_build_environment_index_namespace_prefixes(tmp_path, make_dist, make_namespace_env):
+    from depscripter.resolver import build_environment_index
+    make_namespace_env(tmp_path)
+    make_dist(tmp_path, "PyYAML", "6.0", top_level=["yaml"], record=["yaml/__init__.py", "yaml/constructor.py"])
+    
+    mapping, _ = build_environment_index(path=[str(tmp_path)])
+    
+    assert sorted(mapping["google"]) == ["google-cloud-bigquery", "google-cloud-storage", "protobuf"]
+    assert mapping["google.cloud.storage"] == ["google-cloud-storage"]
+    assert mapping["google.cloud.bigquery"] == ["google-cloud-bigquery"]
+    assert mapping["google.protobuf"] == ["protobuf"]
+    # Pruned: same providers as the parent package
+    assert "google.cloud.storage.blob" not in mapping
+    assert "google.protobuf.internal" not in mapping
+    # Regular packages are not expanded at all
+    assert not [key for key in mapping if key.startswith("yaml.")]
+
+def test_resolve_namespace_packages(tmp_path, make_namespace_env):
+    from depscripter.resolver import build_environment_index
+    make_namespace_env(tmp_path)
+    mapping, versions = build_environment_index(path=[str(tmp_path)])
+    
+    resolved = resolve_packages(
+        {"google.cloud.storage.blob.Blob", "google.protobuf.message", "google.cloud.bigquery"},
+        mapping=mapping, versions=versions,
+    )
+    
+    assert resolved == {"google-cloud-storage": "2.14.0", "google-cloud-bigquery": "3.17.0", "protobuf": "4.25.0"}
+
+def test_resolve_never_falls_back_past_namespace(tmp_path, make_namespace_env):
+    from depscripter.resolver import build_environment_index, lookup_module
+    make_namespace_env(tmp_path, with_protobuf=False)
+    mapping, _ = build_environment_index(path=[str(tmp_path)])
+    
+    assert lookup_module(mapping, "google.cloud.storage.Client") == ["google-cloud-storage"]
+    # Not installed: must not be attributed to another google-* distribution
+    assert lookup_module(mapping, "google.protobuf.message") is None
+    assert lookup_module(mapping, "google.cloud.pubsub") is None
+
+def test_lookup_module_plain_mapping():
+    from depscripter.resolver import lookup_module
+    mapping = {"requests": ["requests"]}
+    
+    assert lookup_module(mapping, "requests.adapters.HTTPAdapter") == ["requests"]
+    assert lookup_module(mapping, "requests") == ["requests"]
+    assert lookup_module(mapping, "missing.module") is None
+
+def test_lazy_index_dotted(tmp_path, make_dist, make_namespace_env):
+    from depscripter.resolver import LazyIndex
+    make_namespace_env(tmp_path)
+    make_dist(tmp_path, "requests", "2.31.0", top_level=["requests"])
+    index = LazyIndex(path=[str(tmp_path)])
+    
+    resolved = resolve_packages({"google.cloud.storage.blob", "requests.adapters"}, mapping=index, versions=index.versions)
+    
+    assert resolved == {"google-cloud-storage": "2.14.0", "requests": "2.31.0"}
+    assert not index.used_full_index
+    
+    assert resolve_packages({"google.protobuf.message"}, mapping=index, versions=index.versions) == {"protobuf": "4.25.0"}
+    assert index.used_full_index
+
+def test_packages_distributions_fallback_uses_record(tmp_path, make_dist):
+    import importlib.metadata
+    from depscripter.resolver import _get_packages_distributions_fallback
+    make_dist(tmp_path, "PyYAML", "6.0", top_level=["yaml", "_yaml"])
+    make_dist(tmp_path, "fast-ext", "1.0", record=[
+        "fast_ext.cpython-311-x86_64-linux-gnu.so",
+        "fast_ext_helpers.abi3.so",
+        "__pycache__/fast_ext_helpers.cpython-311.pyc",
+        "fast_ext-1.0.dist-info/RECORD",
+    ])
+    make_dist(tmp_path, "zope.interface", "6.0", record=["zope/interface/__init__.py", "zope.interface-6.0-nspkg.pth"])
+    
+    with patch("importlib.metadata.distributions", return_value=list(importlib.metadata.distributions(path=[str(tmp_path)]))):
+        mapping = _get_packages_distributions_fallback()
+    
+    assert mapping == {
+        "yaml": ["PyYAML"],
+        "_yaml": ["PyYAML"],
+        "fast_ext": ["fast-ext"],
+        "fast_ext_helpers": ["fast-ext"],
+        "zope": ["zope.interface"],
+    }
+
+def test_read_distributions_threads_keep_order(tmp_path, make_dist):
+    import importlib.metadata
+    from depscripter.resolver import read_distributions
+    for i in range(20):
+        make_dist(tmp_path, f"dist{i:02d}", "1.0", record=[f"mod{i:02d}.py"])
+    make_dist(tmp_path, "nameless", "1.0", top_level=["x"])
+    (tmp_path / "nameless-1.0.dist-info" / "METADATA").write_text("Metadata-Version: 2.1\n", encoding="utf-8")
+    dists = list(importlib.metadata.distributions(path=[str(tmp_path)]))
+    
+    serial = read_distributions(dists, workers=1)
+    threaded = read_distributions(dists, workers=8)
+    
+    assert [found and found[:3] for found in threaded] == [found and found[:3] for found in serial]
+    assert sum(found is None for found in serial) == 1
+    assert ("dist07", "1.0", ["mod07"]) in [found[:3] for found in serial if found]
+
+def test_map_distributions_threads_are_opt_in(monkeypatch):
+    import threading
+    from depscripter.resolver import map_distributions
+
+    def thread_of(dist):
+        return threading.get_ident()
+
+    assert set(map_distributions(thread_of, range(50))) == {threading.get_ident()}
+
+    monkeypatch.setenv("DEPSCRIPTER_METADATA_THREADS", "4")
+    assert threading.get_ident() not in map_distributions(thread_of, range(50))
+
+def test_resolve_packages_reports_unresolved():
+    mapping = {"requests": ["requests"]}
+    unresolved = set()
+    imported = set()
+
+    result = resolve_packages({"requests.adapters.HTTPAdapter", "typing.Iterable", "_private", "helpers", "local.sub"}, pin_versions=False, mapping=mapping, unresolved=unresolved, imported=imported)
+
+    assert result == {"requests": None}
+    assert unresolved == {"helpers", "local"}
+    assert imported == {"requests", "typing", "_private", "helpers", "local"}
+
+def test_resolve_packages_reports_unresolved_under_namespace():
+    mapping = {"google.protobuf": ["protobuf"], "google.": ["protobuf"]}
+    unresolved = set()
+    imported = set()
+
+    resolve_packages({"google.protobuf.message.Message", "google.mylib.util"}, pin_versions=False, mapping=mapping, unresolved=unresolved, imported=imported)
+
+    assert unresolved == {"google.mylib"}
+    assert imported == {"google.protobuf", "google.mylib"}
+
+def test_lazy_index_reports_imported_prefix(tmp_path, make_dist, make_namespace_env):
+    from depscripter.resolver import LazyIndex
+    make_namespace_env(tmp_path)
+    make_dist(tmp_path, "zope.interface", "6.1", top_level=["zope"], record=["zope/interface/__init__.py"])
+    # Named after google.cloud.vision, but ships something else
+    make_dist(tmp_path, "google-cloud-vision", "3.0", top_level=["google"], record=["google/cloud/other/__init__.py"])
+    index = LazyIndex(path=[str(tmp_path)])
+    imported = set()
+
+    resolved = resolve_packages({"google.cloud.storage.Client", "zope.interface.implementer"}, pin_versions=False, mapping=index, imported=imported)
+
+    assert resolved == {"google-cloud-storage": None, "zope.interface": None}
+    assert imported == {"google.cloud.storage", "zope.interface"}
+    assert not index.used_full_index
+    assert index.get("google.cloud.vision") is None
+
+def test_resolver_builds_once_across_threads():
+    import threading
+    from depscripter.resolver import Resolver
+
+    built = threading.Event()
+
+    def slow_build(path=None, workers=None):
+        built.wait(1)
+        return {"requests": ["requests"]}, {"requests": "2.31.0"}
+
+    resolver = Resolver()
+    results = []
+    with patch("depscripter.resolver.build_environment_index", side_effect=slow_build) as mock_index:
+        threads = [threading.Thread(target=lambda: results.append(resolver.resolve({"requests"}))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        built.set()
+        for thread in threads:
+            thread.join(5)
+
+    assert mock_index.call_count == 1
+    assert results == [{"requests": "2.31.0"}] * 8
+    # Reading the counter leaves it alone
+    assert [resolver.stats()["resolutions"] for _ in range(3)] == [8, 8, 8]
+
+def test_resolver_serves_old_index_during_rebuild():
+    import threading
+    from depscripter.resolver import Resolver
+
+    rebuilding = threading.Event()
+    finish = threading.Event()
+    indexes = [({"yaml": ["PyYAML"]}, {"pyyaml": "6.0"}), ({"yaml": ["PyYAML"]}, {"pyyaml": "6.0.1"})]
+
+    def build(path=None, workers=None):
+        if len(indexes) == 1:
+            rebuilding.set()
+            finish.wait(5)
+        return indexes.pop(0)
+
+    resolver = Resolver(check_interval=0)
+    with patch("depscripter.resolver.build_environment_index", side_effect=build), \
+         patch.object(Resolver, "is_stale", side_effect=lambda: bool(indexes)):
+        assert resolver.resolve({"yaml"}) == {"PyYAML": "6.0"}
+        rebuilder = threading.Thread(target=resolver.refresh)
+        rebuilder.start()
+        assert rebuilding.wait(5)
+
+        # Another thread is stuck rebuilding; this one keeps the old index
+        assert resolver.resolve({"yaml"}) == {"PyYAML": "6.0"}
+
+        finish.set()
+        rebuilder.join(5)
+        assert resolver.resolve({"yaml"}) == {"PyYAML": "6.0.1"}
+    assert resolver.stats()["builds"] == 2
+    assert resolver.stats()["resolutions"] == 3
+
+def test_resolver_refreshes_when_stale(tmp_path, make_dist):
+    import os
+    import time
+    from depscripter.resolver import Resolver
+
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0", top_level=["requests"])
+    resolver = Resolver(path=[str(site)])
+
+    assert resolver.resolve({"requests", "yaml"}) == {"requests": "2.31.0"}
+    assert not resolver.is_stale()
+    assert not resolver.refresh()
+
+    make_dist(site, "PyYAML", "6.0", top_level=["yaml"])
+    # Make sure the directory mtime moves even on coarse clocks
+    os.utime(site, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+
+    # No automatic checks by default
+    assert resolver.resolve({"yaml"}) == {}
+    assert resolver.is_stale()
+    assert resolver.refresh()
+    assert resolver.resolve({"yaml"}) == {"PyYAML": "6.0"}
+    assert resolver.stats()["builds"] == 2
+
+    assert resolver.refresh(force=True)
+    assert resolver.stats()["builds"] == 3
+
+def test_resolver_checks_automatically(tmp_path, make_dist):
+    import os
+    import time
+    from depscripter.resolver import Resolver
+
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0", top_level=["requests"])
+    resolver = Resolver(path=[str(site)], check_interval=0)
+    assert resolver.resolve({"yaml"}) == {}
+
+    make_dist(site, "PyYAML", "6.0", top_level=["yaml"])
+    os.utime(site, ns=(time.time_ns() + 10**9, time.time_ns() + 10**9))
+
+    assert resolver.resolve({"yaml"}) == {"PyYAML": "6.0"}
+
+def test_resolver_stats(tmp_path, make_dist):
+    from depscripter.resolver import Resolver
+
+    site = tmp_path / "site-packages"
+    make_dist(site, "requests", "2.31.0", top_level=["requests"])
+    resolver = Resolver(path=[str(site)])
+
+    before = resolver.stats()
+    assert (before["modules"], before["builds"], before["built_at"]) == (0, 0, None)
+
+    resolver.index()
+    stats = resolver.stats()
+    assert stats["modules"] == 1
+    assert stats["distributions"] == 1
+    assert stats["memory_bytes"] > before["memory_bytes"]
+    assert stats["builds"] == 1
+    assert stats["built_at"] is not None
@@ -1,3 +1,5 @@
+import sys
+import pytest
 from depscripter.scanner import scan_imports
 
 def test_scan_simple_import():
@@ -27,3 +29,154 @@ def test_ignore_relative_import():
 def test_ignore_deep_relative_import():
     code = "from ..sub import module"
     assert scan_imports(code) == set()
+
+NESTED_CODE = """
+import top
+def f():
+    import in_function
+    class Inner:
+        import in_class
+async def g():
+    async with ctx():
+        import in_async_with
+    async for x in y:
+        import in_async_for
+if cond:
+    import in_if
+elif other:
+    import in_elif
+else:
+    import in_else
+try:
+    import in_try
+except ImportError:
+    import in_except
+else:
+    import in_try_else
+finally:
+    import in_finally
+with open('x') as fh:
+    import in_with
+for i in range(3):
+    import in_for
+else:
+    import in_for_else
+while False:
+    import in_while
+else:
+    import in_while_else
+x = [i for i in range(10)]
+y = lambda: __import__("dynamic")
+"""
+
+def test_scan_nested_statement_bodies():
+    assert scan_imports(NESTED_CODE) == {
+        "top", "in_function", "in_class", "in_async_with", "in_async_for",
+        "in_if", "in_elif", "in_else", "in_try", "in_except", "in_try_else",
+        "in_finally", "in_with", "in_for", "in_for_else", "in_while",
+        "in_while_else",
+    }
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="match statement needs Python 3.10+")
+def test_scan_match_cases():
+    code = """
+match command:
+    case "go":
+        import in_match
+    case _:
+        from in_match_default import thing
+"""
+    assert scan_imports(code) == {"in_match", "in_match_default"}
+
+def test_scan_matches_full_walk():
+    import ast
+    expected = set()
+    for node in ast.walk(ast.parse(NESTED_CODE)):
+        if isinstance(node, ast.Import):
+            expected.update(alias.name.split('.')[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and not node.level:
+            expected.add(node.module.split('.')[0])
+    assert scan_imports(NESTED_CODE) == expected
+
+ENGINE_CASES = [
+    "import os\nimport requests",
+    "import a.b as c, d",
+    "from x.y import (\n    a,\n    b as c,\n)\nimport q",
+    "from . import z\nfrom ..m import k\nfrom ...deep.pkg import j",
+    "if x: import inline_if\nelse: from inline_else import baz",
+    "x = 1; import after_semicolon; y = 2",
+    "import \\\n    continued",
+    "from \\\n    continued_from import z",
+    "def f():\n    yield from g()\n    raise E from e",
+    "s = '''\nimport not_in_docstring\n'''\n# import not_in_comment",
+    "class A:\n    import in_class\n    def m(self):\n        from in_method import x",
+    "from __future__ import annotations\nimport typing",
+    "d = {'a': 1}\nlam = lambda: 1\nx: int = 2\nimport after_colons",
+    NESTED_CODE,
+]
+
+@pytest.mark.parametrize("code", ENGINE_CASES)
+def test_engines_agree(code):
+    assert scan_imports(code, engine="tokenize") == scan_imports(code, engine="ast")
+
+def test_engines_agree_on_examples():
+    from pathlib import Path
+    root = Path(__file__).parent.parent
+    files = sorted(root.glob("examples/*/*.py")) + sorted(root.glob("src/depscripter/*.py"))
+    assert files
+    for f in files:
+        code = f.read_text(encoding="utf-8")
+        assert scan_imports(code, engine="tokenize") == scan_imports(code, engine="ast"), f
+
+def test_tokenize_engine_is_tokenizer_only():
+    from depscripter.scanner import _scan_imports_tokenize
+    assert _scan_imports_tokenize("from a.b import (c,\n d)\nimport e as f") == {"a", "e"}
+
+def test_tokenize_engine_falls_back_to_ast():
+    # Unterminated bracket: the tokenizer gives up, the AST engine reports it
+    with pytest.raises(SyntaxError):
+        scan_imports("import os\nx = (", engine="tokenize")
+
+def test_tokenize_engine_ambiguous_import_falls_back():
+    from depscripter.scanner import _Ambiguous, _scan_imports_tokenize
+    with pytest.raises(_Ambiguous):
+        _scan_imports_tokenize("x = import_me = 1\ny = 2 import z")
+    with pytest.raises(SyntaxError):
+        scan_imports("y = 2 import z", engine="tokenize")
+
+def test_unknown_engine():
+    with pytest.raises(ValueError):
+        scan_imports("import os", engine="regex")
+
+DOTTED_CODE = """
+import google.cloud.storage
+import os.path as osp
+from azure.identity import DefaultAzureCredential, ClientSecretCredential as CSC
+from zope.interface import (
+    implementer,
+    Interface,
+)
+from numpy import *
+from . import sibling
+from .local import thing
+"""
+
+def test_scan_dotted_paths():
+    expected = {
+        "google.cloud.storage",
+        "os.path",
+        "azure.identity.DefaultAzureCredential",
+        "azure.identity.ClientSecretCredential",
+        "zope.interface.implementer",
+        "zope.interface.Interface",
+        "numpy",
+    }
+    assert scan_imports(DOTTED_CODE, dotted=True) == expected
+    assert scan_imports(DOTTED_CODE, engine="tokenize", dotted=True) == expected
+    assert scan_imports(DOTTED_CODE) == {"google", "os", "azure", "zope", "numpy"}
+
+def test_scan_dotted_tokenize_falls_back():
+    from depscripter.scanner import _Ambiguous, _scan_imports_tokenize
+    for code in ["from a import b,\n", "from a import (b c)\n", "from a import * as b\n"]:
+        with pytest.raises(_Ambiguous):
+            _scan_imports_tokenize(code, dotted=True)
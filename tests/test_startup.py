@@ -0,0 +1,82 @@
+import subprocess
+import sys
+
+# Modules that only specific code paths need and that must not be imported at
+# startup (they cost tens of milliseconds together)
+DEFERRED_MODULES = [
+    "importlib.metadata",
+    "email",
+    "zipfile",
+    "inspect",
+    "multiprocessing",
+    "concurrent.futures.process",
+    "tempfile",
+    "tokenize",
+    "socket",
+    "threading",
+    "subprocess",
+]
+
+# Parts of depscripter that only a CLI flag needs
+FLAG_MODULES = [
+    "depscripter.daemon",
+    "depscripter.lockfile",
+    "depscripter.known",
+    "depscripter.graph",
+    "depscripter.markers",
+    "depscripter.gitfiles",
+]
+
+def import_times(args, cwd=None):
+    """
+    Runs python -X importtime with args and returns {module: cumulative_us}.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime"] + args,
+        capture_output=True, text=True, cwd=cwd,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = int(cumulative)
+    return result, times
+
+def assert_not_imported(times):
+    imported = [m for m in DEFERRED_MODULES if m in times]
+    assert imported == [], f"imported at startup: {imported}"
+
+def test_cli_import_is_lazy():
+    # Wall-clock budgets depend on the machine; what is imported does not
+    _, times = import_times(["-c", "import depscripter.cli"])
+    
+    assert "depscripter.cli" in times
+    assert_not_imported(times)
+    assert [m for m in FLAG_MODULES if m in times] == []
+
+def test_package_import_is_lazy():
+    _, times = import_times(["-c", "import depscripter"])
+    
+    assert "depscripter" in times
+    assert "depscripter.resolver" not in times
+    assert "depscripter.scanner" not in times
+
+def test_help_imports_little():
+    result, times = import_times(["-m", "depscripter", "--help"])
+    
+    assert result.returncode == 0
+    assert_not_imported(times)
+
+def test_cache_hit_run_skips_importlib_metadata(tmp_path):
+    script = tmp_path / "script.py"
+    script.write_text("import os", encoding="utf-8")
+    
+    # First run fills the environment index cache, the second one is served from it
+    cold, cold_times = import_times(["-m", "depscripter", str(script)])
+    warm, warm_times = import_times(["-m", "depscripter", str(script)])
+    
+    assert cold.returncode == 0 and warm.returncode == 0
+    assert "importlib.metadata" in cold_times
+    assert_not_imported(warm_times)
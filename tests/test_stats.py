@@ -0,0 +1,59 @@
+import json
+
+from depscripter import stats
+from depscripter.stats import RunStats, collect_stats, format_json, format_prometheus, format_table
+
+def test_phases_add_up():
+    run = RunStats()
+    run.add_time("parse", 0.25)
+    run.add_time("parse", 0.5)
+    with run.phase("index"):
+        pass
+    run.add_time("custom", 1.0)
+
+    data = run.as_dict()
+    assert data["timings"]["parse"] == 0.75
+    # Known phases first, in run order
+    assert list(data["timings"]) == ["parse", "index", "custom"]
+
+def test_collect_stats_hook():
+    stats.count("ignored")
+    with collect_stats() as outer:
+        stats.count("distributions_read", 3)
+        with collect_stats() as inner:
+            stats.count("distributions_read")
+        stats.count("distributions_read")
+
+    assert outer.counts == {"distributions_read": 4}
+    assert inner.counts == {"distributions_read": 1}
+    assert stats._current is None
+
+def test_library_counts(tmp_path, make_dist):
+    from depscripter.cache import get_environment_index
+
+    site = tmp_path / "site"
+    make_dist(site, "demo", "1.0")
+
+    with collect_stats() as run:
+        get_environment_index(cache_dir=tmp_path / "cache", path=[str(site)])
+        get_environment_index(cache_dir=tmp_path / "cache", path=[str(site)])
+
+    assert run.counts == {"distributions_read": 1, "index_cache_hits": 1, "index_cache_misses": 1}
+
+def test_formats():
+    run = RunStats()
+    run.add_time("read", 0.125)
+    run.count("files", 2)
+
+    table = format_table(run)
+    assert "read            0.1250" in table
+    assert "files  2" in table
+
+    data = json.loads(format_json(run))
+    assert data["counts"] == {"files": 2}
+    assert data["timings"] == {"read": 0.125}
+
+    prometheus = format_prometheus(run)
+    assert 'depscripter_phase_seconds{phase="read"} 0.125000' in prometheus
+    assert 'depscripter_events{name="files"} 2' in prometheus
+    assert "# TYPE depscripter_run_seconds gauge" in prometheus
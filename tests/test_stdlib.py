@@ -0,0 +1,30 @@
+import sys
+import pytest
+from depscripter.stdlib import _STDLIB_3_8, _STDLIB_3_9, get_stdlib_module_names, is_stdlib_module
+
+def test_common_stdlib_modules():
+    for name in ["os", "sys", "json", "re", "tkinter", "asyncio", "typing", "__future__"]:
+        assert is_stdlib_module(name), name
+
+def test_third_party_modules():
+    for name in ["requests", "numpy", "yaml", "depscripter"]:
+        assert not is_stdlib_module(name), name
+
+def test_dotted_names():
+    assert is_stdlib_module("os.path")
+    assert is_stdlib_module("xml.etree.ElementTree")
+    assert not is_stdlib_module("google.cloud")
+
+def test_bundled_lists_track_version_changes():
+    # Backported to 3.8 through PyPI, stdlib only from 3.9
+    assert "graphlib" in _STDLIB_3_9
+    assert "graphlib" not in _STDLIB_3_8
+    assert "zoneinfo" not in _STDLIB_3_8
+    assert "dummy_threading" in _STDLIB_3_8
+    # Platform specific modules are included regardless of the current OS
+    assert "winreg" in _STDLIB_3_8
+    assert "msvcrt" in _STDLIB_3_9
+
+@pytest.mark.skipif(sys.version_info < (3, 10), reason="sys.stdlib_module_names needs Python 3.10+")
+def test_uses_sys_stdlib_module_names():
+    assert get_stdlib_module_names() == frozenset(sys.stdlib_module_names)
@@ -0,0 +1,63 @@
+import os
+import stat
+from unittest.mock import patch
+import pytest
+from depscripter.writer import write_if_changed, write_text_atomic
+
+def test_write_atomic_creates_file(tmp_path):
+    f = tmp_path / "new.py"
+    write_text_atomic(f, "print('hi')\n")
+    
+    assert f.read_text(encoding="utf-8") == "print('hi')\n"
+    assert list(tmp_path.iterdir()) == [f]
+
+def test_write_atomic_preserves_mode(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("old", encoding="utf-8")
+    os.chmod(f, 0o755)
+    
+    write_text_atomic(f, "new")
+    
+    assert f.read_text(encoding="utf-8") == "new"
+    assert stat.S_IMODE(os.stat(f).st_mode) == 0o755
+
+def test_write_atomic_follows_symlink(tmp_path):
+    target = tmp_path / "target.py"
+    target.write_text("old", encoding="utf-8")
+    link = tmp_path / "link.py"
+    link.symlink_to(target)
+    
+    write_text_atomic(link, "new")
+    
+    assert link.is_symlink()
+    assert target.read_text(encoding="utf-8") == "new"
+
+def test_write_atomic_failure_keeps_original(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("original", encoding="utf-8")
+    
+    with patch("depscripter.writer.os.replace", side_effect=OSError("disk full")):
+        with pytest.raises(OSError):
+            write_text_atomic(f, "new")
+    
+    assert f.read_text(encoding="utf-8") == "original"
+    assert list(tmp_path.iterdir()) == [f]
+
+def test_write_if_changed_skips_identical(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("same", encoding="utf-8")
+    os.utime(f, ns=(1_000_000_000, 1_000_000_000))
+    
+    assert write_if_changed(f, "same") is False
+    assert os.stat(f).st_mtime_ns == 1_000_000_000
+    
+    assert write_if_changed(f, "different") is True
+    assert f.read_text(encoding="utf-8") == "different"
+
+def test_write_if_changed_uses_known_contents(tmp_path):
+    f = tmp_path / "script.py"
+    f.write_text("same", encoding="utf-8")
+    
+    with patch("depscripter.writer.write_text_atomic") as mock_write:
+        assert write_if_changed(f, "same", current="same") is False
+        mock_write.assert_not_called()